@@ -8,6 +8,12 @@ import json
 import requests
 from datetime import datetime, timedelta
 
+from bucket_ladder import BucketLadder, ladder_for_length, save_market_ladder
+from dashboard_shards import publish_dashboard
+from window_calendar import ET_FORMAT
+
+LADDER_FILE = 'data/bucket_ladders.json'
+
 # Polymarket 市场定义
 POLYMARKET_MARKETS = [
     {
@@ -69,6 +75,22 @@ def fetch_market_data(start_utc, end_utc):
     return None
 
 
+def register_ladders():
+    """为每个市场在 data/bucket_ladders.json 中登记区间阶梯
+
+    市场定义中有 'ladder'（区间下界）时使用它，否则按窗口天数取默认阶梯。
+    """
+    for market in POLYMARKET_MARKETS:
+        start = datetime.fromisoformat(market['start_et'])
+        end = datetime.fromisoformat(market['end_et'])
+        if 'ladder' in market:
+            ladder = BucketLadder(market['ladder'])
+        else:
+            ladder = ladder_for_length((end - start).total_seconds() / 86400)
+        save_market_ladder(LADDER_FILE, f"{start.strftime(ET_FORMAT)}|{end.strftime(ET_FORMAT)}", ladder)
+        print(f"   区间阶梯 {market['name']}: {ladder.names[0]} … {ladder.names[-1]} ({len(ladder)} 个区间)")
+
+
 def update_dashboard_with_markets():
     """更新看板数据，包含所有市场"""
 
@@ -117,8 +139,7 @@ def update_dashboard_with_markets():
     dashboard_data['last_update'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
     # 保存
-    with open('data/dashboard_data.json', 'w') as f:
-        json.dump(dashboard_data, f, ensure_ascii=False, indent=2)
+    publish_dashboard(dashboard_data)
 
     print(f"\n✅ 看板数据已更新")
     print(f"   共 {len(markets_data)} 个市场")
@@ -131,6 +152,7 @@ if __name__ == "__main__":
     print("  📊 添加 Polymarket 市场数据")
     print("=" * 70)
 
+    register_ladders()
     update_dashboard_with_markets()
 
     print("=" * 70)
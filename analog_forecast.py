@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+相似窗口预测 (Analog) - 在历史窗口中寻找走势最接近的 k 条累计曲线
+================================================
+轨迹库：对每个窗口长度 H（小时），取存档中所有起点按整点滑动、长度为 H 的窗口，
+以及 tracking_periods.json 中已结束且长度相同的窗口，记录逐小时累计推文数，
+组成 (窗口数 × (H+1)) 的 int32 矩阵。轨迹库预先生成并保存为 .npy，
+查询时以内存映射方式打开，不需要读取或解析存档。
+
+匹配：当前市场已过部分的逐小时累计曲线与轨迹库同一时段逐行比较，
+按时间衰减加权的均方差一次向量化计算；最近邻之间要求起点相隔至少若干小时，
+避免相邻滑动窗口重复计入同一段历史。
+
+预测：每个最近邻在剩余时段的增量作为一种可能的延续，
+以距离核加权、逐个做 Poisson 平滑后混合为未来推文数 PMF。
+
+使用方法：
+    python analog_forecast.py build            # 为当前市场长度生成轨迹库
+    python analog_forecast.py query 120        # 当前时刻、120 条推文的最近邻
+"""
+
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timezone
+from typing import List, Optional
+
+import numpy as np
+
+from post_archive import load_post_timestamps
+
+
+# ============================================================
+# 轨迹库
+# ============================================================
+
+def tracking_curves(path: str, hours: int) -> List[tuple]:
+    """tracking_periods.json 中已结束、长度为 hours 的窗口 (开始时间戳, 逐小时累计曲线)"""
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        trackings = json.load(f)
+
+    curves = []
+    for item in trackings:
+        data = item.get('data', item)
+        stats = data.get('stats') or {}
+        daily = stats.get('daily') or []
+        if not stats.get('isComplete') or len(daily) < hours:
+            continue
+        start = datetime.fromisoformat(data['startDate'].replace('Z', '+00:00')).timestamp()
+        end = datetime.fromisoformat(data['endDate'].replace('Z', '+00:00')).timestamp()
+        if round((end - start) / 3600) != hours:
+            continue
+        # daily[i] 为第 i 小时结束时的累计数
+        curve = [0] + [point['cumulative'] for point in daily[:hours]]
+        curves.append((start, curve))
+    return curves
+
+
+class AnalogLibrary:
+    """长度为 hours 的历史窗口逐小时累计曲线"""
+
+    def __init__(self, curves: np.ndarray, starts: np.ndarray, meta: dict):
+        self.curves = curves    # (窗口数, hours+1) int32，可为内存映射
+        self.starts = starts    # 各窗口开始时间戳
+        self.meta = meta
+        self.hours = curves.shape[1] - 1
+
+    @classmethod
+    def from_timestamps(cls, timestamps: np.ndarray, hours: int,
+                        extra: Optional[List[tuple]] = None) -> 'AnalogLibrary':
+        """由存档生成所有整点起点的窗口（extra 为额外的 (开始时间戳, 曲线)）"""
+        starts = np.empty(0)
+        if timestamps.size:
+            origin = np.ceil(timestamps[0] / 3600) * 3600
+            n_windows = int((timestamps[-1] - origin) // 3600) - hours + 1
+            starts = origin + 3600.0 * np.arange(max(n_windows, 0))
+
+        offsets = 3600.0 * np.arange(hours + 1)
+        curves = (np.searchsorted(timestamps, starts[:, None] + offsets)
+                  - np.searchsorted(timestamps, starts)[:, None]).astype(np.int32)
+
+        if extra:
+            starts = np.append(starts, [start for start, _ in extra])
+            curves = np.vstack([curves, np.array([curve for _, curve in extra], dtype=np.int32)])
+
+        meta = {'hours': hours, 'n_windows': int(len(starts)), 'n_extra': len(extra or [])}
+        return cls(curves, starts, meta)
+
+    # ========================================================
+    # 持久化
+    # ========================================================
+
+    @staticmethod
+    def paths(directory: str, hours: int) -> tuple:
+        base = os.path.join(directory, f'{hours}h')
+        return f'{base}_curves.npy', f'{base}_starts.npy', f'{base}.json'
+
+    def save(self, directory: str):
+        """先写临时文件再替换（元数据最后替换），并发的读者不会读到写了一半的文件"""
+        os.makedirs(directory, exist_ok=True)
+        curves_path, starts_path, meta_path = self.paths(directory, self.hours)
+        for path, array in ((curves_path, np.ascontiguousarray(self.curves)), (starts_path, self.starts)):
+            with open(f'{path}.{os.getpid()}.tmp', 'wb') as f:
+                np.save(f, array)
+            os.replace(f'{path}.{os.getpid()}.tmp', path)
+        with open(f'{meta_path}.{os.getpid()}.tmp', 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f, indent=2)
+        os.replace(f'{meta_path}.{os.getpid()}.tmp', meta_path)
+
+    @classmethod
+    def load(cls, directory: str, hours: int) -> Optional['AnalogLibrary']:
+        """以内存映射方式打开轨迹库，不存在时返回 None"""
+        curves_path, starts_path, meta_path = cls.paths(directory, hours)
+        if not all(os.path.exists(p) for p in (curves_path, starts_path, meta_path)):
+            return None
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        return cls(np.load(curves_path, mmap_mode='r'), np.load(starts_path), meta)
+
+    # ========================================================
+    # 匹配与预测
+    # ========================================================
+
+    def at(self, elapsed_hours: float, rows=slice(None)) -> np.ndarray:
+        """各窗口在 elapsed_hours 处的累计数（整点之间线性插值）"""
+        i = min(int(elapsed_hours), self.hours - 1)
+        frac = elapsed_hours - i
+        lower = self.curves[rows, i].astype(np.float64)
+        return lower + frac * (self.curves[rows, i + 1] - lower)
+
+    def neighbours(self, partial: np.ndarray, elapsed_hours: float, k: int,
+                   half_life_hours: float, min_separation_hours: float) -> tuple:
+        """与当前曲线最接近的 k 个窗口，返回 (行号, 距离)
+
+        partial[i] 为第 i 个整点的累计数，最后一个元素为 elapsed_hours 时刻的当前数。
+        """
+        n_full = len(partial) - 1
+        observed = np.column_stack([self.curves[:, :n_full], self.at(elapsed_hours)])
+        lags = np.append(elapsed_hours - np.arange(n_full), 0.0)
+        weights = 0.5 ** (lags / half_life_hours)
+        distance = np.sqrt(((observed - partial) ** 2) @ (weights / weights.sum()))
+
+        # 先取候选再按起点间隔贪心去重，候选数留足相邻窗口被剔除的余量
+        n_candidates = min(len(distance), k * max(int(2 * min_separation_hours), 1))
+        candidates = np.argpartition(distance, n_candidates - 1)[:n_candidates]
+        candidates = candidates[np.argsort(distance[candidates], kind='stable')]
+
+        chosen = []
+        for row in candidates:
+            if all(abs(self.starts[row] - self.starts[c]) >= min_separation_hours * 3600 for c in chosen):
+                chosen.append(row)
+                if len(chosen) == k:
+                    break
+        chosen = np.array(chosen, dtype=np.int64)
+        return chosen, distance[chosen]
+
+    def forecast(self, partial: np.ndarray, elapsed_hours: float, k: int = 25,
+                 half_life_hours: float = 12.0, min_separation_hours: float = 6.0) -> dict:
+        """由最近邻的剩余时段增量得到未来推文数 PMF"""
+        from scipy.stats import poisson
+
+        rows, distance = self.neighbours(partial, elapsed_hours, k, half_life_hours, min_separation_hours)
+        increments = np.maximum(self.curves[rows, self.hours] - self.at(elapsed_hours, rows), 0.0)
+
+        # 距离核：带宽取最近邻距离的中位数
+        bandwidth = max(float(np.median(distance)), 1.0)
+        weights = np.exp(-0.5 * (distance / bandwidth) ** 2)
+        weights /= weights.sum()
+
+        # 每个延续以 Poisson 平滑，避免未出现过的取值概率为 0
+        support = np.arange(int(increments.max() + 6 * np.sqrt(increments.max() + 1) + 20))
+        pmf = weights @ poisson.pmf(support[None, :], increments[:, None] + 0.5)
+        pmf /= pmf.sum()
+        mean = float(support @ pmf)
+        return {
+            'pmf': pmf,
+            'mean': mean,
+            'variance': float(((support - mean) ** 2) @ pmf),
+            'rows': rows,
+            'distance': distance,
+            'increments': increments,
+        }
+
+
+def partial_curve(timestamps: np.ndarray, start_ts: float, elapsed_hours: float, current_count: int) -> np.ndarray:
+    """当前市场已过部分的逐整点累计曲线，最后追加当前数
+
+    整点处的累计数取自存档；存档未覆盖的整点在最后已知点与当前数之间线性插值，
+    存档滞后于实时计数时截断到当前数。
+    """
+    hours = start_ts + 3600.0 * np.arange(int(elapsed_hours) + 1)
+    cumulative = (np.searchsorted(timestamps, hours) - np.searchsorted(timestamps, start_ts)).astype(np.float64)
+
+    covered_until = timestamps[-1] if timestamps.size else -np.inf
+    known = hours <= covered_until
+    known[0] = True
+    last = int(np.flatnonzero(known)[-1])
+    if last < len(hours) - 1:
+        now_ts = start_ts + elapsed_hours * 3600
+        cumulative[last + 1:] = np.interp(hours[last + 1:], [hours[last], now_ts], [cumulative[last], current_count])
+    return np.append(np.minimum(cumulative, current_count), current_count)
+
+
+def load_analog_library(archive_path: str, tracking_path: str, directory: str, hours: int) -> AnalogLibrary:
+    """打开轨迹库，存档更新后重新生成"""
+    archive_mtime = os.path.getmtime(archive_path) if os.path.exists(archive_path) else None
+    library = AnalogLibrary.load(directory, hours)
+    if library is not None and library.meta.get('archive_mtime') == archive_mtime:
+        return library
+
+    library = AnalogLibrary.from_timestamps(
+        load_post_timestamps(archive_path), hours, tracking_curves(tracking_path, hours)
+    )
+    library.meta['archive_mtime'] = archive_mtime
+    library.save(directory)
+    return AnalogLibrary.load(directory, hours)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='相似窗口预测')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('build', help='为当前市场长度生成轨迹库')
+    query_parser = subparsers.add_parser('query', help='显示当前市场的最近邻')
+    query_parser.add_argument('count', type=int, help='当前推文数')
+    args = parser.parse_args()
+
+    from elon_predictor_enhanced import CONFIG, EnhancedTweetPredictor, load_tuned_config
+
+    config = dict(load_tuned_config(CONFIG), model_type='analog', verbose=False)
+    predictor = EnhancedTweetPredictor(config)
+    window = predictor.parse_time_window()
+
+    start = time.perf_counter()
+    library = predictor.load_analog_library()
+    elapsed = time.perf_counter() - start
+    print(f"✅ 轨迹库: {library.meta['n_windows']} 个 {library.hours} 小时窗口"
+          f"（其中 tracking {library.meta['n_extra']} 个）  耗时: {elapsed * 1000:.1f} ms")
+    if args.command == 'build':
+        return
+
+    now_ts = time.time()
+    elapsed_hours = min(max((now_ts - window['start_ts']) / 3600, 0.0), library.hours)
+    timestamps = load_post_timestamps(os.path.join(config['data_dir'], config['archive_file']))
+    partial = partial_curve(timestamps, window['start_ts'], elapsed_hours, args.count)
+
+    start = time.perf_counter()
+    result = library.forecast(partial, elapsed_hours, config['analog_k'],
+                              config['analog_half_life_hours'], config['analog_min_separation_hours'])
+    elapsed = time.perf_counter() - start
+
+    print(f"\n📈 已过 {elapsed_hours:.1f} 小时，当前 {args.count} 条")
+    print(f"   {'窗口开始 (UTC)':20s} {'距离':>8s} {'剩余增量':>8s}")
+    for row, dist, inc in zip(result['rows'], result['distance'], result['increments']):
+        started = datetime.fromtimestamp(library.starts[row], timezone.utc).strftime('%Y-%m-%d %H:%M')
+        print(f"   {started:20s} {dist:8.1f} {inc:8.0f}")
+    print(f"\n   期望总数: {args.count + result['mean']:.1f} 条  匹配耗时: {elapsed * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -104,12 +104,18 @@ while True:
                 subprocess.run(["git", "checkout", "gh-pages"])
                 subprocess.run(["git", "checkout", "main", "--", "dashboard.html",
                               "data/daily_tweets.json", "data/dashboard_data.json"])
+                # 看板分片不进 main，在 gh-pages 上由 dashboard_data.json 重新生成，
+                # 并按目录同步（已删除的旧分片也从 gh-pages 删除）
+                subprocess.run(["python", "dashboard_shards.py"])
+                subprocess.run(["git", "add", "-A", "-f", "data/dashboard"])
                 subprocess.run(["git", "add", "."])
 
                 deploy_msg = f"📊 Update dashboard {now.strftime('%Y-%m-%d %H:%M:%S')}"
                 subprocess.run(["git", "commit", "-m", deploy_msg])
                 subprocess.run(["git", "push", "origin", "gh-pages"])
                 subprocess.run(["git", "checkout", "main"])
+                # 切回 main 时 gh-pages 跟踪的分片会从工作区移除，重新生成供本地看板服务使用
+                subprocess.run(["python", "dashboard_shards.py"])
 
                 print("  ✅ 更新完成！")
             else:
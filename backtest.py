@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""
+历史回测 - 检验 EnhancedTweetPredictor 的校准程度
+================================================
+对每个历史窗口（本地存档生成的 2 天/7 天市场窗口，或 tracking_periods.json），
+在检查点重放当时的累计推文数，调用预测器并按区间计算：
+  - 对数损失 (log loss)
+  - Brier 分数
+  - 80% / 90% 置信区间覆盖率
+  - 各区间的平均预测概率与实际命中率
+
+窗口分配到进程池并行计算，结果按 (模型版本, 窗口) 缓存。
+
+使用方法：
+    python backtest.py                     # 25/50/75% 检查点
+    python backtest.py --hourly            # 每小时一个检查点
+    python backtest.py --workers 8 --model neg_binom
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+import pytz
+
+from analog_forecast import AnalogLibrary
+from bucket_ladder import LENGTH_LADDERS, BucketLadder
+from dispersion import DispersionTable
+from elon_predictor_enhanced import (
+    CONFIG, EnhancedTweetPredictor, config_fingerprint, load_tuned_config,
+)
+from hawkes_model import HawkesModel
+from hour_profile import HourOfWeekProfile
+from post_archive import load_post_timestamps
+from sleep_model import InactiveBlockModel
+from window_calendar import ET_FORMAT
+
+# 修改评分逻辑时递增，使旧缓存失效
+BACKTEST_VERSION = 4
+
+PROGRESS_CHECKPOINTS = (0.25, 0.5, 0.75)
+
+CACHE_FILE = 'backtest_cache.json'
+
+
+# ============================================================
+# 窗口与检查点
+# ============================================================
+
+def _to_et_string(ts: float) -> str:
+    et = pytz.timezone('America/New_York')
+    return datetime.fromtimestamp(ts, pytz.UTC).astimezone(et).strftime(ET_FORMAT)
+
+
+def archive_windows(timestamps: np.ndarray, lengths_days=(2, 7)) -> List[dict]:
+    """在存档覆盖范围内生成市场窗口（每天 12:00 PM ET 开始）"""
+    if timestamps.size == 0:
+        return []
+
+    et = pytz.timezone('America/New_York')
+    first = datetime.fromtimestamp(timestamps[0], pytz.UTC).astimezone(et)
+    day = first.date() + timedelta(days=1)
+    last_ts = timestamps[-1]
+
+    windows = []
+    while True:
+        start = et.localize(datetime(day.year, day.month, day.day, 12))
+        if start.timestamp() >= last_ts:
+            break
+        for length in lengths_days:
+            end = et.normalize(start + timedelta(days=length))
+            if end.timestamp() <= last_ts:
+                windows.append({
+                    'start_et': start.strftime(ET_FORMAT),
+                    'end_et': end.strftime(ET_FORMAT),
+                    'source': f'archive_{length}d',
+                })
+        day += timedelta(days=1)
+    return windows
+
+
+def tracking_windows(path: str) -> List[dict]:
+    """读取已结束的 tracking 窗口及其逐小时累计曲线"""
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        trackings = json.load(f)
+
+    windows = []
+    for item in trackings:
+        data = item.get('data', item)
+        stats = data.get('stats') or {}
+        if not stats.get('isComplete'):
+            continue
+        start = datetime.fromisoformat(data['startDate'].replace('Z', '+00:00'))
+        end = datetime.fromisoformat(data['endDate'].replace('Z', '+00:00')).replace(second=0, microsecond=0)
+        windows.append({
+            'start_et': _to_et_string(start.timestamp()),
+            'end_et': _to_et_string(end.timestamp()),
+            'source': 'tracking',
+            'curve': [point['cumulative'] for point in stats.get('daily', [])],
+            'final': stats.get('total'),
+        })
+    return windows
+
+
+def checkpoint_hours(total_hours: float, hourly: bool) -> List[float]:
+    """检查点（已过小时数）"""
+    if hourly:
+        return [float(h) for h in range(1, int(np.ceil(total_hours)))]
+    return [total_hours * p for p in PROGRESS_CHECKPOINTS]
+
+
+# ============================================================
+# 单窗口回测（在工作进程中运行）
+# ============================================================
+
+_WORKER = {}
+
+
+def _init_worker(config: dict, timestamps: np.ndarray):
+    _WORKER['config'] = config
+    _WORKER['timestamps'] = timestamps
+    _WORKER['profiles'] = {}
+    _WORKER['dispersion'] = {}
+    _WORKER['analogs'] = {}
+    _WORKER['sleep'] = {}
+
+
+def _profile_before(start_ts: float, half_life_days: float) -> HourOfWeekProfile:
+    """窗口开始前的画像（同一进程内按 (开始时间, 半衰期) 复用）"""
+    key = (start_ts, half_life_days)
+    profile = _WORKER['profiles'].get(key)
+    if profile is None:
+        profile = HourOfWeekProfile.from_timestamps(
+            _WORKER['timestamps'], until=start_ts, half_life_days=half_life_days
+        )
+        _WORKER['profiles'][key] = profile
+    return profile
+
+
+def _dispersion_before(start_ts: float) -> DispersionTable:
+    """窗口开始前数据拟合的离散参数表（同一进程内复用）"""
+    table = _WORKER['dispersion'].get(start_ts)
+    if table is None:
+        timestamps = _WORKER['timestamps']
+        table = DispersionTable.from_timestamps(timestamps[timestamps < start_ts])
+        _WORKER['dispersion'][start_ts] = table
+    return table
+
+
+def _sleep_before(start_ts: float, min_gap_hours: float, history_days: int) -> InactiveBlockModel:
+    """窗口开始前的每日沉寂时段汇总（同一进程内复用）"""
+    key = (start_ts, min_gap_hours, history_days)
+    model = _WORKER['sleep'].get(key)
+    if model is None:
+        timestamps = _WORKER['timestamps']
+        model = InactiveBlockModel.from_timestamps(
+            timestamps[timestamps < start_ts], min_gap_hours=min_gap_hours, history_days=history_days
+        )
+        _WORKER['sleep'][key] = model
+    return model
+
+
+def _analogs_before(start_ts: float, hours: int) -> AnalogLibrary:
+    """窗口开始前已结束的历史窗口组成的轨迹库（同一进程内复用）"""
+    key = (start_ts, hours)
+    library = _WORKER['analogs'].get(key)
+    if library is None:
+        timestamps = _WORKER['timestamps']
+        library = AnalogLibrary.from_timestamps(timestamps[timestamps < start_ts], hours)
+        _WORKER['analogs'][key] = library
+    return library
+
+
+def _count_between(timestamps: np.ndarray, start_ts: float, end_ts: float) -> int:
+    return int(np.searchsorted(timestamps, end_ts) - np.searchsorted(timestamps, start_ts))
+
+
+def score_prediction(buckets: Dict[str, float], prediction: dict, final: int, ladder: BucketLadder) -> dict:
+    """对单次预测评分"""
+    probs = np.array([buckets[name] for name in ladder.names])
+    true_idx = int(ladder.index(final))
+    onehot = np.zeros_like(probs)
+    onehot[true_idx] = 1.0
+    return {
+        'log_loss': float(-np.log(max(probs[true_idx], 1e-12))),
+        'brier': float(np.sum((probs - onehot) ** 2)),
+        'covered80': bool(prediction['ci80_lower'] <= final <= prediction['ci80_upper']),
+        'covered90': bool(prediction['ci90_lower'] <= final <= prediction['ci90_upper']),
+        'true_bucket': true_idx,
+        'probs': probs.round(6).tolist(),
+    }
+
+
+def run_window(window: dict, hourly: bool = False) -> dict:
+    """回测单个窗口：在各检查点调用预测器并评分"""
+    config = dict(_WORKER['config'], window_start_et=window['start_et'], window_end_et=window['end_et'])
+    timestamps = _WORKER['timestamps']
+
+    predictor = EnhancedTweetPredictor(config)
+    parsed = predictor.parse_time_window()
+    start_ts, end_ts, total_hours = parsed['start_ts'], parsed['end_ts'], parsed['total_hours']
+
+    # 只使用窗口开始前的数据构建先验，避免未来信息泄漏
+    predictor.hour_profile = _profile_before(start_ts, config['profile_half_life_days'])
+    if config['fit_dispersion']:
+        predictor.dispersion_table = _dispersion_before(start_ts)
+    if config['sleep_adjust']:
+        predictor.sleep_model = _sleep_before(start_ts, config['sleep_min_gap_hours'], config['sleep_history_days'])
+    if config['model_type'] == 'hawkes':
+        predictor.hawkes_model = HawkesModel.fit(timestamps[timestamps < start_ts])
+    if config['model_type'] == 'analog':
+        predictor.analog_library = _analogs_before(start_ts, int(round(total_hours)))
+
+    curve = window.get('curve')
+    if curve:
+        final = int(window['final'])
+    else:
+        final = _count_between(timestamps, start_ts, end_ts)
+
+    ladder = predictor.bucket_ladder()
+    checkpoints = []
+    for elapsed in checkpoint_hours(total_hours, hourly):
+        if curve:
+            current = int(curve[min(int(elapsed), len(curve)) - 1])
+        else:
+            current = _count_between(timestamps, start_ts, start_ts + elapsed * 3600)
+
+        prediction = predictor.predict(current, elapsed, total_hours - elapsed)
+        buckets, _ = predictor.map_to_buckets(prediction)
+        score = score_prediction(buckets, prediction, final, ladder)
+        score.update({
+            'elapsed_hours': elapsed,
+            'progress': elapsed / total_hours,
+            'current_count': current,
+            'abs_error_conservative': abs(prediction['predicted_conservative'] - final),
+            'abs_error_weekend': abs(prediction['predicted_weekend'] - final),
+        })
+        checkpoints.append(score)
+
+    return {
+        'start_et': window['start_et'],
+        'end_et': window['end_et'],
+        'source': window['source'],
+        'final': final,
+        'buckets': ladder.names,
+        'checkpoints': checkpoints,
+    }
+
+
+# ============================================================
+# 回测调度与缓存
+# ============================================================
+
+def model_version(config: dict) -> str:
+    """影响预测结果的配置项哈希（含区间阶梯文件内容与按天数的默认阶梯）"""
+    ladder_path = os.path.join(config['data_dir'], config['ladder_file'])
+    ladders = None
+    if os.path.exists(ladder_path):
+        with open(ladder_path, 'rb') as f:
+            ladders = hashlib.sha1(f.read()).hexdigest()[:12]
+    length_ladders = {days: ladder.to_list() for days, ladder in LENGTH_LADDERS.items()}
+    return config_fingerprint(config, backtest_version=BACKTEST_VERSION, ladders=ladders,
+                              length_ladders=length_ladders)
+
+
+def _cache_key(version: str, window: dict, hourly: bool) -> str:
+    return f"{version}|{window['start_et']}|{window['end_et']}|{'hourly' if hourly else 'progress'}"
+
+
+def _load_cache(path: str) -> dict:
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+
+def run_backtest(config: dict, windows: Optional[List[dict]] = None, hourly: bool = False,
+                 workers: Optional[int] = None, use_cache: bool = True) -> List[dict]:
+    """并行回测所有窗口，返回每个窗口的检查点评分"""
+    if config['model_type'] == 'ensemble':
+        raise ValueError("集成模型由各模型的回测结果评估，请运行: python ensemble.py fit")
+    config = dict(config, verbose=False, log_to_file=False, persist_posterior=False)
+    timestamps = load_post_timestamps(os.path.join(config['data_dir'], config['archive_file']))
+
+    if windows is None:
+        windows = archive_windows(timestamps) + tracking_windows(
+            os.path.join(config['data_dir'], 'tracking_periods.json')
+        )
+
+    cache_path = os.path.join(config['data_dir'], CACHE_FILE)
+    cache = _load_cache(cache_path) if use_cache else {}
+    version = model_version(config)
+
+    results = {}
+    pending = []
+    for window in windows:
+        key = _cache_key(version, window, hourly)
+        if key in cache:
+            results[key] = cache[key]
+        else:
+            pending.append((key, window))
+
+    if pending:
+        workers = workers or os.cpu_count() or 1
+        if workers > 1 and len(pending) > 1:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(config, timestamps)) as pool:
+                computed = pool.map(run_window, [w for _, w in pending], [hourly] * len(pending),
+                                    chunksize=max(1, len(pending) // (workers * 4)))
+                computed = list(computed)
+        else:
+            _init_worker(config, timestamps)
+            computed = [run_window(w, hourly) for _, w in pending]
+
+        for (key, _), result in zip(pending, computed):
+            results[key] = result
+            cache[key] = result
+
+        if use_cache:
+            with open(cache_path, 'w', encoding='utf-8') as f:
+                json.dump(cache, f)
+
+    return [results[_cache_key(version, w, hourly)] for w in windows]
+
+
+def summarize(results: List[dict]) -> dict:
+    """汇总评分：总体指标与各区间可靠性"""
+    checkpoints = [cp for r in results for cp in r['checkpoints']]
+    if not checkpoints:
+        return {'n_checkpoints': 0}
+
+    # 各窗口的阶梯可能不同：按阶梯分组向量化计算，再按区间名称合并
+    groups = {}
+    for r in results:
+        groups.setdefault(tuple(r['buckets']), []).extend(r['checkpoints'])
+    totals = {}
+    for names, group in groups.items():
+        probs = np.array([cp['probs'] for cp in group])
+        hits = np.zeros_like(probs)
+        hits[np.arange(len(group)), [cp['true_bucket'] for cp in group]] = 1.0
+        sums = np.stack([probs.sum(0), hits.sum(0), ((probs - hits) ** 2).sum(0)], axis=1)
+        for name, row in zip(names, sums):
+            entry = totals.setdefault(name, [np.zeros(3), 0])
+            entry[0] += row
+            entry[1] += len(group)
+
+    per_bucket = {
+        name: {
+            'mean_prob': float(sums[0] / n),
+            'hit_rate': float(sums[1] / n),
+            'brier': float(sums[2] / n),
+        }
+        for name, (sums, n) in totals.items()
+    }
+
+    return {
+        'n_windows': len(results),
+        'n_checkpoints': len(checkpoints),
+        'log_loss': float(np.mean([cp['log_loss'] for cp in checkpoints])),
+        'brier': float(np.mean([cp['brier'] for cp in checkpoints])),
+        'coverage80': float(np.mean([cp['covered80'] for cp in checkpoints])),
+        'coverage90': float(np.mean([cp['covered90'] for cp in checkpoints])),
+        'mae_conservative': float(np.mean([cp['abs_error_conservative'] for cp in checkpoints])),
+        'mae_weekend': float(np.mean([cp['abs_error_weekend'] for cp in checkpoints])),
+        'per_bucket': per_bucket,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='EnhancedTweetPredictor 历史回测')
+    parser.add_argument('--hourly', action='store_true', help='每小时一个检查点（默认 25/50/75%%）')
+    parser.add_argument('--workers', type=int, default=None, help='进程数（默认 CPU 核数）')
+    parser.add_argument('--model', default=None, help='覆盖 model_type')
+    parser.add_argument('--no-cache', action='store_true', help='忽略缓存重新计算')
+    args = parser.parse_args()
+
+    config = load_tuned_config(CONFIG)
+    if args.model:
+        config['model_type'] = args.model
+
+    print("=" * 70)
+    print(f"  🔁 历史回测 (模型: {config['model_type']}, 版本: {model_version(config)})")
+    print("=" * 70)
+
+    start = time.perf_counter()
+    results = run_backtest(config, hourly=args.hourly, workers=args.workers, use_cache=not args.no_cache)
+    summary = summarize(results)
+    elapsed = time.perf_counter() - start
+
+    if not summary['n_checkpoints']:
+        print("❌ 没有可回测的窗口")
+        return
+
+    print(f"\n  窗口数: {summary['n_windows']}  检查点: {summary['n_checkpoints']}  耗时: {elapsed:.1f} 秒")
+    print(f"\n  对数损失: {summary['log_loss']:.3f}")
+    print(f"  Brier:    {summary['brier']:.3f}")
+    print(f"  80% 区间覆盖率: {summary['coverage80'] * 100:.1f}%")
+    print(f"  90% 区间覆盖率: {summary['coverage90'] * 100:.1f}%")
+    print(f"  保守预测 MAE: {summary['mae_conservative']:.1f}  时段调整 MAE: {summary['mae_weekend']:.1f}")
+
+    print(f"\n  {'区间':>10s}  {'平均预测':>8s}  {'实际命中':>8s}")
+    for name, stats in summary['per_bucket'].items():
+        print(f"  {name:>10s}  {stats['mean_prob'] * 100:7.1f}%  {stats['hit_rate'] * 100:7.1f}%")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
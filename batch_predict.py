@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+批量预测 - 多个市场/检查点一次向量化计算区间概率
+================================================
+输入 N 组 (当前推文数, 已过小时, 剩余小时, 区间下界)，输出 N×K 概率矩阵。
+不构造 scipy 冻结分布，CDF 直接由正则化不完全函数逐元素计算：
+    Poisson(μ):     P(X <= k) = Q(k+1, μ)          (gammaincc)
+    NegBin(n, p):   P(X <= k) = I_p(n, k+1)         (betainc)
+
+区间下界长度不同的市场补齐为 +inf，补齐列的概率为 0。
+"""
+
+from typing import Optional, Sequence
+
+import numpy as np
+
+# 有闭式预测分布的模型（monte_carlo 含逐小时强度乘子，没有闭式解）
+BATCH_MODELS = ('gamma_poisson', 'poisson', 'neg_binom')
+
+
+def pad_ladders(ladders: Sequence[Sequence[float]], n_rows: int) -> np.ndarray:
+    """区间下界列表补齐为 N×K 矩阵（缺位为 +inf）；只给一组时广播到所有行"""
+    if len(ladders) and np.ndim(ladders[0]) == 0:
+        ladders = [ladders]
+    width = max(len(ladder) for ladder in ladders)
+    edges = np.full((len(ladders), width), np.inf)
+    for i, ladder in enumerate(ladders):
+        edges[i, :len(ladder)] = ladder
+    if len(ladders) == 1:
+        return np.broadcast_to(edges, (n_rows, width))
+    if len(ladders) != n_rows:
+        raise ValueError(f"区间组数 {len(ladders)} 与预测数 {n_rows} 不一致")
+    return edges
+
+
+def _future_cdf(k: np.ndarray, model: str, params: tuple) -> np.ndarray:
+    """未来推文数 X 的 P(X <= k)，k 可为负数或 +inf"""
+    from scipy.special import betainc, gammaincc
+
+    finite = np.isfinite(k)
+    safe_k = np.where(finite, np.maximum(k, 0), 0)
+    if model == 'poisson':
+        (mu,) = params
+        cdf = gammaincc(safe_k + 1, mu)
+    else:
+        n, p = params
+        cdf = betainc(n, safe_k + 1, p)
+    return np.where(~finite, 1.0, np.where(k < 0, 0.0, cdf))
+
+
+def bucket_probabilities(current_counts: np.ndarray, edges: np.ndarray, model: str, params: tuple) -> np.ndarray:
+    """最终总数落在各区间的概率，返回 N×K 矩阵
+
+    params 为逐行分布参数（形状 (N,) 的数组）：poisson 为 (μ,)，其余为负二项 (n, p)。
+    """
+    counts = np.asarray(current_counts, dtype=np.float64)[:, None]
+    params = tuple(np.asarray(v, dtype=np.float64)[:, None] for v in params)
+    # P(总数 < 下界) = P(X <= 下界 - 当前数 - 1)
+    below = _future_cdf(np.floor(edges) - counts - 1, model, params)
+    probs = np.clip(np.diff(np.concatenate([below, np.ones((len(below), 1))], axis=1), axis=1), 0.0, 1.0)
+    # 与 BucketLadder.probabilities 相同：截断浮点误差后按行归一化
+    total = probs.sum(axis=1, keepdims=True)
+    return np.divide(probs, total, out=probs, where=total > 0)
+
+
+def predictive_params(model: str, lambda_future: np.ndarray, nb_alpha,
+                      shape: Optional[np.ndarray] = None) -> tuple:
+    """逐行预测分布参数与 (均值, 方差)
+
+    nb_alpha 为过程离散（标量或逐行数组）；gamma_poisson 另需后验 shape，
+    其 lambda_future 为后验均值 × 剩余相对暴露。
+    """
+    if model == 'poisson':
+        return (lambda_future,), lambda_future, lambda_future
+    if model not in ('gamma_poisson', 'neg_binom'):
+        raise ValueError(f"模型 {model} 没有闭式预测分布，不支持批量预测")
+
+    alpha = np.broadcast_to(np.asarray(nb_alpha, dtype=np.float64), lambda_future.shape)
+    if model == 'gamma_poisson':
+        # 后验速率不确定性与过程离散合并（见 rate_posterior）
+        alpha = (1 + 1 / shape) * (1 + alpha) - 1
+    return (1 / alpha, 1 / (1 + alpha * lambda_future)), lambda_future, lambda_future + alpha * lambda_future ** 2
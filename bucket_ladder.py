@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+市场区间阶梯 - 以下界数组表示任意市场的区间
+================================================
+区间阶梯由升序下界数组 edges 表示，第 i 个区间为 [edges[i], edges[i+1])，
+最后一个区间无上界。edges[0] 为 0 时第一个区间显示为 '<edges[1]'。
+
+所有计算都基于下界数组一次完成：
+  - 最终总数所在区间：searchsorted
+  - 区间概率：未来推文数 CDF 在各下界处取值后做差分
+
+各市场登记的阶梯保存在 data/bucket_ladders.json（add_polymarket_market.py 为追踪的每个市场登记）：
+    {"markets": {"2026-02-05 12:00 PM|2026-02-07 12:00 PM": [0, 40, 65, ...]}}
+先按市场窗口查找；未登记的市场按窗口天数取 LENGTH_LADDERS 中的默认阶梯
+（按天数的默认阶梯只在这里定义）。
+"""
+
+import json
+import os
+import re
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+
+class BucketLadder:
+    """一个市场的区间阶梯"""
+
+    def __init__(self, edges: Sequence[int]):
+        self.edges = np.asarray(edges, dtype=np.int64)
+        if self.edges.ndim != 1 or self.edges.size == 0 or np.any(np.diff(self.edges) <= 0):
+            raise ValueError(f"区间下界必须为严格升序的非空数组: {list(edges)}")
+        self.names = self._make_names(self.edges)
+
+    @staticmethod
+    def _make_names(edges: np.ndarray) -> List[str]:
+        names = []
+        for i, low in enumerate(edges.tolist()):
+            if i == len(edges) - 1:
+                names.append(f'{low}+')
+            elif i == 0 and low == 0:
+                names.append(f'<{edges[1]}')
+            else:
+                names.append(f'{low}-{edges[i + 1] - 1}')
+        return names
+
+    @classmethod
+    def uniform(cls, start: int, step: int, count: int) -> 'BucketLadder':
+        """等宽阶梯：start, start+step, ...，共 count 个区间"""
+        return cls(start + step * np.arange(count))
+
+    @classmethod
+    def from_names(cls, names: Sequence[str]) -> 'BucketLadder':
+        """由区间名称（'<40', '40-64', '240+'）还原阶梯"""
+        edges = []
+        for name in names:
+            if name.startswith('<'):
+                edges.append(0)
+            else:
+                edges.append(int(re.match(r'\d+', name).group()))
+        return cls(edges)
+
+    def __len__(self) -> int:
+        return len(self.edges)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, BucketLadder) and np.array_equal(self.edges, other.edges)
+
+    # ========================================================
+    # 向量化计算
+    # ========================================================
+
+    def index(self, totals):
+        """最终总数所在的区间下标（低于第一个下界时为 0）"""
+        idx = np.searchsorted(self.edges, totals, side='right') - 1
+        return np.maximum(idx, 0)
+
+    def probabilities(self, future_pmf: np.ndarray, current_count: int) -> np.ndarray:
+        """由未来推文数 PMF 计算各区间概率（PMF[k] 为再发 k 条的概率）
+
+        P(总数 < 下界) = P(未来推文数 <= 下界 - 当前数 - 1)，所有下界一次计算。
+        """
+        cdf = np.cumsum(future_pmf)
+        idx = self.edges - current_count - 1
+        below = np.where(idx >= 0, cdf[np.clip(idx, 0, len(cdf) - 1)], 0.0)
+        # 1 - CDF 的浮点误差可使尾部区间略小于 0，截断到 [0, 1]；
+        # 第一个区间有下界时，低于下界的概率不属于任何区间。两种情况都按比例归一化
+        probs = np.clip(np.diff(np.append(below, 1.0)), 0.0, 1.0)
+        if probs.sum() > 0:
+            probs = probs / probs.sum()
+        return probs
+
+    def tail_label(self, probs: np.ndarray, threshold: float = 0.05) -> str:
+        """概率合计低于 threshold 的两侧尾部区间（如 '<65 和 215+'，没有时为空串）"""
+        labels = []
+        low_cum = np.cumsum(probs)
+        # 最大的 k 使前 k 个区间合计 < threshold
+        k = int(np.searchsorted(low_cum, threshold, side='left'))
+        if 0 < k < len(self.edges):
+            labels.append(f'<{self.edges[k]}')
+        high_cum = np.cumsum(probs[::-1])[::-1]
+        j = int(np.searchsorted(-high_cum, -threshold, side='right'))
+        if 0 < j < len(self.edges):
+            labels.append(f'{self.edges[j]}+')
+        return ' 和 '.join(labels)
+
+    def to_list(self) -> List[int]:
+        return self.edges.tolist()
+
+
+# Polymarket 2 天市场的默认阶梯
+DEFAULT_LADDER = BucketLadder([0, 40, 65, 90, 115, 140, 165, 190, 215, 240])
+
+# 按窗口天数的默认阶梯（未登记阶梯的市场使用）
+LENGTH_LADDERS = {
+    2: DEFAULT_LADDER,
+    7: BucketLadder([0] + list(range(160, 600, 20))),
+}
+
+
+def ladder_for_length(length_days: float) -> BucketLadder:
+    """窗口天数对应的默认阶梯
+
+    没有该长度时取最接近的长度，下界按天数比例缩放并取整到 5 的倍数。
+    """
+    days = min(LENGTH_LADDERS, key=lambda d: abs(d - length_days))
+    ladder = LENGTH_LADDERS[days]
+    if abs(days - length_days) < 0.5:
+        return ladder
+    edges = np.round(ladder.edges * (length_days / days) / 5).astype(np.int64) * 5
+    return BucketLadder(np.unique(edges))
+
+
+def load_ladder(path: str, window_key: Optional[str] = None, length_days: Optional[float] = None,
+                default: BucketLadder = DEFAULT_LADDER) -> BucketLadder:
+    """按市场窗口查找登记的阶梯；未登记时给出 length_days 则按天数取默认阶梯，否则返回 default"""
+    edges = None
+    if window_key and os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            edges = json.load(f).get('markets', {}).get(window_key)
+    if edges:
+        return BucketLadder(edges)
+    return ladder_for_length(length_days) if length_days is not None else default
+
+
+def save_market_ladder(path: str, window_key: str, ladder: BucketLadder):
+    """登记一个市场窗口的阶梯（保留文件中的其他市场）"""
+    ladders = {'markets': {}}
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            ladders.update(json.load(f))
+    ladders.setdefault('markets', {})[window_key] = ladder.to_list()
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(ladders, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+预测校准跟踪 - 对 monitoring_history.json 中已结束市场的预测增量评分
+================================================
+每条历史记录保存了当时的区间概率。市场结束后由本地数据得到最终推文数：
+  - 存档 (raw_historical.json) 已覆盖到窗口结束时，直接计数
+  - 否则使用 tracking_periods.json 中已完成且窗口相同的记录
+然后对每条记录计算 Brier 分数与对数损失，并把各区间的 (预测概率, 是否命中)
+计入可靠性直方图（预测概率按 10% 分箱）。
+
+汇总按 (模型, 完成度段) 只保存累加和，保存在 data/calibration_state.json：
+  - processed：已读取的历史记录数，之后只看新增的记录
+  - pending：市场尚未结束（或尚无法确定最终数）的记录下标，每次只重试这些
+新结算的记录 O(1) 计入累加和，不需要重新评分全部历史。
+
+较早的记录没有保存窗口与模型：窗口由记录时间与已过 / 剩余小时推算（取整到小时），
+模型记为 unknown。
+
+使用方法：
+    python calibration.py            # 结算新结束的市场并显示校准报告
+    python calibration.py --reset    # 丢弃累加和，重新评分全部历史
+"""
+
+import argparse
+import json
+import os
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from bucket_ladder import BucketLadder
+from post_archive import load_post_timestamps
+from window_calendar import parse_window
+
+# 完成度分段（%）
+PROGRESS_BANDS = (0, 25, 50, 75, 100)
+
+# 可靠性直方图的预测概率分箱数
+RELIABILITY_BINS = 10
+
+STATE_FILE = 'calibration_state.json'
+
+
+def progress_band(progress_pct: float) -> str:
+    """完成度所在的分段，如 '25-50%'"""
+    i = int(np.searchsorted(PROGRESS_BANDS, progress_pct, side='right')) - 1
+    i = min(max(i, 0), len(PROGRESS_BANDS) - 2)
+    return f'{PROGRESS_BANDS[i]}-{PROGRESS_BANDS[i + 1]}%'
+
+
+def record_window(record: dict) -> Optional[tuple]:
+    """记录对应的 (窗口开始, 窗口结束) 时间戳"""
+    if record.get('window_start_et') and record.get('window_end_et'):
+        window = parse_window(record['window_start_et'], record['window_end_et'])
+        return window['start_ts'], window['end_ts']
+    # 旧记录：由本地记录时间推算，市场窗口总在整点开始与结束
+    try:
+        recorded = datetime.strptime(record['timestamp'], '%Y-%m-%d %H:%M:%S').timestamp()
+        start = recorded - record['elapsed_hours'] * 3600
+        end = recorded + record['remaining_hours'] * 3600
+    except (KeyError, TypeError, ValueError):
+        return None
+    return round(start / 3600) * 3600.0, round(end / 3600) * 3600.0
+
+
+# ============================================================
+# 最终推文数
+# ============================================================
+
+class FinalCounts:
+    """由本地存档与 tracking 记录确定已结束窗口的最终推文数"""
+
+    def __init__(self, archive_path: str, tracking_path: str):
+        self.timestamps = load_post_timestamps(archive_path)
+        self.tracking = []
+        if os.path.exists(tracking_path):
+            with open(tracking_path, 'r', encoding='utf-8') as f:
+                trackings = json.load(f)
+            for item in trackings:
+                data = item.get('data', item)
+                stats = data.get('stats') or {}
+                if not stats.get('isComplete') or stats.get('total') is None:
+                    continue
+                start = datetime.fromisoformat(data['startDate'].replace('Z', '+00:00')).timestamp()
+                end = datetime.fromisoformat(data['endDate'].replace('Z', '+00:00')).timestamp()
+                self.tracking.append((start, end, int(stats['total'])))
+
+    def final(self, start_ts: float, end_ts: float) -> Optional[int]:
+        """窗口的最终推文数，尚无法确定时返回 None"""
+        # 窗口结束之后还有推文，说明存档已完整覆盖该窗口
+        if self.timestamps.size and self.timestamps[-1] >= end_ts and self.timestamps[0] <= start_ts:
+            return int(np.searchsorted(self.timestamps, end_ts) - np.searchsorted(self.timestamps, start_ts))
+        # tracking 的结束时间可能是 xx:59:59，允许 2 分钟误差
+        for start, end, total in self.tracking:
+            if abs(start - start_ts) < 120 and abs(end - end_ts) < 120:
+                return total
+        return None
+
+
+# ============================================================
+# 增量评分
+# ============================================================
+
+class CalibrationTracker:
+    """按 (模型, 完成度段) 累加的校准指标"""
+
+    def __init__(self):
+        self.processed = 0
+        self.pending: List[int] = []
+        self.groups: Dict[str, Dict[str, dict]] = {}
+
+    @staticmethod
+    def _empty_group() -> dict:
+        return {
+            'n': 0,
+            'brier': 0.0,
+            'log_loss': 0.0,
+            # 各分箱 [区间数, 预测概率之和, 命中数]
+            'reliability': [[0, 0.0, 0] for _ in range(RELIABILITY_BINS)],
+        }
+
+    def score(self, record: dict, final: int):
+        """把一条已结算的记录计入对应分组（O(区间数)）"""
+        names = list(record['buckets'])
+        probs = np.array([record['buckets'][name] for name in names])
+        hits = np.zeros_like(probs)
+        hits[int(BucketLadder.from_names(names).index(final))] = 1.0
+
+        model = record.get('model_type', 'unknown')
+        band = progress_band(record.get('progress_pct', 0.0))
+        group = self.groups.setdefault(model, {}).setdefault(band, self._empty_group())
+        group['n'] += 1
+        group['brier'] += float(((probs - hits) ** 2).sum())
+        group['log_loss'] += float(-np.log(max(float(probs @ hits), 1e-12)))
+        bins = np.minimum((probs * RELIABILITY_BINS).astype(np.int64), RELIABILITY_BINS - 1)
+        for b, p, h in zip(bins.tolist(), probs.tolist(), hits.tolist()):
+            entry = group['reliability'][b]
+            entry[0] += 1
+            entry[1] += p
+            entry[2] += int(h)
+
+    def update(self, history: List[dict], finals: FinalCounts) -> int:
+        """结算新增记录与此前未结算的记录，返回本次新评分的记录数"""
+        if len(history) < self.processed:
+            # 历史文件被截断或替换，从头评分
+            self.__init__()
+
+        scored = 0
+        pending = []
+        for i in self.pending + list(range(self.processed, len(history))):
+            record = history[i]
+            if not record.get('buckets'):
+                continue
+            window = record_window(record)
+            if window is None:
+                continue
+            final = finals.final(*window)
+            if final is None:
+                pending.append(i)
+                continue
+            self.score(record, final)
+            scored += 1
+        self.pending = pending
+        self.processed = len(history)
+        return scored
+
+    # ========================================================
+    # 汇总
+    # ========================================================
+
+    @staticmethod
+    def summarize(groups: List[dict]) -> dict:
+        """合并若干分组的累加和，给出平均指标与可靠性表"""
+        n = sum(g['n'] for g in groups)
+        reliability = np.zeros((RELIABILITY_BINS, 3))
+        for g in groups:
+            reliability += np.array(g['reliability'], dtype=np.float64)
+        return {
+            'n': n,
+            'brier': sum(g['brier'] for g in groups) / n if n else None,
+            'log_loss': sum(g['log_loss'] for g in groups) / n if n else None,
+            'reliability': [
+                {
+                    'bin': f'{b * 100 // RELIABILITY_BINS}-{(b + 1) * 100 // RELIABILITY_BINS}%',
+                    'n': int(count),
+                    'mean_prob': prob_sum / count,
+                    'hit_rate': hit_sum / count,
+                }
+                for b, (count, prob_sum, hit_sum) in enumerate(reliability.tolist()) if count
+            ],
+        }
+
+    def report(self) -> Dict[str, dict]:
+        """{模型: {'all': 汇总, 完成度段: 汇总}}"""
+        report = {}
+        for model, bands in self.groups.items():
+            report[model] = {'all': self.summarize(list(bands.values()))}
+            for band in sorted(bands, key=lambda b: int(b.split('-')[0])):
+                report[model][band] = self.summarize([bands[band]])
+        return report
+
+    # ========================================================
+    # 持久化
+    # ========================================================
+
+    def to_dict(self) -> dict:
+        return {'processed': self.processed, 'pending': self.pending, 'groups': self.groups}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'CalibrationTracker':
+        tracker = cls()
+        tracker.processed = data['processed']
+        tracker.pending = data['pending']
+        tracker.groups = data['groups']
+        return tracker
+
+
+def update_calibration(data_dir: str = 'data', history_file: str = 'monitoring_history.json',
+                       archive_file: str = 'raw_historical.json', reset: bool = False) -> tuple:
+    """读取保存的累加和，结算新结束的市场后保存，返回 (tracker, 本次新评分数)"""
+    state_path = os.path.join(data_dir, STATE_FILE)
+    tracker = CalibrationTracker()
+    if os.path.exists(state_path) and not reset:
+        with open(state_path, 'r', encoding='utf-8') as f:
+            tracker = CalibrationTracker.from_dict(json.load(f))
+
+    history_path = os.path.join(data_dir, history_file)
+    history = []
+    if os.path.exists(history_path):
+        with open(history_path, 'r', encoding='utf-8') as f:
+            history = json.load(f)
+
+    finals = FinalCounts(os.path.join(data_dir, archive_file), os.path.join(data_dir, 'tracking_periods.json'))
+    scored = tracker.update(history, finals)
+    with open(state_path, 'w', encoding='utf-8') as f:
+        json.dump(tracker.to_dict(), f)
+    return tracker, scored
+
+
+def main():
+    parser = argparse.ArgumentParser(description='预测校准跟踪')
+    parser.add_argument('--reset', action='store_true', help='丢弃累加和，重新评分全部历史')
+    args = parser.parse_args()
+
+    tracker, scored = update_calibration(reset=args.reset)
+
+    print("=" * 70)
+    print(f"  🎯 预测校准 (已读取 {tracker.processed} 条记录, 本次结算 {scored} 条, 待结算 {len(tracker.pending)} 条)")
+    print("=" * 70)
+    report = tracker.report()
+    if not report:
+        print("  还没有已结束市场的预测记录")
+        print("=" * 70)
+        return
+
+    for model, bands in report.items():
+        print(f"\n  模型: {model}")
+        print(f"    {'完成度':>8s}  {'记录数':>6s}  {'Brier':>7s}  {'对数损失':>8s}")
+        for band, summary in bands.items():
+            label = '全部' if band == 'all' else band
+            print(f"    {label:>8s}  {summary['n']:6d}  {summary['brier']:7.3f}  {summary['log_loss']:8.3f}")
+
+        print(f"\n    {'预测概率':>8s}  {'区间数':>6s}  {'平均预测':>8s}  {'实际命中':>8s}")
+        for row in bands['all']['reliability']:
+            print(f"    {row['bin']:>8s}  {row['n']:6d}  {row['mean_prob'] * 100:7.1f}%  {row['hit_rate'] * 100:7.1f}%")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
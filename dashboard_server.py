@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+看板服务 - 静态文件 + 服务器推送 (SSE)，数据发布后只推送变化的字段
+================================================
+替代 python3 -m http.server + 页面每分钟轮询看板数据：
+  - /events：SSE 连接。连接时推送一次看板索引 (data/dashboard/index.json) 的完整快照，
+    之后 update_dashboard*.py 发布新索引时只推送变化的顶层字段；两次更新之间每 KEEPALIVE_SECONDS
+    发送一行注释保持连接，几十个打开的看板在更新之间几乎不占带宽
+  - 断线重连时浏览器带上 Last-Event-ID，版本未变则不重发快照
+  - 静态文件（dashboard.html、data/*.json 等）按修改时间缓存 gzip 压缩结果，
+    每个版本只压缩一次；带 ETag，未变化时返回 304。文件名带内容哈希的市场分片
+    （见 dashboard_shards.py）内容不会变化，允许浏览器长期缓存
+  - /status：当前连接的看板数、数据版本与推送统计
+
+数据文件由一个后台线程每 WATCH_INTERVAL 秒检查一次修改时间（与连接数无关）。
+
+使用方法：
+    python dashboard_server.py                # http://localhost:8888
+    python dashboard_server.py --port 9000
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import unquote, urlparse
+
+DEFAULT_PORT = 8888
+
+DATA_FILE = 'data/dashboard/index.json'
+
+# 数据文件修改时间的检查间隔（秒）
+WATCH_INTERVAL = 1.0
+
+# 两次更新之间的保活注释间隔（秒）
+KEEPALIVE_SECONDS = 15
+
+# 浏览器断线后的重连等待（毫秒）
+RETRY_MS = 3000
+
+# 小于该大小的文件不压缩（字节）
+MIN_GZIP_BYTES = 512
+
+ROOT = os.path.dirname(os.path.realpath(__file__))
+
+
+def diff_fields(old: dict, new: dict) -> dict:
+    """顶层字段的变化 {'changed': {字段: 新值}, 'removed': [字段]}"""
+    return {
+        'changed': {key: value for key, value in new.items() if old.get(key) != value},
+        'removed': [key for key in old if key not in new],
+    }
+
+
+# ============================================================
+# 数据发布与推送
+# ============================================================
+
+class DashboardFeed:
+    """监视看板数据文件，向所有 SSE 连接广播变化的字段"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.clients: Dict[int, queue.Queue] = {}
+        self.next_client = 0
+        self.mtime = None
+        self.data: dict = {}
+        self.version = 0
+        self.n_updates = 0
+        self.bytes_pushed = 0
+        self.poll()
+
+    def poll(self) -> bool:
+        """数据文件有变化时读取并广播，返回是否发布了新版本"""
+        mtime = os.path.getmtime(self.path) if os.path.exists(self.path) else None
+        if mtime is None or mtime == self.mtime:
+            return False
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            # 文件正在写入，下次检查时再读
+            return False
+
+        with self.lock:
+            self.mtime = mtime
+            patch = diff_fields(self.data, data)
+            if not patch['changed'] and not patch['removed']:
+                return False
+            self.data = data
+            self.version += 1
+            self.n_updates += 1
+            message = self.event('patch', patch)
+            for q in self.clients.values():
+                q.put(message)
+        return True
+
+    def event(self, name: str, payload: dict) -> bytes:
+        body = json.dumps(payload, ensure_ascii=False, separators=(',', ':'))
+        return f"id: {self.version}\nevent: {name}\ndata: {body}\n\n".encode()
+
+    def subscribe(self, last_event_id: Optional[str]) -> tuple:
+        """登记一个连接，返回 (连接 id, 消息队列)；版本未变的重连不重发快照"""
+        q = queue.Queue()
+        with self.lock:
+            client_id = self.next_client
+            self.next_client += 1
+            self.clients[client_id] = q
+            q.put(f"retry: {RETRY_MS}\n\n".encode())
+            if last_event_id != str(self.version):
+                q.put(self.event('snapshot', self.data))
+        return client_id, q
+
+    def unsubscribe(self, client_id: int):
+        with self.lock:
+            self.clients.pop(client_id, None)
+
+    def watch(self):
+        while True:
+            time.sleep(WATCH_INTERVAL)
+            if self.poll():
+                print(f"📤 {time.strftime('%H:%M:%S')} 数据版本 {self.version}，推送给 {len(self.clients)} 个看板")
+
+    def status(self) -> dict:
+        return {
+            'clients': len(self.clients),
+            'version': self.version,
+            'updates': self.n_updates,
+            'bytes_pushed': self.bytes_pushed,
+            'last_update': self.data.get('last_update'),
+        }
+
+
+# ============================================================
+# 静态文件
+# ============================================================
+
+class StaticFiles:
+    """按修改时间缓存文件内容、gzip 压缩结果与 ETag"""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.shard_dir = os.path.join(root, os.path.dirname(DATA_FILE))
+        self.lock = threading.Lock()
+        self.cache: Dict[str, dict] = {}
+
+    def resolve(self, url_path: str) -> Optional[str]:
+        relative = unquote(url_path).lstrip('/') or 'dashboard.html'
+        path = os.path.realpath(os.path.join(self.root, relative))
+        if not path.startswith(self.root + os.sep) or not os.path.isfile(path):
+            return None
+        return path
+
+    def get(self, path: str) -> dict:
+        mtime = os.path.getmtime(path)
+        entry = self.cache.get(path)
+        if entry is not None and entry['mtime'] == mtime:
+            return entry
+
+        with open(path, 'rb') as f:
+            body = f.read()
+        content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        if content_type.startswith('text/') or content_type == 'application/json':
+            content_type += '; charset=utf-8'
+        entry = {
+            'mtime': mtime,
+            'body': body,
+            'gzip': gzip.compress(body, 9) if len(body) >= MIN_GZIP_BYTES else None,
+            'etag': '"' + hashlib.sha1(body).hexdigest()[:16] + '"',
+            'content_type': content_type,
+        }
+        with self.lock:
+            self.cache[path] = entry
+        return entry
+
+
+# ============================================================
+# HTTP 服务
+# ============================================================
+
+def make_handler(feed: DashboardFeed, files: StaticFiles):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == '/events':
+                self.stream_events()
+            elif url.path == '/status':
+                body = json.dumps(feed.status(), ensure_ascii=False).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            else:
+                self.send_static(url.path)
+
+        def send_static(self, url_path: str):
+            path = files.resolve(url_path)
+            if path is None:
+                self.send_error(404)
+                return
+            entry = files.get(path)
+            if self.headers.get('If-None-Match') == entry['etag']:
+                self.send_response(304)
+                self.send_header('ETag', entry['etag'])
+                self.end_headers()
+                return
+
+            body = entry['body']
+            use_gzip = entry['gzip'] is not None and 'gzip' in self.headers.get('Accept-Encoding', '')
+            self.send_response(200)
+            self.send_header('Content-Type', entry['content_type'])
+            self.send_header('ETag', entry['etag'])
+            if os.path.dirname(path) == files.shard_dir and os.path.basename(path).startswith('market-'):
+                self.send_header('Cache-Control', 'public, max-age=31536000, immutable')
+            else:
+                self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Vary', 'Accept-Encoding')
+            if use_gzip:
+                body = entry['gzip']
+                self.send_header('Content-Encoding', 'gzip')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def stream_events(self):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream; charset=utf-8')
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('X-Accel-Buffering', 'no')
+            self.end_headers()
+
+            client_id, q = feed.subscribe(self.headers.get('Last-Event-ID'))
+            try:
+                while True:
+                    try:
+                        message = q.get(timeout=KEEPALIVE_SECONDS)
+                    except queue.Empty:
+                        message = b': keepalive\n\n'
+                    self.wfile.write(message)
+                    self.wfile.flush()
+                    feed.bytes_pushed += len(message)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            finally:
+                feed.unsubscribe(client_id)
+
+        def log_message(self, format, *args):
+            # 只打印错误请求
+            if len(args) >= 2 and str(args[1]).startswith(('4', '5')):
+                super().log_message(format, *args)
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='看板服务（SSE 推送）')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'端口（默认 {DEFAULT_PORT}）')
+    parser.add_argument('--host', default='', help='监听地址（默认所有地址）')
+    args = parser.parse_args()
+
+    feed = DashboardFeed(os.path.join(ROOT, DATA_FILE))
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(feed, StaticFiles(ROOT)))
+    server.daemon_threads = True
+    threading.Thread(target=feed.watch, daemon=True).start()
+
+    print("=" * 70)
+    print(f"  🌐 看板服务: http://localhost:{args.port}")
+    print("=" * 70)
+    print(f"  数据文件: {DATA_FILE}（每 {WATCH_INTERVAL:g} 秒检查，变化时推送）")
+    print(f"  连接状态: http://localhost:{args.port}/status")
+    print("  按 Ctrl+C 停止")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n⏹ 服务已停止")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+看板数据发布 - 小索引文件 + 每个市场一个按内容哈希命名的分片
+================================================
+dashboard_data.json 包含所有市场完整的每日计数，看板每次都要下载全部。发布时另外生成：
+    data/dashboard/index.json                    汇总统计、最近几天与市场列表（不含每日计数）
+    data/dashboard/market-<市场 id>-<哈希>.json   单个市场的完整数据
+
+索引中每个市场记录分片文件名与内容哈希；看板只下载正在显示的市场分片，
+且只在哈希变化时重新下载。分片内容不变则文件名不变，可以长期缓存。
+索引按市场结束时间从新到旧排列。
+
+所有文件先写临时文件再替换，看板服务与浏览器不会读到写了一半的文件。
+旧分片保留一个发布周期（上一版索引仍引用的分片），之后删除。
+
+dashboard_data.json 仍完整写入，供 add_polymarket_market.py 等读取。
+索引与分片是生成文件，不提交到 main；auto_scheduler.py 部署 gh-pages 时重新生成并同步整个目录。
+
+使用方法：
+    python dashboard_shards.py      # 由现有的 dashboard_data.json 重新生成索引与分片
+"""
+
+import hashlib
+import json
+import os
+from typing import Optional
+
+SHARD_DIR = 'dashboard'
+INDEX_FILE = 'index.json'
+
+# 市场列表中保留在索引里的字段（每日计数只在分片中）
+MARKET_SUMMARY_KEYS = ('name', 'title', 'total', 'avg', 'start_et', 'end_et')
+
+
+def market_id(market: dict) -> str:
+    """市场 id，如 2026-02-03_2026-02-10"""
+    return f"{market['start_et'][:10]}_{market['end_et'][:10]}"
+
+
+def write_json_atomic(path: str, data, **kwargs):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, **kwargs)
+    os.replace(tmp_path, path)
+
+
+def _load_index(path: str) -> Optional[dict]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def publish_dashboard(dashboard_data: dict, data_dir: str = 'data') -> dict:
+    """写入 dashboard_data.json、市场分片与索引，返回索引"""
+    write_json_atomic(os.path.join(data_dir, 'dashboard_data.json'), dashboard_data, indent=2)
+
+    shard_dir = os.path.join(data_dir, SHARD_DIR)
+    os.makedirs(shard_dir, exist_ok=True)
+    index_path = os.path.join(shard_dir, INDEX_FILE)
+    previous = _load_index(index_path) or {}
+
+    markets = []
+    for market in dashboard_data.get('polymarket_markets') or []:
+        body = json.dumps(market, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+        digest = hashlib.sha1(body.encode()).hexdigest()[:12]
+        mid = market_id(market)
+        filename = f"market-{mid}-{digest}.json"
+        shard_path = os.path.join(shard_dir, filename)
+        if not os.path.exists(shard_path):
+            tmp_path = f"{shard_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(body)
+            os.replace(tmp_path, shard_path)
+        summary = {key: market[key] for key in MARKET_SUMMARY_KEYS if key in market}
+        markets.append(dict(summary, id=mid, hash=digest, file=f"{SHARD_DIR}/{filename}"))
+    markets.sort(key=lambda m: m['end_et'], reverse=True)
+
+    index = {key: value for key, value in dashboard_data.items() if key != 'polymarket_markets'}
+    index['markets'] = markets
+    write_json_atomic(index_path, index, separators=(',', ':'))
+
+    # 删除当前与上一版索引都不再引用的分片
+    keep = {os.path.basename(m['file']) for m in markets + previous.get('markets', [])}
+    for name in os.listdir(shard_dir):
+        if name.startswith('market-') and name.endswith('.json') and name not in keep:
+            os.remove(os.path.join(shard_dir, name))
+    return index
+
+
+def main():
+    with open('data/dashboard_data.json', 'r', encoding='utf-8') as f:
+        dashboard_data = json.load(f)
+    index = publish_dashboard(dashboard_data)
+    index_size = os.path.getsize(os.path.join('data', SHARD_DIR, INDEX_FILE))
+    print(f"✅ 看板索引已生成: {len(index['markets'])} 个市场分片，索引 {index_size} 字节")
+    for market in index['markets']:
+        print(f"   {market['id']}: {market['file']}")
+
+
+if __name__ == "__main__":
+    main()
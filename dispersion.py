@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+负二项离散参数估计 - 按预测时长从存档拟合 alpha
+================================================
+NB2 参数化：方差 = μ + alpha·μ²。对每个时长 H（小时），取存档中所有
+长度为 H、起点按整点滑动的窗口计数，在均值固定为样本均值时对 alpha 做最大似然。
+
+窗口计数以直方图（计数 -> 出现次数）保存，似然只在不同取值上计算；
+新的完整日到来时只追加新窗口，不重算历史窗口。结果按时长缓存到
+data/dispersion_cache.json。
+
+使用方法：
+    python dispersion.py          # 显示各时长的拟合结果
+"""
+
+import json
+import math
+import os
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+from post_archive import load_post_timestamps
+
+ALPHA_BOUNDS = (1e-4, 10.0)
+
+# 少于该窗口数时不拟合，由调用方使用默认 alpha
+MIN_WINDOWS = 24
+
+
+def fit_nb_alpha(values: np.ndarray, weights: np.ndarray) -> Optional[float]:
+    """加权计数样本的 NB2 alpha 最大似然估计（均值取样本均值）"""
+    total = weights.sum()
+    if total < MIN_WINDOWS:
+        return None
+    mean = float(values @ weights / total)
+    variance = float(((values - mean) ** 2) @ weights / total)
+    if mean <= 0:
+        return None
+    if variance <= mean:
+        # 没有过度离散，取下界
+        return ALPHA_BOUNDS[0]
+
+    # 只在有新的完整日需要拟合时导入
+    from scipy.optimize import minimize_scalar
+    from scipy.special import gammaln
+
+    log_mean = math.log(mean)
+
+    def negative_log_likelihood(log_alpha):
+        r = math.exp(-log_alpha)
+        log_r_mu = math.log(r + mean)
+        ll = (gammaln(values + r) - values * log_r_mu) @ weights
+        ll += total * (r * (math.log(r) - log_r_mu) - gammaln(r)) + mean * total * log_mean
+        return -ll
+
+    result = minimize_scalar(
+        negative_log_likelihood,
+        bounds=tuple(math.log(b) for b in ALPHA_BOUNDS),
+        method='bounded',
+        options={'xatol': 1e-3},
+    )
+    return float(math.exp(result.x))
+
+
+class DispersionTable:
+    """各预测时长的 alpha，窗口计数直方图可增量扩展"""
+
+    def __init__(self, origin: float, until: float):
+        self.origin = origin    # 窗口起点网格原点（首条推文后的第一个整点）
+        self.until = until      # 窗口结束不晚于此时刻（最后一个完整 UTC 日的结束）
+        self.horizons: Dict[int, dict] = {}
+        self._timestamps: Optional[np.ndarray] = None  # 扩展新时长时需要
+        self.dirty = False  # 有未写入缓存的变化
+
+    @classmethod
+    def from_timestamps(cls, timestamps: np.ndarray) -> 'DispersionTable':
+        origin, until = cls._coverage(timestamps)
+        table = cls(origin, until)
+        table._timestamps = timestamps
+        return table
+
+    @staticmethod
+    def _coverage(timestamps: np.ndarray) -> tuple:
+        if timestamps.size == 0:
+            return 0.0, 0.0
+        origin = math.ceil(timestamps[0] / 3600) * 3600
+        until = math.floor(timestamps[-1] / 86400) * 86400
+        return float(origin), float(max(until, origin))
+
+    # ========================================================
+    # 增量更新
+    # ========================================================
+
+    def update(self, timestamps: np.ndarray) -> bool:
+        """存档有新的完整日时追加窗口并重新拟合，返回是否有变化"""
+        self._timestamps = timestamps
+        origin, until = self._coverage(timestamps)
+        if origin != self.origin:
+            # 存档起点变化（重新抓取），所有窗口重算
+            self.origin, self.until = origin, until
+            self.horizons = {}
+            self.dirty = True
+            return True
+        if until <= self.until:
+            return False
+        self.until = until
+        for hours in self.horizons:
+            self._extend(hours)
+        return True
+
+    def _extend(self, hours: int):
+        entry = self.horizons.setdefault(hours, {'n_starts': 0, 'histogram': {}, 'alpha': None})
+        n_total = int((self.until - self.origin) // 3600) - hours + 1
+        if n_total <= entry['n_starts']:
+            return
+
+        starts = self.origin + 3600.0 * np.arange(entry['n_starts'], n_total)
+        timestamps = self._timestamps
+        counts = np.searchsorted(timestamps, starts + hours * 3600) - np.searchsorted(timestamps, starts)
+
+        histogram = entry['histogram']
+        values, freqs = np.unique(counts, return_counts=True)
+        for value, freq in zip(values.tolist(), freqs.tolist()):
+            histogram[value] = histogram.get(value, 0) + freq
+        entry['n_starts'] = n_total
+
+        values = np.fromiter(histogram.keys(), dtype=np.float64, count=len(histogram))
+        weights = np.fromiter(histogram.values(), dtype=np.float64, count=len(histogram))
+        entry['alpha'] = fit_nb_alpha(values, weights)
+        self.dirty = True
+
+    # ========================================================
+    # 查询
+    # ========================================================
+
+    def alpha(self, horizon_hours: float) -> Optional[float]:
+        """时长 horizon_hours 的 alpha（按整小时向上取整；数据不足返回 None）"""
+        hours = max(1, math.ceil(horizon_hours - 1e-9))
+        if hours not in self.horizons:
+            if self._timestamps is None:
+                return None
+            self._extend(hours)
+        return self.horizons[hours]['alpha']
+
+    # ========================================================
+    # 持久化
+    # ========================================================
+
+    def to_dict(self) -> dict:
+        return {
+            'origin': self.origin,
+            'until': self.until,
+            'horizons': {
+                str(hours): {
+                    'n_starts': entry['n_starts'],
+                    'histogram': {str(k): v for k, v in entry['histogram'].items()},
+                    'alpha': entry['alpha'],
+                }
+                for hours, entry in self.horizons.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'DispersionTable':
+        table = cls(data['origin'], data['until'])
+        for hours, entry in data['horizons'].items():
+            table.horizons[int(hours)] = {
+                'n_starts': entry['n_starts'],
+                'histogram': {int(k): v for k, v in entry['histogram'].items()},
+                'alpha': entry['alpha'],
+            }
+        return table
+
+
+def load_dispersion_table(archive_path: str, cache_path: str) -> DispersionTable:
+    """读取缓存的离散参数表，按存档增量更新"""
+    timestamps = load_post_timestamps(archive_path)
+    if os.path.exists(cache_path):
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            table = DispersionTable.from_dict(json.load(f))
+        table.update(timestamps)
+    else:
+        table = DispersionTable.from_timestamps(timestamps)
+    return table
+
+
+def save_dispersion_table(cache_path: str, table: DispersionTable):
+    with open(cache_path, 'w', encoding='utf-8') as f:
+        json.dump(table.to_dict(), f)
+    table.dirty = False
+
+
+def main():
+    """显示各时长的拟合结果"""
+    timestamps = load_post_timestamps('data/raw_historical.json')
+    print("=" * 70)
+    print(f"  📐 负二项离散参数 ({len(timestamps)} 条推文)")
+    print("=" * 70)
+
+    start = time.perf_counter()
+    table = DispersionTable.from_timestamps(timestamps)
+    horizons = [1, 3, 6, 12, 24, 48, 72, 120, 168]
+    alphas = {hours: table.alpha(hours) for hours in horizons}
+    elapsed = time.perf_counter() - start
+
+    for hours, alpha in alphas.items():
+        entry = table.horizons[hours]
+        n_windows = sum(entry['histogram'].values())
+        shown = f"{alpha:.4f}" if alpha is not None else "数据不足"
+        print(f"  {hours:4d} 小时: alpha = {shown:>8s}  ({n_windows} 个窗口)")
+    print(f"\n  拟合耗时: {elapsed * 1000:.1f} ms ({len(horizons)} 个时长)")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
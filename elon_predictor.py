@@ -18,8 +18,11 @@ from datetime import datetime, timedelta
 import pytz
 import time
 import json
+import os
 from pathlib import Path
 
+from bucket_ladder import load_ladder
+
 # ============================================================
 # CONFIG 配置区域 - 请根据需要修改
 # ============================================================
@@ -44,6 +47,10 @@ CONFIG = {
     # 输出文件
     'output_file': 'predictions.json',
 
+    # 数据目录与区间阶梯文件（见 bucket_ladder.py）
+    'data_dir': 'data',
+    'ladder_file': 'bucket_ladders.json',
+
     # 是否显示详细日志
     'verbose': True,
 }
@@ -243,32 +250,20 @@ class ElonTweetPredictor:
 
     def map_to_buckets(self, expected_total: float) -> dict:
         """将预测映射到 Polymarket 区间"""
-        # 简化版：生成常见区间
-        buckets = {}
-        base = 160
-        step = 20
-
-        for i in range(22):  # 22 个区间
-            if i < 21:
-                bucket_name = f"{base + i*step}-{base + (i+1)*step - 1}"
-            else:
-                bucket_name = f"{base + i*step}+"
-
-            # 简化概率计算：使用正态分布近似
-            from scipy.stats import norm
-            if i < 21:
-                lower = base + i*step - expected_total
-                upper = base + (i+1)*step - 1 - expected_total
-                prob = norm.cdf(upper, scale=50) - norm.cdf(lower, scale=50)
-            else:
-                lower = base + i*step - expected_total
-                prob = 1 - norm.cdf(lower, scale=50)
-
-            buckets[bucket_name] = max(0, prob)
+        # 简化版：正态分布近似，一次计算所有下界；
+        # 阶梯按市场读取，未登记时按窗口天数取默认阶梯
+        from scipy.stats import norm
+        ladder = load_ladder(
+            os.path.join(self.config['data_dir'], self.config['ladder_file']),
+            f"{self.config['window_start_et']}|{self.config['window_end_et']}",
+            self.parse_time_window()['total_hours'] / 24,
+        )
+        below = norm.cdf(ladder.edges - expected_total, scale=50)
+        probs = np.diff(np.append(below, 1.0))
 
         # 归一化
-        total = sum(buckets.values())
-        buckets = {k: v/total for k, v in buckets.items()}
+        probs = probs / probs.sum()
+        buckets = {name: float(prob) for name, prob in zip(ladder.names, probs)}
 
         # 显示前 5 个最可能的区间
         sorted_buckets = sorted(buckets.items(), key=lambda x: -x[1])[:5]
@@ -9,19 +9,31 @@ Elon Musk Tweet 预测系统 - 完整增强版
 2. python elon_predictor_enhanced.py
 """
 
-import requests
-from bs4 import BeautifulSoup
 import numpy as np
-from scipy.stats import poisson, nbinom, norm
 from datetime import datetime, timedelta
 import pytz
 import time
+import hashlib
 import json
 import os
 import re
-import subprocess
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from analog_forecast import AnalogLibrary, load_analog_library, partial_curve
+from bucket_ladder import DEFAULT_LADDER, BucketLadder, load_ladder
+from batch_predict import bucket_probabilities, pad_ladders, predictive_params
+from dispersion import DispersionTable, load_dispersion_table, save_dispersion_table
+from gap_sketch import GapSketches, load_gap_sketch, save_gap_sketch
+from hour_profile import HourOfWeekProfile, load_hour_profile
+from post_archive import load_post_timestamps
+from hawkes_model import HawkesModel, load_hawkes_model
+from monte_carlo import simulate_remaining_counts, summarize_simulation
+from sleep_model import InactiveBlockModel, load_sleep_model
+from rate_posterior import GammaRatePosterior, load_posterior, nbinom_pmf, save_posterior
+from regime_detector import REGIME_LABELS, RegimeDetector, load_regime_detector, save_regime_detector
+from window_calendar import cumulative_weighted_hours, hour_of_week_overlap, parse_window
+from window_calendar import weekend_hours as calc_weekend_hours
 
 # ============================================================
 # CONFIG 配置区域
@@ -41,8 +53,45 @@ CONFIG = {
     # 抓取间隔（秒）
     'scrape_interval_seconds': 120,
 
+    # 实时模式（post_stream.py）：增量拉取推文接口，每条新推文更新预测
+    'posts_api_url': 'https://xtracker.polymarket.com/api/users/elonmusk/posts',
+    'stream_poll_seconds': 3,          # 增量拉取间隔
+    'stream_debounce_seconds': 1.0,    # 连续该秒数没有新推文时发布
+    'stream_max_delay_seconds': 5.0,   # 爆发期间最迟发布间隔
+
+    # 持续监控的结果缓存
+    'reuse_minutes': 10,          # 计数不变时，同一时间段（分钟）内直接复用上次结果
+    'history_min_change': 0.02,   # 计数与主推荐不变、区间概率变化小于该值时不写入历史
+
     # 模型类型
-    'model_type': 'poisson',  # 'poisson' 或 'neg_binom'
+    'model_type': 'gamma_poisson',  # 'gamma_poisson'、'poisson'、'neg_binom'、'monte_carlo'、'hawkes'、'analog' 或 'ensemble'
+
+    # 多模型集成（model_type='ensemble'，见 ensemble.py）
+    'ensemble_models': ['gamma_poisson', 'poisson', 'neg_binom', 'hawkes', 'analog'],
+    'ensemble_deadlines': {'default': 1.0, 'hawkes': 3.0},  # 每个模型的截止时间（秒），超时本轮丢弃
+    'ensemble_weights_file': 'ensemble_weights.json',       # ensemble.py fit 学习的权重
+
+    # Gamma-Poisson 速率后验
+    'prior_strength_hours': 24,              # 先验强度（等效观测小时数）
+    'posterior_file': 'rate_posterior.json', # 后验状态（按窗口保存）
+    'persist_posterior': True,
+
+    # 蒙特卡洛模拟（路径速率乘子用 nb_alpha，另叠加逐小时的强度乘子）
+    'mc_hour_alpha': 0.5,       # 小时级离散（小时乘子方差），0 时与 neg_binom 同分布
+    'mc_paths': 1_000_000,      # 模拟路径数
+    'mc_chunk_size': 250_000,   # 每块路径数（控制内存）
+    'mc_workers': 1,            # 进程数，>1 时使用进程池
+    'mc_seed': None,            # 随机种子（None 为随机）
+
+    # Hawkes 自激模型
+    'hawkes_file': 'hawkes_params.json',  # 拟合参数缓存
+    'hawkes_paths': 10000,                # 分支模拟路径数
+
+    # 相似窗口预测（见 analog_forecast.py）
+    'analog_dir': 'analog_library',      # 轨迹库目录（按窗口小时数分文件）
+    'analog_k': 25,                      # 最近邻数
+    'analog_half_life_hours': 12,        # 距离中各整点权重的半衰期（越近的时段权重越大）
+    'analog_min_separation_hours': 6,    # 最近邻起点的最小间隔
 
     # 输出文件
     'output_file': 'predictions.json',
@@ -51,9 +100,44 @@ CONFIG = {
     # 是否显示详细日志
     'verbose': True,
 
-    # 周末调整系数
+    # 是否写入日志文件（回测等批量计算时关闭）
+    'log_to_file': True,
+
+    # 负二项过程离散参数（方差 = μ + alpha·μ²），用于 gamma_poisson / neg_binom / monte_carlo
+    'nb_alpha': 0.1,                          # 固定值，或存档不足以拟合时的默认值
+    'fit_dispersion': True,                   # 按剩余时长从存档拟合 alpha
+    'dispersion_file': 'dispersion_cache.json',
+
+    # 保守预测系数
+    'conservative_factor': 0.9,
+
+    # 周末调整系数（无周内小时画像时使用）
     'weekend_boost': 1.1,
 
+    # 调优后的参数档案（tune_predictor.py 生成），存在时覆盖上面的默认值
+    'tuned_profile': 'predictor_profiles/latest.json',
+
+    # 周内小时强度画像
+    'archive_file': 'raw_historical.json',  # 本地推文存档
+    'profile_file': 'hour_profile.json',    # 画像缓存
+    'profile_half_life_days': 14,           # 指数遗忘半衰期（天）
+
+    # 每日沉寂时段（见 sleep_model.py）：正处于沉寂时折减剩余时段强度
+    'sleep_adjust': True,
+    'sleep_min_gap_hours': 3.0,    # 不少于该时长的最长间隔视为当天的沉寂时段
+    'sleep_history_days': 60,      # 使用最近多少天的沉寂时段
+    'sleep_file': 'sleep_summary.json',
+
+    # 发帖状态检测（爆发 / 正常 / 沉寂，见 regime_detector.py）
+    'regime_file': 'regime_state.json',
+    'regime_alerts': False,   # 实时模式下状态切换时推送 Telegram
+
+    # 推文间隔分位数草图（按一天中的小时，见 gap_sketch.py）
+    'gap_sketch_file': 'gap_sketch.json',
+
+    # 各市场的区间阶梯（找不到时使用默认阶梯）
+    'ladder_file': 'bucket_ladders.json',
+
     # 数据和日志目录
     'data_dir': 'data',
     'logs_dir': 'logs',
@@ -63,18 +147,44 @@ CONFIG = {
 # Polymarket 市场区间配置
 # ============================================================
 
-POLYMARKET_BUCKETS = [
-    '<40',
-    '40-64',
-    '65-89',
-    '90-114',
-    '115-139',
-    '140-164',
-    '165-189',
-    '190-214',
-    '215-239',
-    '240+',
-]
+# 默认区间阶梯（2 天市场）；其他市场的阶梯见 data/bucket_ladders.json
+POLYMARKET_BUCKETS = DEFAULT_LADDER.names
+
+# 每个区间的下界（最后一个区间无上界）
+POLYMARKET_BUCKET_EDGES = DEFAULT_LADDER.to_list()
+
+# ============================================================
+# 调优参数
+# ============================================================
+
+
+def load_tuned_config(config: dict) -> dict:
+    """合并 tune_predictor.py 写出的最新参数档案（不存在时原样返回）"""
+    path = os.path.join(config['data_dir'], config['tuned_profile'])
+    if not os.path.exists(path):
+        return config
+    with open(path, 'r', encoding='utf-8') as f:
+        profile = json.load(f)
+    return dict(config, **profile['params'])
+
+
+# 不影响预测结果的配置项，不参与配置指纹
+NON_MODEL_KEYS = {
+    'market_url', 'window_start_et', 'window_end_et', 'xtracker_url',
+    'scrape_interval_seconds', 'reuse_minutes', 'history_min_change', 'posts_api_url',
+    'stream_poll_seconds', 'stream_debounce_seconds', 'stream_max_delay_seconds',
+    'output_file', 'history_file', 'verbose', 'log_to_file', 'data_dir', 'logs_dir',
+    'persist_posterior', 'tuned_profile', 'ensemble_deadlines', 'regime_file', 'regime_alerts',
+    'gap_sketch_file',
+}
+
+
+def config_fingerprint(config: dict, **extra) -> str:
+    """影响预测结果的配置项哈希（extra 为额外参与哈希的版本信息）"""
+    relevant = {k: v for k, v in sorted(config.items()) if k not in NON_MODEL_KEYS}
+    relevant.update(extra)
+    return hashlib.sha1(json.dumps(relevant, sort_keys=True, default=str).encode()).hexdigest()[:12]
+
 
 # ============================================================
 # 核心类定义
@@ -87,6 +197,25 @@ class EnhancedTweetPredictor:
     def __init__(self, config: dict):
         self.config = config
         self.predictions_history = []
+        self.hour_profile = None
+        self.hawkes_model = None
+        self.analog_library = None
+        self.sleep_model = None
+        self.last_post_ts = None     # 实时推文流给出的最后一条推文时间（否则取自存档）
+        self.regime_detector = None
+        self.regime_live = False     # 检测器由实时推文流更新时，查询计入当前的空白时长
+        self.gap_sketch = None
+        self.dispersion_table = None
+        self.dispersion_path = None
+        self.ladder = None
+        self.ladder_key = None
+        self.ensemble_runner = None
+        self.rate_posterior = None
+        self.rate_posterior_key = None
+        self.history = None          # 历史记录的内存副本（首次使用时读取文件）
+        self.last_run = None         # 上次预测 {'key', 'result'}
+        self.last_saved = None       # 上次写入历史的结果
+        self.muted = False           # 增量更新时不输出详细计算过程
         self.ensure_directories()
 
     def ensure_directories(self):
@@ -96,9 +225,15 @@ class EnhancedTweetPredictor:
 
     def log_message(self, message: str):
         """记录日志到文件和控制台"""
+        if self.muted:
+            return
+
         if self.config['verbose']:
             print(message)
 
+        if not self.config['log_to_file']:
+            return
+
         # 保存到日志文件
         log_file = os.path.join(
             self.config['logs_dir'],
@@ -112,11 +247,197 @@ class EnhancedTweetPredictor:
     # 数据加载与保存
     # ========================================================
 
+    def _archive_path(self) -> str:
+        return os.path.join(self.config['data_dir'], self.config['archive_file'])
+
+    def load_hour_profile(self) -> HourOfWeekProfile:
+        """加载周内小时强度画像（首次调用时从缓存与存档增量更新）"""
+        if self.hour_profile is None:
+            self.hour_profile = load_hour_profile(
+                self._archive_path(),
+                os.path.join(self.config['data_dir'], self.config['profile_file']),
+                self.config['profile_half_life_days'],
+            )
+        return self.hour_profile
+
+    def load_hawkes_model(self) -> HawkesModel:
+        """加载 Hawkes 模型参数（存档更新后自动重新拟合）"""
+        if self.hawkes_model is None:
+            self.hawkes_model = load_hawkes_model(
+                self._archive_path(),
+                os.path.join(self.config['data_dir'], self.config['hawkes_file']),
+            )
+        return self.hawkes_model
+
+    def load_analog_library(self) -> AnalogLibrary:
+        """打开当前窗口长度的轨迹库（内存映射；存档更新后重新生成）"""
+        hours = int(round(self.parse_time_window()['total_hours']))
+        if self.analog_library is None or self.analog_library.hours != hours:
+            self.analog_library = load_analog_library(
+                self._archive_path(),
+                os.path.join(self.config['data_dir'], 'tracking_periods.json'),
+                os.path.join(self.config['data_dir'], self.config['analog_dir']),
+                hours,
+            )
+        return self.analog_library
+
+    def load_sleep_model(self) -> InactiveBlockModel:
+        """加载每日沉寂时段汇总（存档有新的完整日时增量更新）"""
+        if self.sleep_model is None:
+            self.sleep_model = load_sleep_model(
+                self._archive_path(),
+                os.path.join(self.config['data_dir'], self.config['sleep_file']),
+                self.config['sleep_min_gap_hours'],
+                self.config['sleep_history_days'],
+            )
+        return self.sleep_model
+
+    def last_post_before(self, now_ts: float, start_ts: float, current_count: int) -> Optional[float]:
+        """now 之前最后一条推文的时间；存档滞后于当前计数时无法确定，返回 None"""
+        if self.last_post_ts is not None and self.last_post_ts <= now_ts:
+            return self.last_post_ts
+        timestamps = load_post_timestamps(self._archive_path())
+        end = int(np.searchsorted(timestamps, now_ts))
+        if end == 0 or end - int(np.searchsorted(timestamps, start_ts)) < current_count:
+            return None
+        return float(timestamps[end - 1])
+
+    def sleep_adjustment(self, now_ts: float, last_post_ts: Optional[float], end_ts: float) -> float:
+        """正处于沉寂时段时剩余相对暴露的修正量（相对小时）
+
+        预计醒来前的时段折减（负），醒来后的时段按补发回升（正，乘数上限 2 倍），
+        合计可正可负；未处于沉寂时段时为 0。
+        """
+        profile = self.load_hour_profile()
+        if last_post_ts is None or profile.is_empty:
+            return 0.0
+        rates = profile.rates()
+        return self.load_sleep_model().exposure_adjustment(now_ts, last_post_ts, end_ts, rates / rates.mean())
+
+    def load_regime_detector(self) -> RegimeDetector:
+        """加载发帖状态检测器（从保存的状态与存档增量更新）"""
+        if self.regime_detector is None:
+            profile = self.load_hour_profile()
+            self.regime_detector = load_regime_detector(
+                self._archive_path(),
+                os.path.join(self.config['data_dir'], self.config['regime_file']),
+                None if profile.is_empty else profile.rates(),
+            )
+        return self.regime_detector
+
+    def save_regime_detector(self):
+        archive = self._archive_path()
+        save_regime_detector(
+            os.path.join(self.config['data_dir'], self.config['regime_file']),
+            self.load_regime_detector(),
+            os.path.getmtime(archive) if os.path.exists(archive) else None,
+        )
+
+    def regime_state(self) -> dict:
+        """当前发帖状态（实时模式下把上一条推文以来的空白计入）"""
+        return self.load_regime_detector().state(time.time() if self.regime_live else None)
+
+    def load_gap_sketch(self) -> GapSketches:
+        """加载推文间隔草图（从保存的草图与存档增量更新）"""
+        if self.gap_sketch is None:
+            self.gap_sketch = load_gap_sketch(
+                self._archive_path(),
+                os.path.join(self.config['data_dir'], self.config['gap_sketch_file']),
+            )
+        return self.gap_sketch
+
+    def save_gap_sketch(self):
+        archive = self._archive_path()
+        save_gap_sketch(
+            os.path.join(self.config['data_dir'], self.config['gap_sketch_file']),
+            self.load_gap_sketch(),
+            os.path.getmtime(archive) if os.path.exists(archive) else None,
+        )
+
+    def gap_outlook(self, now_ts: float, last_post_ts: Optional[float]) -> dict:
+        """当前小时的间隔分位数，以及（已知最后一条推文时）未来若干小时无推文的概率"""
+        return self.load_gap_sketch().outlook(now_ts, last_post_ts)
+
+    def load_dispersion_table(self) -> DispersionTable:
+        """加载各时长的负二项离散参数表（存档有新的完整日时增量更新）"""
+        if self.dispersion_table is None:
+            self.dispersion_path = os.path.join(self.config['data_dir'], self.config['dispersion_file'])
+            self.dispersion_table = load_dispersion_table(self._archive_path(), self.dispersion_path)
+        return self.dispersion_table
+
+    def nb_alpha(self, horizon_hours: float) -> float:
+        """剩余 horizon_hours 小时的负二项 alpha"""
+        if not self.config['fit_dispersion']:
+            return self.config['nb_alpha']
+        table = self.load_dispersion_table()
+        alpha = table.alpha(horizon_hours)
+        if table.dirty and self.dispersion_path:
+            save_dispersion_table(self.dispersion_path, table)
+        return alpha if alpha is not None else self.config['nb_alpha']
+
+    def relative_exposure(self, start_ts: float, now_ts: float, end_ts: float) -> Tuple[float, float]:
+        """已过 [start, now) 与剩余 [now, end) 的相对暴露（按画像强度 / 平均强度加权的小时数）"""
+        elapsed_hours = max(now_ts - start_ts, 0) / 3600
+        remaining_hours = max(end_ts - now_ts, 0) / 3600
+
+        profile = self.load_hour_profile()
+        if profile.is_empty:
+            return elapsed_hours, remaining_hours
+
+        rates = profile.rates()
+        weights = rates / rates.mean()
+        return (
+            float(weights @ hour_of_week_overlap(start_ts, now_ts)),
+            float(weights @ hour_of_week_overlap(now_ts, end_ts)),
+        )
+
+    def bucket_ladder(self) -> BucketLadder:
+        """当前市场的区间阶梯（按窗口缓存）"""
+        key = self.window_key()
+        if self.ladder is None or self.ladder_key != key:
+            self.ladder = load_ladder(
+                os.path.join(self.config['data_dir'], self.config['ladder_file']),
+                key,
+                self.parse_time_window()['total_hours'] / 24,
+            )
+            self.ladder_key = key
+        return self.ladder
+
+    def window_key(self) -> str:
+        return f"{self.config['window_start_et']}|{self.config['window_end_et']}"
+
+    def get_rate_posterior(self) -> GammaRatePosterior:
+        """当前窗口的速率后验（优先读取持久化状态）"""
+        key = self.window_key()
+        if self.rate_posterior is None or self.rate_posterior_key != key:
+            posterior = None
+            if self.config['persist_posterior']:
+                posterior = load_posterior(self._posterior_path(), key)
+            if posterior is None:
+                posterior = GammaRatePosterior.from_prior_mean(
+                    self.load_historical_data()['avg_hourly_rate'],
+                    self.config['prior_strength_hours'],
+                )
+            self.rate_posterior = posterior
+            self.rate_posterior_key = key
+        return self.rate_posterior
+
+    def _posterior_path(self) -> str:
+        return os.path.join(self.config['data_dir'], self.config['posterior_file'])
+
     def load_historical_data(self) -> dict:
         """加载历史统计数据（先验知识）"""
+        profile = self.load_hour_profile()
+        if profile.is_empty:
+            return {
+                'avg_total_tweets': 400,  # 基于历史：Elon 平均每周约400条
+                'avg_hourly_rate': 400 / (7 * 24),  # 每小时约 2.38 条
+            }
+
+        avg_hourly_rate = profile.mean_rate()
         return {
-            'avg_total_tweets': 400,  # 基于历史：Elon 平均每周约400条
-            'avg_hourly_rate': 400 / (7 * 24),  # 每小时约 2.38 条
+            'avg_total_tweets': avg_hourly_rate * 7 * 24,
+            'avg_hourly_rate': avg_hourly_rate,
         }
 
     def load_history(self) -> List[dict]:
@@ -127,18 +448,29 @@ class EnhancedTweetPredictor:
                 return json.load(f)
         return []
 
+    def cached_history(self) -> List[dict]:
+        """历史记录（只在首次调用时读取文件，之后由 save_prediction 维护）"""
+        if self.history is None:
+            self.history = self.load_history()
+        return self.history
+
     def save_prediction(self, prediction: dict):
         """保存预测到历史记录"""
         self.predictions_history.append(prediction)
+        self.last_saved = prediction
 
         # 保存到 JSON
         history_file = os.path.join(self.config['data_dir'], self.config['history_file'])
-        history = self.load_history()
+        history = self.cached_history()
         history.append(prediction)
 
         with open(history_file, 'w', encoding='utf-8') as f:
             json.dump(history, f, indent=2, ensure_ascii=False, default=str)
 
+        # 保存速率后验，下次运行直接增量更新
+        if self.config['persist_posterior'] and self.rate_posterior is not None:
+            save_posterior(self._posterior_path(), self.rate_posterior_key, self.rate_posterior)
+
         self.log_message(f"✓ 预测已保存到: {history_file}")
 
     # ========================================================
@@ -146,42 +478,12 @@ class EnhancedTweetPredictor:
     # ========================================================
 
     def parse_time_window(self) -> dict:
-        """解析时间窗口"""
-        et = pytz.timezone('America/New_York')
-        utc = pytz.UTC
+        """解析时间窗口（按配置的开始/结束字符串缓存）"""
+        return parse_window(self.config['window_start_et'], self.config['window_end_et'])
 
-        # 解析 ET 时间
-        start_et = et.localize(
-            datetime.strptime(self.config['window_start_et'], '%Y-%m-%d %I:%M %p')
-        )
-        end_et = et.localize(
-            datetime.strptime(self.config['window_end_et'], '%Y-%m-%d %I:%M %p')
-        )
-
-        # 转换为 UTC
-        start_utc = start_et.astimezone(utc)
-        end_utc = end_et.astimezone(utc)
-
-        # 计算窗口总时长
-        total_hours = (end_utc - start_utc).total_seconds() / 3600
-
-        return {
-            'start_et': start_et,
-            'end_et': end_et,
-            'start_utc': start_utc,
-            'end_utc': end_utc,
-            'total_hours': total_hours,
-        }
-
-    def count_weekend_hours(self, start_utc: datetime, end_utc: datetime) -> int:
-        """计算周末小时数"""
-        weekend_hours = 0
-        current = start_utc
-        while current < end_utc:
-            if current.weekday() >= 5:  # 周六=5, 周日=6
-                weekend_hours += 1
-            current += timedelta(hours=1)
-        return weekend_hours
+    def count_weekend_hours(self, start_utc: datetime, end_utc: datetime) -> float:
+        """计算周末小时数（闭式计算）"""
+        return calc_weekend_hours(start_utc.timestamp(), end_utc.timestamp())
 
     # ========================================================
     # 数据抓取
@@ -193,6 +495,10 @@ class EnhancedTweetPredictor:
         self.log_message(f"[{datetime.now().strftime('%H:%M:%S')}] 开始抓取 XTracker...")
         self.log_message(f"URL: {self.config['xtracker_url']}")
 
+        # 网络与 HTML 解析只在抓取时需要，不拖慢手动输入计数的启动
+        import requests
+        from bs4 import BeautifulSoup
+
         try:
             headers = {
                 'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
@@ -261,27 +567,70 @@ class EnhancedTweetPredictor:
 
         # 计算当前速率
         lambda_observed = current_count / elapsed_hours if elapsed_hours > 0 else 0
-        lambda_prior = self.load_historical_data()['avg_hourly_rate']
 
-        # 动态权重
+        # 周内小时画像：已过/剩余时段的相对暴露（相对小时）
+        window = self.parse_time_window()
+        end_ts = window['end_ts']
+        now_ts = end_ts - remaining_hours * 3600
+        exposure_elapsed, exposure_remaining = self.relative_exposure(
+            now_ts - elapsed_hours * 3600, now_ts, end_ts
+        )
+        # 正处于沉寂时段：按预计醒来时间折减剩余暴露
+        last_post = None
+        if self.config['sleep_adjust']:
+            last_post = self.last_post_before(now_ts, now_ts - elapsed_hours * 3600, current_count)
+        sleep_delta = self.sleep_adjustment(now_ts, last_post, end_ts)
+        if sleep_delta != 0:
+            silent_hours = (now_ts - last_post) / 3600
+            self.log_message(f"  沉寂调整: 已 {silent_hours:.1f} 小时未发帖，剩余暴露 {exposure_remaining:.1f} → "
+                             f"{exposure_remaining + sleep_delta:.1f} 相对小时")
+            exposure_remaining = max(exposure_remaining + sleep_delta, 0.0)
+
+        shape_ratio = None
+        if not self.load_hour_profile().is_empty and exposure_elapsed > 0 and remaining_hours > 0:
+            shape_ratio = (exposure_remaining / remaining_hours) / (exposure_elapsed / elapsed_hours)
+
+        # Gamma-Poisson 后验：O(1) 增量更新
+        posterior = self.get_rate_posterior()
+        posterior.observe_count(current_count, exposure_elapsed)
+        hourly_scale = exposure_remaining / remaining_hours if remaining_hours > 0 else 1.0
+        lambda_prior = posterior.prior_shape / posterior.prior_rate * hourly_scale
+        lambda_combined = posterior.mean * hourly_scale
+        w = posterior.data_weight
+
         total_hours = elapsed_hours + remaining_hours
         progress_pct = (elapsed_hours / total_hours) * 100 if total_hours > 0 else 0
-        w = min(1.0, progress_pct / 50)
-
-        lambda_combined = w * lambda_observed + (1 - w) * lambda_prior
 
         self.log_message(f"\n  速率估计:")
         self.log_message(f"    观察速率: {lambda_observed:.2f} 条/小时")
         self.log_message(f"    先验速率: {lambda_prior:.2f} 条/小时")
-        self.log_message(f"    融合速率: {lambda_combined:.2f} 条/小时 (权重 w={w:.2f})")
+        self.log_message(f"    后验速率: {lambda_combined:.2f} 条/小时 (数据权重 w={w:.2f})")
 
         # 预测未来推文数
-        lambda_future = lambda_combined * remaining_hours
+        lambda_future = posterior.mean * exposure_remaining
 
-        if self.config['model_type'] == 'poisson':
+        model_type = self.config['model_type']
+        nb_alpha = None
+        if model_type in ('gamma_poisson', 'neg_binom', 'monte_carlo'):
+            nb_alpha = self.nb_alpha(remaining_hours)
+            self.log_message(f"    离散参数: alpha={nb_alpha:.3f} (剩余 {remaining_hours:.0f} 小时)")
+
+        if model_type == 'gamma_poisson':
+            future_dist = self._predict_gamma_poisson(posterior, exposure_remaining, nb_alpha)
+        elif model_type == 'poisson':
             future_dist = self._predict_poisson(lambda_future)
+        elif model_type == 'monte_carlo':
+            future_dist = self._predict_monte_carlo(lambda_future, nb_alpha, remaining_hours)
+        elif model_type == 'hawkes':
+            future_dist = self._predict_hawkes(now_ts, remaining_hours)
+        elif model_type == 'analog':
+            future_dist = self._predict_analog(current_count, now_ts, elapsed_hours)
+            if future_dist is None:
+                future_dist = self._predict_gamma_poisson(posterior, exposure_remaining, self.nb_alpha(remaining_hours))
+        elif model_type == 'ensemble':
+            future_dist = self._predict_ensemble(current_count, elapsed_hours, remaining_hours)
         else:
-            future_dist = self._predict_neg_binom(lambda_future)
+            future_dist = self._predict_neg_binom(lambda_future, nb_alpha)
 
         # 计算总数统计
         expected_total = current_count + future_dist['mean']
@@ -294,23 +643,25 @@ class EnhancedTweetPredictor:
         predicted_linear = int(lambda_observed * total_hours) if elapsed_hours > 0 else 0
 
         # 保守预测
-        conservative_factor = 0.9
-        predicted_conservative = int(current_count + (lambda_observed * remaining_hours * conservative_factor))
+        predicted_conservative = int(current_count + (lambda_observed * remaining_hours * self.config['conservative_factor']))
 
-        # 周末调整预测
-        window = self.parse_time_window()
-        weekend_hours = self.count_weekend_hours(window['start_utc'], window['end_utc'])
-        if weekend_hours > 0:
-            predicted_weekend = int(current_count + (lambda_observed * remaining_hours * self.config['weekend_boost']))
-            self.log_message(f"    检测到周末: {weekend_hours} 小时")
+        # 时段调整预测：按画像的剩余/已过时段强度比修正观察速率
+        if shape_ratio is not None:
+            predicted_weekend = int(current_count + (lambda_observed * remaining_hours * shape_ratio))
+            self.log_message(f"    时段强度比: {shape_ratio:.2f} (周内小时画像)")
         else:
-            predicted_weekend = predicted_conservative
+            weekend_hours = self.count_weekend_hours(window['start_utc'], window['end_utc'])
+            if weekend_hours > 0:
+                predicted_weekend = int(current_count + (lambda_observed * remaining_hours * self.config['weekend_boost']))
+                self.log_message(f"    检测到周末: {weekend_hours:.0f} 小时")
+            else:
+                predicted_weekend = predicted_conservative
 
         self.log_message(f"\n  预测结果:")
         self.log_message(f"    期望总数: {expected_total:.1f} 条")
         self.log_message(f"    线性预测: {predicted_linear} 条")
         self.log_message(f"    保守预测: {predicted_conservative} 条")
-        self.log_message(f"    周末调整: {predicted_weekend} 条")
+        self.log_message(f"    时段调整: {predicted_weekend} 条")
         self.log_message(f"    80% 置信区间: [{ci80_lower:.0f}, {ci80_upper:.0f}]")
         self.log_message(f"    90% 置信区间: [{ci90_lower:.0f}, {ci90_upper:.0f}]")
 
@@ -324,78 +675,176 @@ class EnhancedTweetPredictor:
             'ci90_lower': ci90_lower,
             'ci90_upper': ci90_upper,
             'lambda_combined': lambda_combined,
+            'lambda_future': lambda_future,
+            'nb_alpha': nb_alpha,
+            'remaining_hours': remaining_hours,
             'progress_pct': progress_pct,
             'daily_rate': lambda_observed * 24,
+            'current_count': current_count,
+            'future_pmf': future_dist['pmf'],
         }
 
+    def _predict_gamma_poisson(self, posterior: GammaRatePosterior, exposure: float, alpha: float) -> dict:
+        """Gamma-Poisson 后验预测（闭式负二项分布，叠加过程离散 alpha）"""
+        mean, variance = posterior.predictive_moments(exposure, alpha)
+        support = np.arange(int(mean + 12 * np.sqrt(variance) + 20))
+        pmf = posterior.predictive_pmf(exposure, support, alpha)
+        return self._summarize_pmf(pmf, mean, variance)
+
     def _predict_poisson(self, lambda_total: float) -> dict:
         """Poisson 分布预测"""
-        dist = poisson(mu=lambda_total)
-        return {
-            'mean': dist.mean(),
-            'variance': dist.var(),
-            'ci80_lower': dist.ppf(0.1),
-            'ci80_upper': dist.ppf(0.9),
-            'ci90_lower': dist.ppf(0.05),
-            'ci90_upper': dist.ppf(0.95),
-        }
+        from scipy.stats import poisson
+
+        support = np.arange(int(lambda_total + 12 * np.sqrt(lambda_total) + 20))
+        pmf = poisson.pmf(support, mu=lambda_total)
+        return self._summarize_pmf(pmf, lambda_total, lambda_total)
 
-    def _predict_neg_binom(self, lambda_total: float) -> dict:
+    def _predict_neg_binom(self, lambda_total: float, alpha: float) -> dict:
         """Negative Binomial 分布预测"""
-        alpha = 0.1
         n = 1 / alpha
         p = 1 / (1 + alpha * lambda_total)
 
-        dist = nbinom(n=n, p=p)
+        variance = lambda_total + alpha * lambda_total ** 2
+        support = np.arange(int(lambda_total + 12 * np.sqrt(variance) + 20))
+        pmf = nbinom_pmf(support, n, p)
+        return self._summarize_pmf(pmf, lambda_total, variance)
+
+    def _predict_monte_carlo(self, lambda_total: float, alpha: float, remaining_hours: float) -> dict:
+        """蒙特卡洛模拟预测（Gamma 速率乘子 × 逐小时 Gamma 强度乘子 × Poisson）"""
+        histogram = self._simulate_histogram(lambda_total, alpha, remaining_hours)
+        pmf = histogram / histogram.sum()
+        support = np.arange(len(pmf))
+        mean = float(support @ pmf)
+        return self._summarize_pmf(pmf, mean, float(((support - mean) ** 2) @ pmf))
+
+    def _predict_hawkes(self, now_ts: float, remaining_hours: float) -> dict:
+        """Hawkes 自激模型预测（分支模拟）"""
+        model = self.load_hawkes_model()
+        archive = self._archive_path()
+        excitation = model.excitation_at(load_post_timestamps(archive), now_ts)
+        counts = model.simulate_counts(
+            remaining_hours, excitation, self.config['hawkes_paths'], self.config['mc_seed']
+        )
+
+        self.log_message(f"    Hawkes: μ={model.mu:.2f}/小时, α={model.alpha:.2f}, β={model.beta:.1f}/小时, 残余激发={excitation:.2f}")
+
+        pmf = np.bincount(counts) / counts.size
+        return self._summarize_pmf(pmf, float(counts.mean()), float(counts.var()))
+
+    def _predict_analog(self, current_count: int, now_ts: float, elapsed_hours: float) -> Optional[dict]:
+        """相似窗口预测（最近邻历史窗口的剩余增量；历史窗口不足时返回 None）"""
+        library = self.load_analog_library()
+        k, separation = self.config['analog_k'], self.config['analog_min_separation_hours']
+        if library.meta['n_windows'] < k * separation:
+            self.log_message(f"    ⚠ 相似窗口不足 ({library.meta['n_windows']} 个)，改用 Gamma-Poisson")
+            return None
+        elapsed_hours = min(elapsed_hours, library.hours)
+        timestamps = load_post_timestamps(self._archive_path())
+        partial = partial_curve(timestamps[timestamps < now_ts], now_ts - elapsed_hours * 3600,
+                                elapsed_hours, current_count)
+        result = library.forecast(partial, elapsed_hours, k, self.config['analog_half_life_hours'], separation)
+
+        self.log_message(f"    相似窗口: {len(result['rows'])} 个最近邻 / {library.meta['n_windows']} 个历史窗口,"
+                         f" 中位距离 {np.median(result['distance']):.1f} 条")
+
+        return self._summarize_pmf(result['pmf'], result['mean'], result['variance'])
+
+    def _predict_ensemble(self, current_count: int, elapsed_hours: float, remaining_hours: float) -> dict:
+        """多模型集成预测（各模型并行运行，超时丢弃，按回测权重混合）"""
+        from ensemble import EnsembleRunner
+
+        runner = self.ensemble_runner
+        key = (config_fingerprint(self.config), self.config['window_start_et'], self.config['window_end_et'])
+        if runner is None or runner.key != key:
+            if runner is not None:
+                runner.close()
+            runner = self.ensemble_runner = EnsembleRunner(self.config)
+
+        result = runner.run(current_count, elapsed_hours, remaining_hours)
+        weights = ', '.join(f"{m}={w:.2f}" for m, w in result['weights'].items())
+        self.log_message(f"    集成权重: {weights}")
+        if result['dropped']:
+            self.log_message(f"    ⚠ 超时丢弃: {', '.join(result['dropped'])}")
+
+        pmf = result['pmf']
+        support = np.arange(len(pmf))
+        return self._summarize_pmf(pmf, result['mean'], float(((support - result['mean']) ** 2) @ pmf))
+
+    def close(self):
+        """释放集成模型的进程池"""
+        if self.ensemble_runner is not None:
+            self.ensemble_runner.close()
+            self.ensemble_runner = None
+
+    def remaining_hourly_intensity(self, lambda_total: float, remaining_hours: float) -> np.ndarray:
+        """把剩余期望推文数 lambda_total 按画像分配到剩余窗口的各小时（最后一段可不足一小时）"""
+        end_ts = self.parse_time_window()['end_ts']
+        now_ts = end_ts - remaining_hours * 3600
+        edges = np.append(np.arange(now_ts, end_ts, 3600.0), end_ts)
+        profile = self.load_hour_profile()
+        if profile.is_empty:
+            exposure = np.diff(edges) / 3600
+        else:
+            rates = profile.rates()
+            exposure = np.diff(cumulative_weighted_hours(edges, rates / rates.mean()))
+        total = exposure.sum()
+        return lambda_total * exposure / total if total > 0 else np.zeros_like(exposure)
+
+    def _simulate_histogram(self, lambda_total: float, alpha: float, remaining_hours: float,
+                            n_paths: Optional[int] = None, seed: Optional[int] = None) -> np.ndarray:
+        hour_alpha = self.config['mc_hour_alpha']
+        return simulate_remaining_counts(
+            self.remaining_hourly_intensity(lambda_total, remaining_hours),
+            gamma_shape=1 / alpha,
+            hour_shape=1 / hour_alpha if hour_alpha > 0 else 0.0,
+            n_paths=n_paths or self.config['mc_paths'],
+            seed=self.config['mc_seed'] if seed is None else seed,
+            chunk_size=self.config['mc_chunk_size'],
+            workers=self.config['mc_workers'],
+        )
+
+    def simulate(self, prediction: dict, n_paths: Optional[int] = None, seed: Optional[int] = None) -> dict:
+        """对 predict() 的结果做蒙特卡洛模拟，返回区间概率、分位数与尾部风险"""
+        alpha = prediction['nb_alpha'] or self.nb_alpha(prediction['remaining_hours'])
+        histogram = self._simulate_histogram(prediction['lambda_future'], alpha, prediction['remaining_hours'],
+                                             n_paths, seed)
+        summary = summarize_simulation(histogram, prediction['current_count'], self.bucket_ladder())
+
+        self.log_message(f"\n  蒙特卡洛模拟 ({summary['n_paths']:,} 条路径):")
+        self.log_message(f"    均值: {summary['mean']:.1f} 条 (标准差 {summary['std']:.1f})")
+        self.log_message(f"    分位数: " + ', '.join(f"{k}={v}" for k, v in summary['quantiles'].items()))
+        tail = summary['tail_risk']
+        self.log_message(f"    尾部均值: 最高5% {tail['upper_5pct_mean']:.1f} / 最低5% {tail['lower_5pct_mean']:.1f}")
+
+        return summary
+
+    def _summarize_pmf(self, pmf: np.ndarray, mean: float, variance: float) -> dict:
+        """由未来推文数 PMF 计算置信区间（与 ppf 语义一致：CDF >= q 的最小值）"""
+        cdf = np.cumsum(pmf)
+        q = np.searchsorted(cdf, [0.1, 0.9, 0.05, 0.95])
         return {
-            'mean': dist.mean(),
-            'variance': dist.var(),
-            'ci80_lower': dist.ppf(0.1),
-            'ci80_upper': dist.ppf(0.9),
-            'ci90_lower': dist.ppf(0.05),
-            'ci90_upper': dist.ppf(0.95),
+            'mean': mean,
+            'variance': variance,
+            'ci80_lower': float(q[0]),
+            'ci80_upper': float(q[1]),
+            'ci90_lower': float(q[2]),
+            'ci90_upper': float(q[3]),
+            'pmf': pmf,
         }
 
     # ========================================================
     # 区间映射
     # ========================================================
 
-    def map_to_buckets(self, expected_total: float, std_dev: float = 50) -> Dict[str, float]:
-        """将预测映射到 Polymarket 区间"""
-        buckets = {}
-
-        # 定义区间边界
-        bucket_ranges = [
-            ('<40', 0, 39),
-            ('40-64', 40, 64),
-            ('65-89', 65, 89),
-            ('90-114', 90, 114),
-            ('115-139', 115, 139),
-            ('140-164', 140, 164),
-            ('165-189', 165, 189),
-            ('190-214', 190, 214),
-            ('215-239', 215, 239),
-            ('240+', 240, 1000),
-        ]
-
-        # 计算每个区间的概率（使用正态分布近似）
-        for name, lower, upper in bucket_ranges:
-            if name == '240+':
-                # 最后一个区间：从 lower 到无穷
-                z_lower = (lower - expected_total) / std_dev
-                prob = 1 - norm.cdf(z_lower)
-            else:
-                # 普通区间：[lower, upper]
-                z_lower = (lower - expected_total) / std_dev
-                z_upper = (upper - expected_total) / std_dev
-                prob = norm.cdf(z_upper) - norm.cdf(z_lower)
-
-            buckets[name] = max(0, prob)
+    def map_to_buckets(self, prediction: dict) -> Tuple[Dict[str, float], np.ndarray]:
+        """将预测分布映射到 Polymarket 区间
 
-        # 归一化
-        total = sum(buckets.values())
-        if total > 0:
-            buckets = {k: v/total for k, v in buckets.items()}
+        返回 (区间概率, PMF)，PMF[k] 为最终总数等于 current_count + k 的概率。
+        """
+        pmf = prediction['future_pmf']
+        ladder = self.bucket_ladder()
+        probs = ladder.probabilities(pmf, prediction['current_count'])
+        buckets = {name: float(prob) for name, prob in zip(ladder.names, probs)}
 
         # 显示前 5 个最可能的区间
         sorted_buckets = sorted(buckets.items(), key=lambda x: -x[1])[:5]
@@ -403,7 +852,97 @@ class EnhancedTweetPredictor:
         for bucket, prob in sorted_buckets:
             self.log_message(f"    {bucket:>10s}: {prob*100:5.2f}%")
 
-        return buckets
+        return buckets, pmf
+
+    # ========================================================
+    # 批量预测
+    # ========================================================
+
+    def _batch_sleep_adjustment(self, counts: np.ndarray, start: np.ndarray, now: np.ndarray,
+                                end: np.ndarray) -> np.ndarray:
+        """逐场景的沉寂调整（与 predict() 中 last_post_before + sleep_adjustment 相同），
+        按不同的 (当前时刻, 最后推文, 结束时刻) 组合各计算一次"""
+        timestamps = load_post_timestamps(self._archive_path())
+        if timestamps.size:
+            end_idx = np.searchsorted(timestamps, now)
+            in_window = end_idx - np.searchsorted(timestamps, start)
+            # 存档滞后于场景计数时无法确定最后一条推文（记为 -1）
+            last_post = np.where((end_idx > 0) & (in_window >= counts), timestamps[np.maximum(end_idx - 1, 0)], -1.0)
+        else:
+            last_post = np.full(counts.shape, -1.0)
+        if self.last_post_ts is not None:
+            last_post = np.where(self.last_post_ts <= now, self.last_post_ts, last_post)
+
+        keys, inverse = np.unique(np.stack([now, last_post, end], axis=1), axis=0, return_inverse=True)
+        deltas = np.array([
+            self.sleep_adjustment(now_ts, None if last_ts < 0 else last_ts, end_ts)
+            for now_ts, last_ts, end_ts in keys
+        ])
+        return deltas[inverse.reshape(-1)]
+
+    def predict_batch(self, current_counts, elapsed_hours, remaining_hours,
+                      ladders: Optional[Sequence[Sequence[int]]] = None, end_ts=None) -> dict:
+        """N 组场景一次向量化计算区间概率
+
+        current_counts / elapsed_hours / remaining_hours / end_ts 为长度 N 的数组（或标量广播），
+        end_ts 默认为当前窗口结束时间；ladders 为每个市场的区间下界（默认当前市场的阶梯，
+        只给一组时所有场景共用）。每个场景都从先验开始更新后验，不读写持久化的后验状态；
+        sleep_adjust 开启时按与 predict() 相同的规则（存档中的最后一条推文）逐场景做沉寂调整。
+        结果与逐个调用 predict() + map_to_buckets() 在全新后验、相同存档上一致。
+
+        返回 probabilities (N×K，补齐的区间为 0)、edges (N×K 下界，补齐为 inf)、
+        expected_total、std、lambda_future。
+        """
+        counts, elapsed, remaining = np.broadcast_arrays(
+            np.asarray(current_counts, dtype=np.float64),
+            np.asarray(elapsed_hours, dtype=np.float64),
+            np.asarray(remaining_hours, dtype=np.float64),
+        )
+        counts, elapsed, remaining = (np.atleast_1d(a).astype(np.float64) for a in (counts, elapsed, remaining))
+        if end_ts is None:
+            end_ts = self.parse_time_window()['end_ts']
+        end = np.broadcast_to(np.asarray(end_ts, dtype=np.float64), counts.shape)
+        now = end - remaining * 3600
+        start = now - elapsed * 3600
+
+        # 相对暴露：画像权重的累计函数之差
+        profile = self.load_hour_profile()
+        if profile.is_empty:
+            exposure_elapsed, exposure_remaining = elapsed, remaining
+        else:
+            rates = profile.rates()
+            weights = rates / rates.mean()
+            cum_start, cum_now, cum_end = (cumulative_weighted_hours(t, weights) for t in (start, now, end))
+            exposure_elapsed, exposure_remaining = cum_now - cum_start, cum_end - cum_now
+            if self.config['sleep_adjust']:
+                exposure_remaining = np.maximum(exposure_remaining + self._batch_sleep_adjustment(
+                    counts, start, now, end), 0.0)
+
+        prior_rate = self.config['prior_strength_hours']
+        prior_shape = self.load_historical_data()['avg_hourly_rate'] * prior_rate
+        shape = prior_shape + counts
+        rate = prior_rate + exposure_elapsed
+        lambda_future = shape / rate * exposure_remaining
+
+        model = self.config['model_type']
+        nb_alpha = self.config['nb_alpha']
+        if model in ('gamma_poisson', 'neg_binom'):
+            # 按剩余整小时数分组查询离散参数
+            hours = np.maximum(np.ceil(remaining - 1e-9), 1)
+            unique_hours, inverse = np.unique(hours, return_inverse=True)
+            nb_alpha = np.array([self.nb_alpha(h) for h in unique_hours])[inverse]
+
+        params, mean, variance = predictive_params(model, lambda_future, nb_alpha, shape)
+        edges = pad_ladders(self.bucket_ladder().to_list() if ladders is None else ladders, counts.size)
+        dist = 'poisson' if model == 'poisson' else 'neg_binom'
+
+        return {
+            'probabilities': bucket_probabilities(counts, edges, dist, params),
+            'edges': edges,
+            'expected_total': counts + mean,
+            'std': np.sqrt(variance),
+            'lambda_future': lambda_future,
+        }
 
     # ========================================================
     # 趋势分析
@@ -486,6 +1025,8 @@ class EnhancedTweetPredictor:
             'direction': '数据不足',
             'stability': '数据不足'
         }
+        regime = self.regime_state()
+        trend['regime'] = regime['regime']
 
         # 确定推荐区间
         recommendation = {
@@ -497,62 +1038,31 @@ class EnhancedTweetPredictor:
             '趋势分析': trend,
         }
 
-        # 根据预测值推荐
-        if current_pred < 40:
-            recommendation['主推荐'] = '<40'
-            recommendation['次推荐'] = '40-64'
-            recommendation['避免'] = '90+'
-            recommendation['置信度'] = '高' if '稳定' in trend['stability'] else '中等'
-            recommendation['理由'].append('预测值低于40，极低区间')
-
-        elif 40 <= current_pred < 65:
-            recommendation['主推荐'] = '40-64'
-            recommendation['次推荐'] = '65-89'
-            recommendation['避免'] = '115+'
-            recommendation['置信度'] = '高'
-            recommendation['理由'].append('预测值在40-64区间内')
-
-        elif 65 <= current_pred < 90:
-            recommendation['主推荐'] = '65-89'
-            recommendation['次推荐'] = '90-114'
-            recommendation['避免'] = '<40'
-            recommendation['置信度'] = '高'
-            recommendation['理由'].append('预测值在65-89区间内')
+        # 根据预测值与区间概率推荐（适用于任意阶梯）
+        ladder = self.bucket_ladder()
+        probs = ladder.probabilities(prediction['future_pmf'], prediction['current_count'])
+        main_idx = int(ladder.index(current_pred))
+        neighbors = [ladder.names[i] for i in (main_idx - 1, main_idx + 1) if 0 <= i < len(ladder)]
+
+        recommendation['主推荐'] = ladder.names[main_idx]
+        recommendation['次推荐'] = ' 或 '.join(neighbors)
+        recommendation['避免'] = ladder.tail_label(probs)
+        main_prob = probs[main_idx]
+        recommendation['置信度'] = '高' if main_prob >= 0.4 else '中等' if main_prob >= 0.25 else '低'
+
+        if main_idx == len(ladder) - 1:
+            recommendation['理由'].append(f'预测值超过{ladder.edges[-1]}，最高区间，高风险')
+        elif main_idx == 0 and ladder.edges[0] == 0:
+            recommendation['理由'].append(f'预测值低于{ladder.edges[1]}，最低区间')
+        else:
+            recommendation['理由'].append(f'预测值在{ladder.names[main_idx]}区间内')
+        recommendation['理由'].append(f'模型给出该区间概率 {main_prob * 100:.0f}%')
 
-        elif 90 <= current_pred < 115:
-            recommendation['主推荐'] = '90-114'
-            recommendation['次推荐'] = '65-89 或 115-139'
-            recommendation['避免'] = '<40'
-            recommendation['置信度'] = '高'
-            recommendation['理由'].append('预测值在90-114区间内')
-
-        elif 115 <= current_pred < 140:
-            recommendation['主推荐'] = '115-139'
-            recommendation['次推荐'] = '90-114 或 140-164'
-            recommendation['避免'] = '<65'
-            recommendation['置信度'] = '中等'
-            recommendation['理由'].append('预测值在115-139区间内')
-
-        elif 140 <= current_pred < 165:
-            recommendation['主推荐'] = '140-164'
-            recommendation['次推荐'] = '115-139'
-            recommendation['避免'] = '<90'
-            recommendation['置信度'] = '中等'
-            recommendation['理由'].append('预测值在140-164区间内')
-
-        elif 165 <= current_pred < 190:
-            recommendation['主推荐'] = '165-189'
-            recommendation['次推荐'] = '140-164 或 190-214'
-            recommendation['避免'] = '<115'
-            recommendation['置信度'] = '中等'
-            recommendation['理由'].append('预测值在165-189区间内')
-
-        else:  # 190+
-            recommendation['主推荐'] = '190-214'
-            recommendation['次推荐'] = '215-239 或 240+'
-            recommendation['避免'] = '<140'
-            recommendation['置信度'] = '低'
-            recommendation['理由'].append('预测值超过190，高风险')
+        # 发帖状态（推文间隔的变点检测，比预测值趋势反应更快）
+        if regime['regime'] == 'burst':
+            recommendation['理由'].append(f"{regime['label']}：近期发帖远高于该时段常态，剩余推文可能高于模型预期")
+        elif regime['regime'] == 'sleep':
+            recommendation['理由'].append(f"{regime['label']}：已明显低于该时段常态，剩余推文可能低于模型预期")
 
         # 根据趋势调整
         if '上升' in trend['direction']:
@@ -579,7 +1089,8 @@ class EnhancedTweetPredictor:
     # 显示功能
     # ========================================================
 
-    def display_recommendation(self, prediction: dict, recommendation: dict, current_count: int):
+    def display_recommendation(self, prediction: dict, recommendation: dict, current_count: int,
+                               gap_outlook: Optional[dict] = None):
         """显示推荐报告"""
         print("\n" + "="*70)
         print("🤖 Elon Musk 推文预测系统 - 智能推荐")
@@ -601,7 +1112,7 @@ class EnhancedTweetPredictor:
         print("\n📈 预测结果:")
         print(f"   线性预测:     {prediction['predicted_linear']} 条")
         print(f"   保守预测:     {prediction['predicted_conservative']} 条")
-        print(f"   周末调整:     {prediction['predicted_weekend']} 条")
+        print(f"   时段调整:     {prediction['predicted_weekend']} 条")
         print(f"   统计期望:     {prediction['expected_total']:.1f} 条")
         print(f"   80% 置信区间: [{prediction['ci80_lower']:.0f}, {prediction['ci80_upper']:.0f}]")
 
@@ -609,6 +1120,17 @@ class EnhancedTweetPredictor:
         print("\n📉 趋势分析:")
         print(f"   方向: {recommendation['趋势分析']['direction']}")
         print(f"   稳定性: {recommendation['趋势分析']['stability']}")
+        regime = recommendation['趋势分析'].get('regime')
+        if regime:
+            print(f"   发帖状态: {REGIME_LABELS[regime]}")
+        if gap_outlook:
+            quantiles = gap_outlook['quantiles']
+            if quantiles['p50'] is not None:
+                print(f"   当前时段间隔: 中位 {quantiles['p50'] * 60:.0f} 分钟, "
+                      f"90% 分位 {quantiles['p90'] * 60:.0f} 分钟")
+            if gap_outlook['silent_hours'] is not None:
+                chances = ', '.join(f"{h} {p * 100:.0f}%" for h, p in gap_outlook['no_post'].items() if p is not None)
+                print(f"   已空白 {gap_outlook['silent_hours']:.1f} 小时，未来无推文概率: {chances or '超出历史最长间隔'}")
 
         # 显示下注建议
         print("\n" + "="*70)
@@ -672,6 +1194,8 @@ class EnhancedTweetPredictor:
 
     def open_polymarket(self):
         """打开 Polymarket 网站"""
+        import subprocess
+
         try:
             subprocess.run(['open', self.config['market_url']], check=True)
             print("\n✓ 已在浏览器中打开 Polymarket 市场")
@@ -682,14 +1206,35 @@ class EnhancedTweetPredictor:
     # 核心运行逻辑
     # ========================================================
 
+    def run_key(self, count: int, remaining_hours: float) -> tuple:
+        """结果缓存键：(计数, 窗口, 配置指纹, 时间段)"""
+        time_bucket = int(remaining_hours * 60 // self.config['reuse_minutes'])
+        return (count, self.window_key(), config_fingerprint(self.config), time_bucket)
+
+    def is_meaningful_change(self, result: dict) -> bool:
+        """与上次写入历史的结果相比是否有值得记录的变化"""
+        last = self.last_saved
+        if last is None:
+            history = self.cached_history()
+            last = history[-1] if history else None
+        if last is None or last.get('current_count') != result['current_count']:
+            return True
+        if last.get('recommendation', {}).get('主推荐') != result['recommendation']['主推荐']:
+            return True
+        if last.get('regime', 'normal') != result['regime']:
+            return True
+        last_buckets = last.get('buckets', {})
+        change = max(abs(p - last_buckets.get(name, 0.0)) for name, p in result['buckets'].items())
+        return change >= self.config['history_min_change']
+
     def run_with_count(self, count: int) -> dict:
-        """使用指定推文数量运行预测"""
-        # 解析时间窗口
+        """使用指定推文数量运行预测
+
+        计数、窗口和配置不变时：同一时间段内直接复用上次结果；
+        跨时间段时静默重算（后验 O(1) 增量更新）。每次都显示推荐报告，
+        只在结果有明显变化时写入历史。
+        """
         window = self.parse_time_window()
-        self.log_message(f"\n时间窗口:")
-        self.log_message(f"  开始 (ET): {window['start_et'].strftime('%Y-%m-%d %I:%M %p %Z')}")
-        self.log_message(f"  结束 (ET): {window['end_et'].strftime('%Y-%m-%d %I:%M %p %Z')}")
-        self.log_message(f"  总时长: {window['total_hours']:.1f} 小时")
 
         # 使用指定的计数
         current_count = count
@@ -703,22 +1248,40 @@ class EnhancedTweetPredictor:
             self.log_message(f"\n⚠ 市场已关闭！最终计数: {current_count}")
             return {'current_count': current_count, 'market_closed': True}
 
-        # 预测
-        prediction_result = self.predict(current_count, elapsed, remaining)
-
-        # 映射到区间
-        buckets = self.map_to_buckets(prediction_result['expected_total'])
-
-        # 加载历史并获取推荐
-        history = self.load_history()
-        recommendation = self.get_recommendation(prediction_result, history)
+        key = self.run_key(current_count, remaining)
+        last = self.last_run
+        if last is not None and last['key'] == key:
+            self.log_message(f"\n⏸ 计数未变化 ({current_count})，复用上次预测结果")
+            result = last['result']
+            self.display_recommendation(result, result['recommendation'], current_count, result['gap_outlook'])
+            return result
+        incremental = last is not None and last['key'][:3] == key[:3]
+
+        if not incremental:
+            self.log_message(f"\n时间窗口:")
+            self.log_message(f"  开始 (ET): {window['start_et'].strftime('%Y-%m-%d %I:%M %p %Z')}")
+            self.log_message(f"  结束 (ET): {window['end_et'].strftime('%Y-%m-%d %I:%M %p %Z')}")
+            self.log_message(f"  总时长: {window['total_hours']:.1f} 小时")
+
+        # 预测并映射到区间（增量更新时不输出计算过程）
+        self.muted = incremental
+        try:
+            prediction_result = self.predict(current_count, elapsed, remaining)
+            buckets, _ = self.map_to_buckets(prediction_result)
+        finally:
+            self.muted = False
 
-        # 显示推荐
-        self.display_recommendation(prediction_result, recommendation, current_count)
+        # 获取推荐（历史记录使用内存副本）
+        recommendation = self.get_recommendation(prediction_result, self.cached_history())
+        now_ts = now.timestamp()
+        gap_outlook = self.gap_outlook(now_ts, self.last_post_before(now_ts, window['start_ts'], current_count))
 
         # 组合结果
         result = {
             'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'window_start_et': self.config['window_start_et'],
+            'window_end_et': self.config['window_end_et'],
+            'model_type': self.config['model_type'],
             'current_count': current_count,
             'elapsed_hours': elapsed,
             'remaining_hours': remaining,
@@ -733,23 +1296,24 @@ class EnhancedTweetPredictor:
             'ci90_upper': prediction_result['ci90_upper'],
             'daily_rate': prediction_result['daily_rate'],
             'buckets': buckets,
+            'regime': recommendation['趋势分析']['regime'],
+            'gap_outlook': gap_outlook,
             'recommendation': recommendation,
         }
+        self.last_run = {'key': key, 'result': result}
+
+        self.display_recommendation(prediction_result, recommendation, current_count, gap_outlook)
 
-        # 保存
-        self.save_prediction(result)
+        # 只记录有明显变化的结果
+        if self.is_meaningful_change(result):
+            self.save_prediction(result)
+        else:
+            self.log_message(f"\n⏸ 区间概率无明显变化 (计数 {current_count})，不写入历史")
 
         return result
 
     def run_once(self, manual_input: bool = False) -> dict:
         """运行一次预测"""
-        # 解析时间窗口
-        window = self.parse_time_window()
-        self.log_message(f"\n时间窗口:")
-        self.log_message(f"  开始 (ET): {window['start_et'].strftime('%Y-%m-%d %I:%M %p %Z')}")
-        self.log_message(f"  结束 (ET): {window['end_et'].strftime('%Y-%m-%d %I:%M %p %Z')}")
-        self.log_message(f"  总时长: {window['total_hours']:.1f} 小时")
-
         # 获取当前计数
         if manual_input:
             current_count = int(input("\n请输入当前推文数量: "))
@@ -761,52 +1325,7 @@ class EnhancedTweetPredictor:
             else:
                 current_count = snapshot['current_count']
 
-        # 计算时间进度
-        now = datetime.now(pytz.UTC)
-        elapsed = (now - window['start_utc']).total_seconds() / 3600
-        remaining = (window['end_utc'] - now).total_seconds() / 3600
-
-        if remaining < 0:
-            self.log_message(f"\n⚠ 市场已关闭！最终计数: {current_count}")
-            return {'current_count': current_count, 'market_closed': True}
-
-        # 预测
-        prediction_result = self.predict(current_count, elapsed, remaining)
-
-        # 映射到区间
-        buckets = self.map_to_buckets(prediction_result['expected_total'])
-
-        # 加载历史并获取推荐
-        history = self.load_history()
-        recommendation = self.get_recommendation(prediction_result, history)
-
-        # 显示推荐
-        self.display_recommendation(prediction_result, recommendation, current_count)
-
-        # 组合结果
-        result = {
-            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'current_count': current_count,
-            'elapsed_hours': elapsed,
-            'remaining_hours': remaining,
-            'progress_pct': prediction_result['progress_pct'],
-            'predicted_linear': prediction_result['predicted_linear'],
-            'predicted_conservative': prediction_result['predicted_conservative'],
-            'predicted_weekend': prediction_result['predicted_weekend'],
-            'expected_total': prediction_result['expected_total'],
-            'ci80_lower': prediction_result['ci80_lower'],
-            'ci80_upper': prediction_result['ci80_upper'],
-            'ci90_lower': prediction_result['ci90_lower'],
-            'ci90_upper': prediction_result['ci90_upper'],
-            'daily_rate': prediction_result['daily_rate'],
-            'buckets': buckets,
-            'recommendation': recommendation,
-        }
-
-        # 保存
-        self.save_prediction(result)
-
-        return result
+        return self.run_with_count(current_count)
 
     def run_continuous(self):
         """持续运行（定时抓取）"""
@@ -889,7 +1408,7 @@ def main():
             if count < 0:
                 print("❌ 错误：推文数量不能为负数")
                 sys.exit(1)
-            predictor = EnhancedTweetPredictor(CONFIG)
+            predictor = EnhancedTweetPredictor(load_tuned_config(CONFIG))
             predictor.run_with_count(count)
             return
         except ValueError:
@@ -899,7 +1418,7 @@ def main():
             sys.exit(1)
 
     # 交互模式
-    predictor = EnhancedTweetPredictor(CONFIG)
+    predictor = EnhancedTweetPredictor(load_tuned_config(CONFIG))
 
     # 询问用户运行模式
     print("\n请选择运行模式:")
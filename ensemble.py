@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+多模型集成 - 并行运行多个模型并按回测权重合并分布
+================================================
+每个模型（Gamma-Poisson 周内小时强度、Poisson、负二项、Hawkes、相似窗口等）在独立的
+工作进程中运行，各自有截止时间；超时的模型本轮直接丢弃，不阻塞预测，
+其余模型的权重重新归一化。
+
+合并方式为未来推文数 PMF 的加权混合（区间概率随之为各模型区间概率的加权和）。
+权重由回测学习：在所有回测检查点上最大化混合分布对真实区间的对数似然
+（EM 迭代，权重保持在单纯形上），结果保存到 data/ensemble_weights.json。
+
+使用方法：
+    python ensemble.py fit            # 回测各模型并学习权重
+    python ensemble.py run 120        # 用当前窗口和 120 条推文运行一次集成
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+import backtest
+from elon_predictor_enhanced import CONFIG, EnhancedTweetPredictor, config_fingerprint, load_tuned_config
+
+MODEL_LABELS = {
+    'gamma_poisson': '周内小时强度 (Gamma-Poisson)',
+    'poisson': 'Poisson',
+    'neg_binom': '负二项',
+    'monte_carlo': '蒙特卡洛',
+    'hawkes': 'Hawkes 自激',
+    'analog': '相似窗口 (Analog)',
+}
+
+
+# ============================================================
+# 权重
+# ============================================================
+
+def stack_weights(true_probs: np.ndarray, iterations: int = 500, tol: float = 1e-10) -> np.ndarray:
+    """混合权重的最大似然估计
+
+    true_probs: (模型数, 检查点数)，各模型给真实区间的概率。
+    EM 更新 w_m <- mean_n(w_m p_mn / Σ_j w_j p_jn)，单调提高对数似然。
+    """
+    true_probs = np.maximum(true_probs, 1e-12)
+    weights = np.full(len(true_probs), 1 / len(true_probs))
+    for _ in range(iterations):
+        mixture = weights @ true_probs
+        updated = (weights[:, None] * true_probs / mixture).mean(axis=1)
+        if np.abs(updated - weights).max() < tol:
+            return updated
+        weights = updated
+    return weights
+
+
+def fit_weights(config: dict, models: List[str], workers: Optional[int] = None) -> dict:
+    """逐个模型回测（使用回测缓存），学习集成权重"""
+    true_probs = []
+    log_loss = {}
+    for model in models:
+        results = backtest.run_backtest(dict(config, model_type=model), workers=workers)
+        checkpoints = [cp for r in results for cp in r['checkpoints']]
+        probs = np.array([cp['probs'][cp['true_bucket']] for cp in checkpoints])
+        true_probs.append(probs)
+        log_loss[model] = float(-np.log(np.maximum(probs, 1e-12)).mean())
+
+    true_probs = np.array(true_probs)
+    weights = stack_weights(true_probs)
+    return {
+        'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'n_checkpoints': int(true_probs.shape[1]),
+        'weights': {m: float(w) for m, w in zip(models, weights)},
+        'log_loss': log_loss,
+        'ensemble_log_loss': float(-np.log(np.maximum(weights @ true_probs, 1e-12)).mean()),
+    }
+
+
+def load_weights(path: str, models: List[str]) -> Dict[str, float]:
+    """读取集成权重；文件不存在或缺少模型时该模型取等权"""
+    fitted = {}
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            fitted = json.load(f).get('weights', {})
+    default = 1 / len(models)
+    return {m: fitted.get(m, default) for m in models}
+
+
+# ============================================================
+# 工作进程
+# ============================================================
+
+_WORKER = {}
+
+
+def _init_worker(config: dict, ready=None):
+    """每个工作进程为所有模型各建一个预测器，共享画像与离散参数表；完成后释放 ready 信号量"""
+    base = dict(config, verbose=False, log_to_file=False, persist_posterior=False)
+    predictors = {}
+    shared = None
+    for model in config['ensemble_models']:
+        predictor = EnhancedTweetPredictor(dict(base, model_type=model))
+        if shared is None:
+            shared = predictor
+            shared.load_hour_profile()
+            shared.load_dispersion_table()
+        else:
+            predictor.hour_profile = shared.hour_profile
+            predictor.dispersion_table = shared.dispersion_table
+        if model == 'hawkes':
+            predictor.load_hawkes_model()
+        elif model == 'analog':
+            predictor.load_analog_library()
+        predictors[model] = predictor
+
+    # 预热：导入模型用到的模块（scipy 等在首次预测时才导入）、填充存档时间戳缓存，
+    # 使首轮预测不会因一次性开销超过截止时间
+    window = shared.parse_time_window()
+    for predictor in predictors.values():
+        predictor.muted = True
+        predictor.predict(0, 1.0, max(window['total_hours'] - 1.0, 1.0))
+        predictor.muted = False
+    _WORKER['predictors'] = predictors
+    if ready is not None:
+        ready.release()
+
+
+def _ready(_) -> int:
+    return os.getpid()
+
+
+def run_model(model: str, current_count: int, elapsed_hours: float, remaining_hours: float) -> dict:
+    """在工作进程中运行单个模型，返回未来推文数 PMF"""
+    start = time.perf_counter()
+    prediction = _WORKER['predictors'][model].predict(current_count, elapsed_hours, remaining_hours)
+    return {
+        'pmf': prediction['future_pmf'],
+        'mean': prediction['expected_total'] - current_count,
+        'seconds': time.perf_counter() - start,
+    }
+
+
+# ============================================================
+# 集成调度
+# ============================================================
+
+class EnsembleRunner:
+    """常驻进程池，每轮并行运行所有模型"""
+
+    def __init__(self, config: dict, workers: Optional[int] = None):
+        self.config = config
+        self.models = list(config['ensemble_models'])
+        self.key = (config_fingerprint(config), config['window_start_et'], config['window_end_et'])
+        self.weights = load_weights(
+            os.path.join(config['data_dir'], config['ensemble_weights_file']), self.models
+        )
+        deadlines = config['ensemble_deadlines']
+        self.deadlines = {m: deadlines.get(m, deadlines['default']) for m in self.models}
+
+        # Hawkes 参数与相似窗口轨迹库需要时先在主进程生成，避免各工作进程同时重建、写同一文件
+        base = dict(config, verbose=False, log_to_file=False, persist_posterior=False)
+        if 'hawkes' in self.models:
+            EnhancedTweetPredictor(dict(base, model_type='hawkes')).load_hawkes_model()
+        if 'analog' in self.models:
+            EnhancedTweetPredictor(dict(base, model_type='analog')).load_analog_library()
+
+        # 等待所有进程完成初始化（加载存档、画像、拟合 Hawkes），不计入每轮截止时间。
+        # 各进程初始化完成前都不会空闲，因此 workers 个任务会启动 workers 个进程
+        workers = workers or len(self.models)
+        ready = multiprocessing.Semaphore(0)
+        self.pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(config, ready))
+        futures = [self.pool.submit(_ready, i) for i in range(workers)]
+        started = 0
+        while started < workers:
+            if ready.acquire(timeout=1.0):
+                started += 1
+            else:
+                failed = next((f for f in futures if f.done() and f.exception() is not None), None)
+                if failed is not None:
+                    raise failed.exception()
+        for future in futures:
+            future.result()
+
+    def run(self, current_count: int, elapsed_hours: float, remaining_hours: float) -> dict:
+        """运行一轮集成，返回混合 PMF、实际使用的权重与被丢弃的模型"""
+        submitted = time.monotonic()
+        futures = {
+            model: self.pool.submit(run_model, model, current_count, elapsed_hours, remaining_hours)
+            for model in self.models
+        }
+
+        outputs, dropped = {}, []
+        # 按截止时间从早到晚等待，已完成的模型不需要额外等待
+        for model in sorted(self.models, key=self.deadlines.get):
+            remaining = self.deadlines[model] - (time.monotonic() - submitted)
+            try:
+                outputs[model] = futures[model].result(timeout=max(remaining, 0.0))
+            except TimeoutError:
+                futures[model].cancel()
+                dropped.append(model)
+
+        if not outputs:
+            raise RuntimeError("所有模型都未在截止时间内完成")
+
+        total = sum(self.weights[m] for m in outputs)
+        weights = {m: self.weights[m] / total for m in outputs}
+        length = max(len(out['pmf']) for out in outputs.values())
+        pmf = np.zeros(length)
+        for model, out in outputs.items():
+            pmf[:len(out['pmf'])] += weights[model] * out['pmf']
+
+        return {
+            'pmf': pmf,
+            'mean': sum(weights[m] * out['mean'] for m, out in outputs.items()),
+            'weights': weights,
+            'dropped': dropped,
+            'seconds': {m: out['seconds'] for m, out in outputs.items()},
+        }
+
+    def close(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='多模型集成')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    fit_parser = subparsers.add_parser('fit', help='回测各模型并学习权重')
+    fit_parser.add_argument('--workers', type=int, default=None, help='回测进程数')
+    run_parser = subparsers.add_parser('run', help='运行一次集成')
+    run_parser.add_argument('count', type=int, help='当前推文数')
+    args = parser.parse_args()
+
+    config = load_tuned_config(CONFIG)
+
+    if args.command == 'fit':
+        models = config['ensemble_models']
+        print("=" * 70)
+        print(f"  🧮 集成权重学习 ({len(models)} 个模型)")
+        print("=" * 70)
+        fitted = fit_weights(config, models, args.workers)
+        for model in models:
+            print(f"  {MODEL_LABELS.get(model, model):32s} 权重 {fitted['weights'][model]:.3f}"
+                  f"  对数损失 {fitted['log_loss'][model]:.3f}")
+        print(f"\n  集成对数损失: {fitted['ensemble_log_loss']:.3f} ({fitted['n_checkpoints']} 个检查点)")
+        path = os.path.join(config['data_dir'], config['ensemble_weights_file'])
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(fitted, f, indent=2, ensure_ascii=False)
+        print(f"  ✅ 权重已保存: {path}")
+        print("=" * 70)
+        return
+
+    predictor = EnhancedTweetPredictor(dict(config, model_type='ensemble'))
+    window = predictor.parse_time_window()
+    elapsed = (time.time() - window['start_ts']) / 3600
+    remaining = max((window['end_ts'] - time.time()) / 3600, 0.0)
+    try:
+        prediction = predictor.predict(args.count, elapsed, remaining)
+        predictor.map_to_buckets(prediction)
+    finally:
+        predictor.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+推文间隔分位数草图 - 按一天中的小时维护可合并的 t-digest
+================================================
+每个间隔（小时）按其开始时刻的 UTC 小时计入 24 个 t-digest 之一。
+t-digest 把数据压缩为有序的质心 (均值, 权重)，质心大小受 k1 尺度函数
+k(q) = δ/(2π)·asin(2q-1) 约束：两端的质心很小，尾部分位数（长间隔）精确，
+中间的质心较大。质心数与推文数量无关（约 δ 个），整个草图保存为几 KB 的
+data/gap_sketch.json，新推文逐条加入，存档更新时只处理新增的推文。
+
+两个草图（不同分片、不同时间段）可直接合并：同一小时的质心合在一起重新压缩。
+
+查询：
+  - 间隔分位数：当前小时的 50% / 90% / 99% 分位
+  - 未来 H 小时无推文的概率：已空白 s 小时时
+        P(无推文) = S(s + H) / S(s)，S 为该间隔开始小时的间隔生存函数
+    该小时的样本不足时使用 24 个小时合并后的草图
+
+使用方法：
+    python gap_sketch.py          # 从存档更新并显示各小时的间隔分位数
+"""
+
+import json
+import math
+import os
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from post_archive import load_post_timestamps
+
+# 每个小时的样本少于该数时使用合并草图
+MIN_HOUR_SAMPLES = 50
+
+# 显示与看板使用的分位数、无推文概率的时长（小时）
+GAP_QUANTILES = (0.5, 0.9, 0.99)
+NO_POST_HORIZONS = (1, 3, 6)
+
+
+class TDigest:
+    """合并式 t-digest（k1 尺度函数）"""
+
+    def __init__(self, compression: float = 50.0):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.min = math.inf
+        self.max = -math.inf
+        self._buffer: List[float] = []
+
+    @property
+    def count(self) -> float:
+        return float(self.weights.sum()) + len(self._buffer)
+
+    # ========================================================
+    # 更新
+    # ========================================================
+
+    def add(self, value: float):
+        self._buffer.append(value)
+        if len(self._buffer) >= 5 * self.compression:
+            self.compress()
+
+    def add_many(self, values: np.ndarray):
+        values = np.asarray(values, dtype=np.float64)
+        if values.size:
+            self._absorb(values, np.ones(values.size))
+
+    def merge(self, other: 'TDigest'):
+        other.compress()
+        if other.weights.size:
+            self._absorb(other.means, other.weights, other.min, other.max)
+
+    def _absorb(self, means: np.ndarray, weights: np.ndarray,
+                low: Optional[float] = None, high: Optional[float] = None):
+        self.compress()
+        self.min = min(self.min, means.min() if low is None else low)
+        self.max = max(self.max, means.max() if high is None else high)
+        self.means = np.concatenate([self.means, means])
+        self.weights = np.concatenate([self.weights, weights])
+        self._merge_centroids()
+
+    def compress(self):
+        """把缓冲区中的新值合入质心"""
+        if not self._buffer:
+            return
+        values = np.array(self._buffer)
+        self._buffer = []
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self.means = np.concatenate([self.means, values])
+        self.weights = np.concatenate([self.weights, np.ones(values.size)])
+        self._merge_centroids()
+
+    def _merge_centroids(self):
+        order = np.argsort(self.means, kind='stable')
+        means, weights = self.means[order], self.weights[order]
+        total = weights.sum()
+
+        # 每个质心覆盖的 k 值跨度不超过 1：由当前质心左端的 q 求出右端的 q 上限
+        def q_limit(q: float) -> float:
+            k = self.compression / (2 * math.pi) * math.asin(2 * q - 1) + 1
+            return (math.sin(min(k * 2 * math.pi / self.compression, math.pi / 2)) + 1) / 2
+
+        merged_means, merged_weights = [], []
+        cumulative = 0.0
+        limit = q_limit(0.0) * total
+        mean, weight = float(means[0]), float(weights[0])
+        for m, w in zip(means[1:].tolist(), weights[1:].tolist()):
+            if cumulative + weight + w <= limit:
+                weight += w
+                mean += (m - mean) * w / weight
+            else:
+                merged_means.append(mean)
+                merged_weights.append(weight)
+                cumulative += weight
+                limit = q_limit(cumulative / total) * total
+                mean, weight = m, w
+        merged_means.append(mean)
+        merged_weights.append(weight)
+        self.means = np.array(merged_means)
+        self.weights = np.array(merged_weights)
+
+    # ========================================================
+    # 查询
+    # ========================================================
+
+    def _knots(self) -> tuple:
+        # 质心中心位于其累计权重的中点，两端补上最小值与最大值
+        self.compress()
+        centers = np.cumsum(self.weights) - self.weights / 2
+        positions = np.concatenate([[0.0], centers, [self.weights.sum()]])
+        values = np.concatenate([[self.min], self.means, [self.max]])
+        return positions, values
+
+    def quantile(self, q: float) -> Optional[float]:
+        if self.count == 0:
+            return None
+        positions, values = self._knots()
+        return float(np.interp(q * positions[-1], positions, values))
+
+    def cdf(self, value: float) -> Optional[float]:
+        """P(X <= value)"""
+        if self.count == 0:
+            return None
+        positions, values = self._knots()
+        if value < values[0]:
+            return 0.0
+        if value >= values[-1]:
+            return 1.0
+        # 相同均值的质心之间取右端，使 cdf 右连续
+        i = int(np.searchsorted(values, value, side='right'))
+        frac = (value - values[i - 1]) / (values[i] - values[i - 1])
+        return float((positions[i - 1] + frac * (positions[i] - positions[i - 1])) / positions[-1])
+
+    # ========================================================
+    # 持久化
+    # ========================================================
+
+    def to_dict(self) -> dict:
+        self.compress()
+        return {
+            'means': np.round(self.means, 4).tolist(),
+            'weights': self.weights.astype(np.int64).tolist(),
+            'min': float(self.min) if self.weights.size else None,
+            'max': float(self.max) if self.weights.size else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, compression: float) -> 'TDigest':
+        digest = cls(compression)
+        digest.means = np.array(data['means'], dtype=np.float64)
+        digest.weights = np.array(data['weights'], dtype=np.float64)
+        if digest.weights.size:
+            digest.min, digest.max = data['min'], data['max']
+        return digest
+
+
+class GapSketches:
+    """按间隔开始的 UTC 小时分组的推文间隔草图（时间单位：小时）"""
+
+    def __init__(self, compression: float = 50.0):
+        self.compression = compression
+        self.digests = [TDigest(compression) for _ in range(24)]
+        self.last_ts = None
+        self._pooled = None
+
+    # ========================================================
+    # 增量更新
+    # ========================================================
+
+    def add_post(self, ts: float):
+        """加入一条推文（O(1) 摊还）；不晚于上一条的推文忽略"""
+        if self.last_ts is not None:
+            if ts <= self.last_ts:
+                return
+            self.digests[int(self.last_ts // 3600) % 24].add((ts - self.last_ts) / 3600)
+            self._pooled = None
+        self.last_ts = ts
+
+    def add_posts(self, timestamps: np.ndarray):
+        """批量加入（按小时分组后一次合入，用于处理存档）"""
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        if self.last_ts is not None:
+            timestamps = timestamps[timestamps > self.last_ts]
+            timestamps = np.concatenate([[self.last_ts], timestamps])
+        if timestamps.size == 0:
+            return
+        starts = timestamps[:-1]
+        gaps = np.diff(timestamps) / 3600
+        keep = gaps > 0
+        starts, gaps = starts[keep], gaps[keep]
+        hours = (starts // 3600).astype(np.int64) % 24
+        for hour in np.unique(hours).tolist():
+            self.digests[hour].add_many(gaps[hours == hour])
+        self.last_ts = float(timestamps[-1])
+        self._pooled = None
+
+    def merge(self, other: 'GapSketches'):
+        """合并另一个草图（各小时分别合并）"""
+        for digest, other_digest in zip(self.digests, other.digests):
+            digest.merge(other_digest)
+        if other.last_ts is not None:
+            self.last_ts = max(self.last_ts or other.last_ts, other.last_ts)
+        self._pooled = None
+
+    # ========================================================
+    # 查询
+    # ========================================================
+
+    @property
+    def n_gaps(self) -> int:
+        return int(sum(digest.count for digest in self.digests))
+
+    def pooled(self) -> TDigest:
+        """24 个小时合并后的草图"""
+        if self._pooled is None:
+            self._pooled = TDigest(self.compression)
+            for digest in self.digests:
+                self._pooled.merge(digest)
+        return self._pooled
+
+    def digest_at(self, ts: float) -> TDigest:
+        """ts 所在小时开始的间隔的草图，样本不足时使用合并草图"""
+        digest = self.digests[int(ts // 3600) % 24]
+        return digest if digest.count >= MIN_HOUR_SAMPLES else self.pooled()
+
+    def quantiles(self, ts: float, qs=GAP_QUANTILES) -> Dict[float, Optional[float]]:
+        digest = self.digest_at(ts)
+        return {q: digest.quantile(q) for q in qs}
+
+    def prob_no_post(self, now_ts: float, last_post_ts: float, horizon_hours: float) -> Optional[float]:
+        """已空白 now - last_post 时，未来 horizon_hours 小时内没有推文的概率
+
+        当前空白已超过该小时的历史最长间隔时改用合并草图，仍超过时返回 None。
+        """
+        silent = max((now_ts - last_post_ts) / 3600, 0.0)
+        for digest in (self.digest_at(last_post_ts), self.pooled()):
+            if digest.count == 0:
+                continue
+            survival = 1 - digest.cdf(silent)
+            if survival > 0:
+                return float((1 - digest.cdf(silent + horizon_hours)) / survival)
+        return None
+
+    def outlook(self, now_ts: float, last_post_ts: Optional[float]) -> dict:
+        """看板与预测器使用的间隔摘要；最后一条推文时间未知时只给出分位数"""
+        outlook = {
+            'silent_hours': None,
+            'quantiles': {f'p{round(q * 100)}': value for q, value in self.quantiles(now_ts).items()},
+            'no_post': {},
+        }
+        if last_post_ts is not None:
+            outlook['silent_hours'] = float(max((now_ts - last_post_ts) / 3600, 0.0))
+            outlook['no_post'] = {
+                f'{h}h': self.prob_no_post(now_ts, last_post_ts, h) for h in NO_POST_HORIZONS
+            }
+        return outlook
+
+    # ========================================================
+    # 持久化
+    # ========================================================
+
+    def to_dict(self) -> dict:
+        return {
+            'compression': self.compression,
+            'last_ts': self.last_ts,
+            'hours': [digest.to_dict() for digest in self.digests],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'GapSketches':
+        sketches = cls(data['compression'])
+        sketches.digests = [TDigest.from_dict(item, data['compression']) for item in data['hours']]
+        sketches.last_ts = data['last_ts']
+        return sketches
+
+
+def load_gap_sketch(archive_path: str, cache_path: str, compression: float = 50.0) -> GapSketches:
+    """读取保存的草图，并用存档中更新的推文增量更新（压缩参数变化时从头计算）"""
+    sketches = GapSketches(compression)
+    archive_mtime = os.path.getmtime(archive_path) if os.path.exists(archive_path) else None
+    if os.path.exists(cache_path):
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        if cached['compression'] == compression:
+            sketches = GapSketches.from_dict(cached)
+            if cached.get('archive_mtime') == archive_mtime:
+                return sketches
+
+    sketches.add_posts(load_post_timestamps(archive_path))
+    save_gap_sketch(cache_path, sketches, archive_mtime)
+    return sketches
+
+
+def save_gap_sketch(cache_path: str, sketches: GapSketches, archive_mtime: Optional[float] = None):
+    data = sketches.to_dict()
+    data['archive_mtime'] = archive_mtime
+    with open(cache_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, separators=(',', ':'))
+
+
+def main():
+    """从存档更新并显示各小时的间隔分位数"""
+    cache_path = 'data/gap_sketch.json'
+    start = time.perf_counter()
+    sketches = load_gap_sketch('data/raw_historical.json', cache_path)
+    elapsed = time.perf_counter() - start
+    if sketches.n_gaps == 0:
+        print("❌ 存档中没有足够的数据")
+        return
+
+    size = os.path.getsize(cache_path) / 1024
+    print("=" * 70)
+    print(f"  ⏱ 推文间隔草图 ({sketches.n_gaps} 个间隔, {size:.1f} KB, 更新耗时 {elapsed * 1000:.1f} ms)")
+    print("=" * 70)
+    labels = '  '.join(f"{f'p{round(q * 100)}':>7s}" for q in GAP_QUANTILES)
+    print(f"  UTC 小时  {'间隔数':>6s}  {labels}  (分钟)")
+    for hour in range(24):
+        digest = sketches.digests[hour]
+        values = '  '.join(f"{digest.quantile(q) * 60:7.1f}" if digest.count else f"{'-':>7s}"
+                           for q in GAP_QUANTILES)
+        print(f"    {hour:02d}:00  {int(digest.count):6d}  {values}")
+
+    now = time.time()
+    outlook = sketches.outlook(now, sketches.last_ts)
+    last = datetime.fromtimestamp(sketches.last_ts, timezone.utc).strftime('%m-%d %H:%M')
+    print(f"\n  最后一条推文: {last} UTC（已空白 {outlook['silent_hours']:.1f} 小时）")
+    for horizon, prob in outlook['no_post'].items():
+        shown = f"{prob * 100:5.1f}%" if prob is not None else "超出历史最长间隔"
+        print(f"    未来 {horizon:>3s} 无推文: {shown}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
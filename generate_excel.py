@@ -3,12 +3,23 @@
 生成Excel表格 - Elon Musk推文数据
 """
 
+import hashlib
 import json
+import os
 import requests
-import pandas as pd
 from datetime import datetime, timedelta
-from openpyxl.styles import PatternFill, Font, Alignment, Border, Side
-from openpyxl.utils.dataframe import dataframe_to_rows
+
+EXCEL_FILE = 'data/elon_musk_tweets.xlsx'
+
+# 生成表格时的每日数据摘要，数据未变时跳过生成
+SIGNATURE_FILE = 'data/excel_signature.txt'
+
+
+def data_signature(historical_data):
+    """每日 (日期, 推文数) 的摘要"""
+    rows = sorted((r['date'], r['count']) for r in historical_data)
+    return hashlib.sha1(json.dumps(rows).encode()).hexdigest()
+
 
 def fetch_today_data():
     """获取今天的最新数据"""
@@ -83,6 +94,18 @@ def create_excel():
     else:
         print(f"  ℹ️  无法获取今天的实时数据")
 
+    # 每日数据与上次生成时相同则不重新生成（导入 pandas / openpyxl 即需数秒）
+    signature = data_signature(historical_data)
+    if os.path.exists(EXCEL_FILE) and os.path.exists(SIGNATURE_FILE):
+        with open(SIGNATURE_FILE, 'r') as f:
+            if f.read().strip() == signature:
+                print(f"\n⏸ 数据无变化，跳过生成: {EXCEL_FILE}")
+                return EXCEL_FILE
+
+    import pandas as pd
+    from openpyxl import load_workbook
+    from openpyxl.styles import PatternFill, Font, Alignment
+
     # 4. 创建DataFrame
     df = pd.DataFrame(historical_data)
     df = df[['date', 'count']]  # 只保留日期和数量
@@ -102,7 +125,7 @@ def create_excel():
     df['vs_avg'] = (df['count'] - overall_avg).round(1)
 
     # 6. 生成Excel文件
-    excel_file = 'data/elon_musk_tweets.xlsx'
+    excel_file = EXCEL_FILE
 
     print(f"\n📝 生成Excel文件: {excel_file}")
 
@@ -149,8 +172,6 @@ def create_excel():
 
     # 7. 美化Excel
     print("🎨 美化表格...")
-    from openpyxl import load_workbook
-
     wb = load_workbook(excel_file)
 
     # 美化每日数据sheet
@@ -192,6 +213,8 @@ def create_excel():
 
     # 保存
     wb.save(excel_file)
+    with open(SIGNATURE_FILE, 'w') as f:
+        f.write(signature)
 
     print(f"✅ Excel文件已生成: {excel_file}")
 
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+周内小时发帖强度画像 (168 个时段)
+================================================
+从本地推文存档学习每个 UTC 周内小时（周一 00:00 = 0）的发帖速率，
+使用指数遗忘增量更新，并缓存到磁盘。
+
+剩余窗口期望推文数 = 画像速率 · 剩余时段小时掩码
+
+使用方法：
+    python hour_profile.py          # 从存档增量更新并显示画像
+"""
+
+import json
+import math
+import os
+from typing import Optional
+
+import numpy as np
+
+from post_archive import load_post_timestamps
+from window_calendar import EPOCH_HOUR_OFFSET, HOURS_PER_WEEK, hour_of_week
+
+# 权重指数超过该值时重新归一化，防止溢出
+RESCALE_EXPONENT = 50.0
+
+
+class HourOfWeekProfile:
+    """周内小时发帖强度画像（指数遗忘）
+
+    计数按 exp((t - anchor) / tau) 加权累加，读取时再统一衰减到当前时刻，
+    因此每条新推文只需一次标量加法。
+    """
+
+    def __init__(self, half_life_days: float = 14.0, prior_hours: float = 1.0):
+        self.half_life_days = half_life_days
+        self.prior_hours = prior_hours
+        self.tau = half_life_days * 86400 / math.log(2)
+        self.counts = np.zeros(HOURS_PER_WEEK)
+        self.anchor_ts = None
+        self.first_ts = None
+        self.last_ts = None
+        self.n_posts = 0
+
+    # ========================================================
+    # 增量更新
+    # ========================================================
+
+    def _rescale(self, ts: float):
+        """把锚点移动到 ts，重新归一化已有权重"""
+        if self.anchor_ts is not None:
+            self.counts *= math.exp((self.anchor_ts - ts) / self.tau)
+        self.anchor_ts = ts
+
+    def add_post(self, ts: float):
+        """加入一条推文（O(1)）"""
+        if self.anchor_ts is None or (ts - self.anchor_ts) / self.tau > RESCALE_EXPONENT:
+            self._rescale(ts)
+        self.counts[hour_of_week(ts)] += math.exp((ts - self.anchor_ts) / self.tau)
+
+        if self.first_ts is None or ts < self.first_ts:
+            self.first_ts = ts
+        if self.last_ts is None or ts > self.last_ts:
+            self.last_ts = ts
+        self.n_posts += 1
+
+    def add_posts(self, timestamps: np.ndarray):
+        """批量加入推文（向量化）"""
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        if timestamps.size == 0:
+            return
+
+        newest = float(timestamps.max())
+        if self.anchor_ts is None or (newest - self.anchor_ts) / self.tau > RESCALE_EXPONENT:
+            self._rescale(newest)
+
+        slots = (np.floor_divide(timestamps, 3600).astype(np.int64) + EPOCH_HOUR_OFFSET) % HOURS_PER_WEEK
+        weights = np.exp((timestamps - self.anchor_ts) / self.tau)
+        self.counts += np.bincount(slots, weights=weights, minlength=HOURS_PER_WEEK)
+
+        oldest = float(timestamps.min())
+        self.first_ts = oldest if self.first_ts is None else min(self.first_ts, oldest)
+        self.last_ts = newest if self.last_ts is None else max(self.last_ts, newest)
+        self.n_posts += int(timestamps.size)
+
+    @classmethod
+    def from_timestamps(cls, timestamps: np.ndarray, until: Optional[float] = None,
+                        **kwargs) -> 'HourOfWeekProfile':
+        """从时间戳数组一次性构建画像（可截止到 until，供回测使用）"""
+        profile = cls(**kwargs)
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        if until is not None:
+            timestamps = timestamps[timestamps < until]
+        profile.add_posts(timestamps)
+        return profile
+
+    # ========================================================
+    # 查询
+    # ========================================================
+
+    @property
+    def is_empty(self) -> bool:
+        return self.n_posts == 0
+
+    def exposure(self, now: float) -> np.ndarray:
+        """每个时段自 first_ts 以来的衰减后观测小时数（闭式几何级数）"""
+        if self.first_ts is None or now <= self.first_ts:
+            return np.zeros(HOURS_PER_WEEK)
+
+        slots = np.arange(HOURS_PER_WEEK)
+        now_h = now / 3600
+        first_h = math.floor(self.first_ts / 3600)
+        phase = slots - EPOCH_HOUR_OFFSET
+
+        # 每个时段最近一次完整出现的小时起点
+        latest = np.floor((now_h - 1 - phase) / HOURS_PER_WEEK) * HOURS_PER_WEEK + phase
+        n = np.maximum(np.floor((latest - first_h) / HOURS_PER_WEEK) + 1, 0)
+
+        week_decay = math.exp(-HOURS_PER_WEEK * 3600 / self.tau)
+        latest_decay = np.exp(-(now_h - latest - 0.5) * 3600 / self.tau)
+        return latest_decay * (1 - week_decay ** n) / (1 - week_decay)
+
+    def decayed_counts(self, now: float) -> np.ndarray:
+        """衰减到 now 的各时段计数"""
+        if self.anchor_ts is None:
+            return np.zeros(HOURS_PER_WEEK)
+        return self.counts * math.exp((self.anchor_ts - now) / self.tau)
+
+    def rates(self, now: Optional[float] = None) -> np.ndarray:
+        """各时段发帖速率（条/小时），向全局均值做少量平滑"""
+        if self.is_empty:
+            return np.zeros(HOURS_PER_WEEK)
+        now = self.last_ts if now is None else max(now, self.last_ts)
+
+        counts = self.decayed_counts(now)
+        exposure = self.exposure(now)
+        total_exposure = exposure.sum()
+        mean_rate = counts.sum() / total_exposure if total_exposure > 0 else 0.0
+        return (counts + self.prior_hours * mean_rate) / (exposure + self.prior_hours)
+
+    def mean_rate(self, now: Optional[float] = None) -> float:
+        """周平均速率（条/小时）"""
+        return float(self.rates(now).mean())
+
+    def expected_count(self, mask: np.ndarray, now: Optional[float] = None) -> float:
+        """按时段掩码计算期望推文数"""
+        return float(self.rates(now) @ mask)
+
+    # ========================================================
+    # 持久化
+    # ========================================================
+
+    def to_dict(self) -> dict:
+        return {
+            'half_life_days': self.half_life_days,
+            'prior_hours': self.prior_hours,
+            'counts': self.counts.tolist(),
+            'anchor_ts': self.anchor_ts,
+            'first_ts': self.first_ts,
+            'last_ts': self.last_ts,
+            'n_posts': self.n_posts,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'HourOfWeekProfile':
+        profile = cls(data['half_life_days'], data.get('prior_hours', 1.0))
+        profile.counts = np.asarray(data['counts'], dtype=np.float64)
+        profile.anchor_ts = data['anchor_ts']
+        profile.first_ts = data['first_ts']
+        profile.last_ts = data['last_ts']
+        profile.n_posts = data['n_posts']
+        return profile
+
+
+def load_hour_profile(archive_path: str, cache_path: str, half_life_days: float = 14.0) -> HourOfWeekProfile:
+    """加载缓存的画像，并用存档中新增的推文增量更新"""
+    profile = None
+    archive_mtime = os.path.getmtime(archive_path) if os.path.exists(archive_path) else None
+
+    if os.path.exists(cache_path):
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        if cached.get('half_life_days') == half_life_days:
+            profile = HourOfWeekProfile.from_dict(cached)
+            # 存档未变化时无需重新解析
+            if cached.get('archive_mtime') == archive_mtime:
+                return profile
+
+    if profile is None:
+        profile = HourOfWeekProfile(half_life_days)
+
+    timestamps = load_post_timestamps(archive_path)
+    if profile.last_ts is not None:
+        timestamps = timestamps[timestamps > profile.last_ts]
+    profile.add_posts(timestamps)
+
+    data = profile.to_dict()
+    data['archive_mtime'] = archive_mtime
+    with open(cache_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+
+    return profile
+
+
+def main():
+    """从存档更新画像并显示"""
+    profile = load_hour_profile('data/raw_historical.json', 'data/hour_profile.json')
+    if profile.is_empty:
+        print("❌ 存档中没有推文数据")
+        return
+
+    rates = profile.rates().reshape(7, 24)
+    days = ['周一', '周二', '周三', '周四', '周五', '周六', '周日']
+
+    print("=" * 70)
+    print(f"  📊 周内小时发帖强度 (UTC, 共 {profile.n_posts} 条, 半衰期 {profile.half_life_days:g} 天)")
+    print("=" * 70)
+    for day, row in zip(days, rates):
+        print(f"  {day}: 日均 {row.sum():5.1f} 条 | 峰值 {row.max():4.1f} 条/小时 @ {int(row.argmax()):02d}:00")
+    print(f"\n  周平均: {profile.mean_rate() * HOURS_PER_WEEK:.0f} 条/周")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
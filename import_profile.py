@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+导入耗时报告 - 检查各命令入口在启动时加载了哪些重量级模块
+================================================
+对每个入口模块在新的解释器中运行 python -X importtime，汇总：
+  - 导入总耗时
+  - 启动时已加载的重量级依赖（scipy / pandas / openpyxl / requests / bs4 ...）及其耗时
+  - 耗时最多的本仓库模块
+
+重量级依赖应在真正用到的函数内部导入（抓取时才导入 requests / bs4，
+拟合或非闭式模型才导入 scipy），手动输入计数的预测路径只需要 numpy 与 pytz。
+
+使用方法：
+    python import_profile.py                          # 报告所有命令入口
+    python import_profile.py elon_predictor_enhanced  # 只报告指定模块
+    python import_profile.py --budget 500             # 超过 500 毫秒的入口以非零状态退出
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List
+
+# 命令入口（python <模块>.py 直接运行的脚本）
+ENTRY_POINTS = (
+    'elon_predictor_enhanced',
+    'quick_predict',
+    'probability_surface',
+    'post_stream',
+    'update_dashboard',
+    'generate_excel',
+    'telegram_notify',
+    'calibration',
+    'backtest',
+    'ensemble',
+)
+
+# 启动时不应无条件加载的依赖
+HEAVY_PACKAGES = ('scipy', 'pandas', 'openpyxl', 'requests', 'bs4', 'playwright', 'matplotlib')
+
+
+def profile_imports(module: str) -> Dict[str, float]:
+    """在新的解释器中导入 module，返回 {模块名: 累计耗时（毫秒）}"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, _, cumulative, name = (part.strip() for part in line.replace('import time:', '|', 1).split('|'))
+        if cumulative.isdigit():
+            # 同一模块只记录第一次（真正执行导入的那次）
+            timings.setdefault(name, int(cumulative) / 1000)
+    return timings
+
+
+def summarize(module: str, timings: Dict[str, float]) -> dict:
+    local = {
+        os.path.splitext(name)[0] for name in os.listdir(os.path.dirname(os.path.abspath(__file__)))
+        if name.endswith('.py')
+    }
+    return {
+        'module': module,
+        'total_ms': timings.get(module, 0.0),
+        'heavy': {pkg: timings[pkg] for pkg in HEAVY_PACKAGES if pkg in timings},
+        'local': sorted(((name, ms) for name, ms in timings.items() if name in local and name != module),
+                        key=lambda item: -item[1])[:5],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='命令入口导入耗时报告')
+    parser.add_argument('modules', nargs='*', default=list(ENTRY_POINTS), help='要检查的模块（默认所有命令入口）')
+    parser.add_argument('--budget', type=float, default=None, help='导入耗时上限（毫秒），超过时以状态 1 退出')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print(f"  ⏱ 导入耗时报告 ({sys.executable})")
+    print("=" * 70)
+    reports: List[dict] = []
+    for module in args.modules:
+        try:
+            report = summarize(module, profile_imports(module))
+        except RuntimeError as e:
+            print(f"\n  {module}: ❌ 导入失败 ({e})")
+            continue
+        reports.append(report)
+        flag = ' ⚠' if args.budget is not None and report['total_ms'] > args.budget else ''
+        print(f"\n  {module}: {report['total_ms']:.0f} ms{flag}")
+        if report['heavy']:
+            heavy = ', '.join(f"{pkg} {ms:.0f} ms" for pkg, ms in report['heavy'].items())
+            print(f"    重量级依赖: {heavy}")
+        if report['local']:
+            local = ', '.join(f"{name} {ms:.0f} ms" for name, ms in report['local'])
+            print(f"    本仓库模块: {local}")
+    print("=" * 70)
+
+    if args.budget is not None and any(r['total_ms'] > args.budget for r in reports):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+蒙特卡洛模拟 - 剩余窗口推文总数分布
+================================================
+每条路径先抽取一个 Gamma 速率乘子（整个窗口的速率不确定性，形状 gamma_shape），
+剩余窗口的各小时另有独立的 Gamma 强度乘子（小时级爆发，形状 hour_shape），
+推文数为 Poisson(路径乘子 × Σ 小时强度 × 小时乘子)。
+
+小时乘子使方差多出 Σ λ_h² / hour_shape 一项，其大小取决于剩余时段的强度分布
+（高峰集中时尾部更厚），总数不再服从负二项分布，没有闭式解。
+hour_shape <= 0 时不抽小时乘子，结果与负二项闭式解同分布。
+
+各小时乘子之和不逐小时抽取，而按矩匹配为一个 Gamma 分布一次抽取
+（均值 Σ λ_h，方差 Σ λ_h² / hour_shape），每条路径只需常数个随机数，
+耗时与剩余小时数无关。
+结果以直方图累加，内存占用与路径数无关；按块使用独立的子随机种子，
+单进程和多进程结果一致。
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Sequence
+
+import numpy as np
+
+from bucket_ladder import BucketLadder
+
+
+def _simulate_chunk(seed_seq: np.random.SeedSequence, n_paths: int, hourly_intensity: np.ndarray,
+                    gamma_shape: float, hour_shape: float) -> np.ndarray:
+    """模拟一块路径，返回剩余推文数直方图"""
+    rng = np.random.default_rng(seed_seq)
+    total = float(np.sum(hourly_intensity))
+    variance = float(np.sum(hourly_intensity ** 2)) / hour_shape if hour_shape > 0 else 0.0
+    if variance > 0:
+        # 小时强度之和按矩匹配的 Gamma(均值 total, 方差 variance)
+        intensity = rng.gamma(total ** 2 / variance, variance / total, size=n_paths)
+    else:
+        intensity = np.full(n_paths, total)
+    if gamma_shape > 0:
+        intensity *= rng.gamma(gamma_shape, 1.0 / gamma_shape, size=n_paths)
+    return np.bincount(rng.poisson(intensity))
+
+
+def simulate_remaining_counts(hourly_intensity: Sequence[float], gamma_shape: float = 10.0,
+                              hour_shape: float = 0.0, n_paths: int = 1_000_000, seed: Optional[int] = None,
+                              chunk_size: int = 250_000, workers: int = 1) -> np.ndarray:
+    """模拟剩余窗口推文数，返回直方图（下标为剩余推文数，值为路径数）
+
+    hourly_intensity: 剩余窗口内每小时的期望推文数
+    gamma_shape: 路径速率乘子形状参数，越大速率不确定性越小，<= 0 表示不抽取
+    hour_shape: 小时乘子形状参数（小时级离散为 1 / hour_shape），<= 0 表示不抽取
+    """
+    hourly_intensity = np.atleast_1d(np.asarray(hourly_intensity, dtype=np.float64))
+    n_chunks = max(1, -(-n_paths // chunk_size))
+    sizes = [chunk_size] * (n_chunks - 1) + [n_paths - chunk_size * (n_chunks - 1)]
+    seeds = np.random.SeedSequence(seed).spawn(n_chunks)
+    args = (seeds, sizes, [hourly_intensity] * n_chunks, [gamma_shape] * n_chunks, [hour_shape] * n_chunks)
+
+    if workers > 1 and n_chunks > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            histograms = list(pool.map(_simulate_chunk, *args))
+    else:
+        histograms = list(map(_simulate_chunk, *args))
+
+    result = np.zeros(max(len(h) for h in histograms), dtype=np.int64)
+    for h in histograms:
+        result[:len(h)] += h
+    return result
+
+
+def summarize_simulation(histogram: np.ndarray, current_count: int, ladder: BucketLadder,
+                         quantiles: Sequence[float] = (0.05, 0.1, 0.25, 0.5, 0.75, 0.9, 0.95)) -> dict:
+    """由模拟直方图计算区间概率、分位数与尾部风险（均为最终总数）"""
+    n_paths = histogram.sum()
+    pmf = histogram / n_paths
+    cdf = np.cumsum(pmf)
+    support = np.arange(len(pmf))
+    probs = ladder.probabilities(pmf, current_count)
+
+    q_values = np.searchsorted(cdf, quantiles) + current_count
+
+    # 尾部均值：最高/最低 5% 路径的平均最终总数
+    upper_start = int(np.searchsorted(cdf, 0.95))
+    lower_end = int(np.searchsorted(cdf, 0.05))
+    upper_mass = pmf[upper_start:].sum()
+    lower_mass = pmf[:lower_end + 1].sum()
+
+    mean = float(support @ pmf)
+    return {
+        'n_paths': int(n_paths),
+        'mean': current_count + mean,
+        'std': float(np.sqrt(((support - mean) ** 2) @ pmf)),
+        'buckets': {name: float(p) for name, p in zip(ladder.names, probs)},
+        'quantiles': {f'p{int(q * 100)}': int(v) for q, v in zip(quantiles, q_values)},
+        'tail_risk': {
+            'upper_5pct_mean': current_count + float(support[upper_start:] @ pmf[upper_start:] / upper_mass),
+            'lower_5pct_mean': current_count + float(support[:lower_end + 1] @ pmf[:lower_end + 1] / lower_mass),
+            'p_top_bucket': float(probs[-1]),
+            'p_bottom_bucket': float(probs[0]),
+        },
+        'pmf': pmf,
+    }
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+本地推文存档读取 - 将 raw_historical.json 转换为时间戳数组
+"""
+
+import json
+import os
+
+import numpy as np
+
+# 按路径缓存 (修改时间, 时间戳)，避免重复解析同一份存档
+_TIMESTAMP_CACHE = {}
+
+
+def load_posts(path: str) -> list:
+    """读取存档中的推文列表"""
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        raw = json.load(f)
+    if isinstance(raw, dict):
+        return raw.get('data') or []
+    return raw
+
+
+def parse_timestamps(created_at: list) -> np.ndarray:
+    """将 ISO 时间字符串（UTC, 以 Z 结尾）批量转换为 epoch 秒"""
+    if not created_at:
+        return np.empty(0, dtype=np.float64)
+    values = np.array([s.rstrip('Z') for s in created_at], dtype='datetime64[ms]')
+    return values.astype(np.int64) / 1000.0
+
+
+def load_post_timestamps(path: str) -> np.ndarray:
+    """加载存档中所有推文的时间戳（epoch 秒，升序）"""
+    if not os.path.exists(path):
+        return np.empty(0, dtype=np.float64)
+
+    key = os.path.abspath(path)
+    mtime = os.path.getmtime(path)
+    cached = _TIMESTAMP_CACHE.get(key)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    posts = load_posts(path)
+    created_at = [p['createdAt'] for p in posts if p.get('createdAt')]
+    timestamps = np.sort(parse_timestamps(created_at))
+    timestamps.setflags(write=False)
+
+    _TIMESTAMP_CACHE[key] = (mtime, timestamps)
+    return timestamps
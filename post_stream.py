@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+事件驱动实时预测 - 新推文到达后防抖发布区间概率
+================================================
+PostFeed 按上次见到的最新推文时间增量拉取 XTracker 推文接口（按 id 去重），
+Nowcaster 对每条新推文：
+  - 计数 +1，周内小时画像、发帖状态检测器与间隔草图加入该推文（O(1)）
+  - 安排一次防抖发布：连续 debounce 秒没有新推文时发布，
+    爆发期间最迟 max_delay 秒发布一次
+
+逐条推文只更新计数与画像，不重算后验与区间概率：区间概率只在防抖发布时刷新，
+复用 EnhancedTweetPredictor.run_with_count()（写入历史只在有明显变化时发生），
+并可通过 on_publish 回调推送结果。窗口结束后最后拉取并发布一次，然后退出。发帖状态（爆发 / 正常 / 沉寂）切换时记录日志，
+开启 regime_alerts 时推送 Telegram。
+
+使用方法：
+    python post_stream.py
+"""
+
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import pytz
+import requests
+
+from elon_predictor_enhanced import CONFIG, EnhancedTweetPredictor, load_tuned_config
+from post_archive import parse_timestamps
+from regime_detector import REGIME_LABELS
+from telegram_notify import format_regime_alert, send_telegram_message
+
+# 增量请求的起点回退，防止接口延迟入库漏掉推文
+OVERLAP_SECONDS = 300
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, pytz.UTC).strftime('%Y-%m-%dT%H:%M:%S.000Z')
+
+
+class PostFeed:
+    """XTracker 推文增量拉取"""
+
+    def __init__(self, url: str, since_ts: float, timeout: float = 10):
+        self.url = url
+        self.since_ts = since_ts
+        self.timeout = timeout
+        self.seen: Dict[str, float] = {}  # 推文 id -> 时间戳（只保留重叠区间内的）
+
+    def poll(self) -> List[dict]:
+        """拉取上次之后的新推文（按时间升序），每条附加 'ts' 字段（epoch 秒）"""
+        headers = {
+            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
+            'Accept': 'application/json',
+        }
+        response = requests.get(
+            self.url,
+            params={
+                'startDate': _iso(self.since_ts - OVERLAP_SECONDS),
+                'endDate': _iso(time.time() + 60),
+            },
+            headers=headers,
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        raw = response.json()
+        posts = (raw.get('data') or []) if isinstance(raw, dict) else raw
+
+        posts = [p for p in posts if p.get('createdAt') and p.get('id') not in self.seen]
+        if not posts:
+            return []
+
+        timestamps = parse_timestamps([p['createdAt'] for p in posts])
+        for post, ts in zip(posts, timestamps):
+            post['ts'] = float(ts)
+            self.seen[post['id']] = float(ts)
+        posts.sort(key=lambda p: p['ts'])
+
+        self.since_ts = max(self.since_ts, posts[-1]['ts'])
+        cutoff = self.since_ts - OVERLAP_SECONDS
+        self.seen = {k: v for k, v in self.seen.items() if v >= cutoff}
+        return posts
+
+
+class Nowcaster:
+    """逐条推文更新的实时预测"""
+
+    def __init__(self, predictor: EnhancedTweetPredictor, feed: Optional[PostFeed] = None,
+                 on_publish: Optional[Callable[[dict], None]] = None):
+        self.predictor = predictor
+        config = predictor.config
+        self.window = predictor.parse_time_window()
+        self.feed = feed or PostFeed(config['posts_api_url'], self.window['start_ts'])
+        self.on_publish = on_publish
+        self.poll_seconds = config['stream_poll_seconds']
+        self.debounce_seconds = config['stream_debounce_seconds']
+        self.max_delay_seconds = config['stream_max_delay_seconds']
+
+        # 检测器由推文流逐条更新，查询时计入当前的空白时长（沉寂无需等下一条推文）
+        predictor.regime_live = True
+        self.regime = None
+
+        self.count = 0
+        self.first_pending = None    # 尚未发布的第一条推文到达时间（monotonic）
+        self.last_event = None       # 最近一条推文到达时间（monotonic）
+
+    # ========================================================
+    # 事件处理
+    # ========================================================
+
+    def on_posts(self, posts: List[dict], live: bool = True):
+        """处理一批新推文：逐条更新计数与画像，并安排防抖发布
+
+        live=False 用于启动时的全量拉取：只累计，不安排发布（随后立即发布一次）。
+        """
+        start_ts, end_ts = self.window['start_ts'], self.window['end_ts']
+        profile = self.predictor.load_hour_profile()
+        detector = self.predictor.load_regime_detector()
+        sketch = self.predictor.load_gap_sketch()
+        arrived = time.monotonic()
+        for post in posts:
+            # 检测器与草图自行忽略不晚于其最后一条的推文（已在存档中）
+            detector.add_post(post['ts'])
+            sketch.add_post(post['ts'])
+            if not start_ts <= post['ts'] < end_ts:
+                continue
+            self.count += 1
+            self.predictor.last_post_ts = max(self.predictor.last_post_ts or 0.0, post['ts'])
+            # 画像已包含存档中的推文，只加入更新的
+            if profile.last_ts is None or post['ts'] > profile.last_ts:
+                profile.add_post(post['ts'])
+            if live:
+                self.last_event = arrived
+                if self.first_pending is None:
+                    self.first_pending = arrived
+
+    def publish_due(self, now: float) -> bool:
+        """防抖：安静 debounce 秒，或距第一条未发布推文已过 max_delay 秒"""
+        if self.first_pending is None:
+            return False
+        return (now - self.last_event >= self.debounce_seconds
+                or now - self.first_pending >= self.max_delay_seconds)
+
+    def publish(self):
+        self.first_pending = None
+        result = self.predictor.run_with_count(self.count)
+        self.predictor.save_regime_detector()
+        self.predictor.save_gap_sketch()
+        if self.on_publish is not None:
+            self.on_publish(result)
+        return result
+
+    def check_regime(self):
+        """发帖状态切换时记录并（可选）推送"""
+        state = self.predictor.regime_state()
+        if state['regime'] == self.regime:
+            return
+        previous, self.regime = self.regime, state['regime']
+        self.predictor.log_message(f"📡 发帖状态: {REGIME_LABELS[previous]} → {state['label']}")
+        if self.predictor.config['regime_alerts']:
+            send_telegram_message(format_regime_alert(previous, state, self.count))
+
+    # ========================================================
+    # 主循环
+    # ========================================================
+
+    def run(self):
+        """初始全量拉取窗口内推文后，按 poll_seconds 增量拉取，窗口结束时返回最后一次发布的结果"""
+        # 初始拉取失败时每 poll_seconds 重试，成功前不发布
+        while True:
+            try:
+                self.on_posts(self.feed.poll(), live=False)
+                break
+            except requests.RequestException as e:
+                self.predictor.log_message(f"✗ 初始拉取失败，{self.poll_seconds} 秒后重试: {e}")
+                time.sleep(self.poll_seconds)
+        self.regime = self.predictor.regime_state()['regime']
+        result = self.publish()
+
+        next_poll = time.monotonic() + self.poll_seconds
+        while not result.get('market_closed'):
+            now = time.monotonic()
+            # 窗口结束后新推文不再计入，也就不会再触发发布：补拉一次后做最后一次发布
+            until_end = self.window['end_ts'] - time.time()
+            if until_end <= 0:
+                try:
+                    self.on_posts(self.feed.poll(), live=False)
+                except requests.RequestException as e:
+                    self.predictor.log_message(f"✗ 最后一次拉取失败: {e}")
+                return self.publish()
+
+            if now >= next_poll:
+                try:
+                    self.on_posts(self.feed.poll())
+                except requests.RequestException as e:
+                    self.predictor.log_message(f"✗ 增量拉取失败: {e}")
+                # 沉寂不需要新推文就能发生，每次拉取后都检查状态
+                self.check_regime()
+                next_poll = now + self.poll_seconds
+                continue
+
+            if self.publish_due(now):
+                result = self.publish()
+                continue
+
+            # 睡到下一次拉取、发布或窗口结束时刻
+            wake = min(next_poll, now + until_end)
+            if self.first_pending is not None:
+                wake = min(wake, self.last_event + self.debounce_seconds,
+                           self.first_pending + self.max_delay_seconds)
+            time.sleep(max(wake - now, 0.01))
+        return result
+
+
+def main():
+    predictor = EnhancedTweetPredictor(load_tuned_config(CONFIG))
+    nowcaster = Nowcaster(predictor)
+
+    print(f"\n{'='*70}")
+    print("⚡ Elon Musk Tweet 预测系统 - 实时模式（每条新推文更新）")
+    print(f"拉取间隔: {nowcaster.poll_seconds} 秒  发布防抖: {nowcaster.debounce_seconds} 秒")
+    print(f"按 Ctrl+C 停止")
+    print(f"{'='*70}")
+
+    try:
+        nowcaster.run()
+    except KeyboardInterrupt:
+        print(f"\n\n⏹ 用户停止，程序退出")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+常驻预测服务 - 预测器常驻内存，命令行通过 Unix socket 查询
+================================================
+服务进程启动时加载一次画像、离散参数表、存档时间戳、沉寂 / 状态 / 间隔模型与历史记录，
+之后每次查询只做后验更新与区间概率计算。命令行客户端只导入标准库，
+连接 socket 发送一行 JSON、读取一行 JSON，毫秒级返回，不需要导入 numpy / scipy。
+
+协议（每个连接一个请求）：
+    {"cmd": "predict", "count": 120}   → 预测结果与报告文本
+    {"cmd": "status"}                  → 进程、窗口、模型与查询统计
+    {"cmd": "reload"}                  → 立即重新加载配置
+    {"cmd": "stop"}                    → 停止服务
+
+热加载：每次请求前检查 elon_predictor_enhanced.py（CONFIG 中的市场窗口）、
+调优参数档案、区间阶梯与推文存档的修改时间，有变化时重新导入配置并重建预测器；
+也可以发送 reload 命令或 SIGHUP 信号。
+
+使用方法：
+    python predictor_daemon.py serve          # 启动服务（前台）
+    python predictor_daemon.py query 120      # 查询（服务未运行时以状态 2 退出）
+    python predictor_daemon.py status
+    python predictor_daemon.py reload
+    python predictor_daemon.py stop
+"""
+
+import argparse
+import json
+import os
+import socket
+import sys
+import time
+from typing import Optional
+
+SOCKET_PATH = 'data/predictor.sock'
+
+# 客户端等待响应的超时（秒）；首次查询或热加载后需要重建预测器
+CLIENT_TIMEOUT = 30
+
+
+# ============================================================
+# 客户端（只使用标准库）
+# ============================================================
+
+class DaemonUnavailable(Exception):
+    """服务未运行"""
+
+
+def request(message: dict, socket_path: str = SOCKET_PATH, timeout: float = CLIENT_TIMEOUT) -> dict:
+    """发送一个请求并返回响应；服务未运行时抛出 DaemonUnavailable"""
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.settimeout(timeout)
+    try:
+        client.connect(socket_path)
+    except (FileNotFoundError, ConnectionRefusedError) as e:
+        client.close()
+        raise DaemonUnavailable(str(e))
+
+    with client, client.makefile('rwb') as stream:
+        stream.write(json.dumps(message).encode() + b'\n')
+        stream.flush()
+        line = stream.readline()
+    if not line:
+        raise DaemonUnavailable("服务未返回响应")
+    return json.loads(line)
+
+
+# ============================================================
+# 服务端
+# ============================================================
+
+def _to_json(value):
+    # numpy 标量
+    return value.item() if hasattr(value, 'item') else str(value)
+
+
+class PredictorService:
+    """常驻的预测器，配置或存档变化时重建"""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.predictor = None
+        self.loaded_at = None
+        self.watched = {}
+        self.n_requests = 0
+        self.total_seconds = 0.0
+        self.reload_requested = False
+        self.stopping = False
+
+    def _watched_paths(self, config: dict) -> list:
+        import elon_predictor_enhanced
+
+        data_dir = config['data_dir']
+        return [
+            elon_predictor_enhanced.__file__,
+            os.path.join(data_dir, config['tuned_profile']),
+            os.path.join(data_dir, config['ladder_file']),
+            os.path.join(data_dir, config['archive_file']),
+        ]
+
+    @staticmethod
+    def _mtimes(paths: list) -> dict:
+        return {path: os.path.getmtime(path) if os.path.exists(path) else None for path in paths}
+
+    def load(self):
+        """（重新）导入配置并建立预测器，预先加载查询路径上的所有缓存"""
+        import importlib
+        import elon_predictor_enhanced
+
+        if self.predictor is not None:
+            self.predictor.close()
+            elon_predictor_enhanced = importlib.reload(elon_predictor_enhanced)
+
+        config = elon_predictor_enhanced.load_tuned_config(elon_predictor_enhanced.CONFIG)
+        predictor = elon_predictor_enhanced.EnhancedTweetPredictor(config)
+        window = predictor.parse_time_window()
+        predictor.bucket_ladder()
+        predictor.get_rate_posterior()
+        predictor.cached_history()
+        predictor.load_dispersion_table()
+        predictor.load_regime_detector()
+        predictor.load_gap_sketch()
+        if config['sleep_adjust']:
+            predictor.load_sleep_model()
+        if config['model_type'] == 'hawkes':
+            predictor.load_hawkes_model()
+        elif config['model_type'] == 'analog':
+            predictor.load_analog_library()
+
+        # 预热一次模型计算（导入模型需要的模块、填充存档时间戳缓存）
+        predictor.muted = True
+        try:
+            elapsed = max((time.time() - window['start_ts']) / 3600, 0.0)
+            predictor.predict(0, elapsed, max(window['total_hours'] - elapsed, 1.0))
+        finally:
+            predictor.muted = False
+
+        self.predictor = predictor
+        self.loaded_at = time.time()
+        self.watched = self._mtimes(self._watched_paths(config))
+        self.reload_requested = False
+
+    def refresh(self) -> bool:
+        """配置、阶梯或存档有变化（或收到 reload）时重建预测器，返回是否重建"""
+        if (self.predictor is None or self.reload_requested
+                or self._mtimes(list(self.watched)) != self.watched):
+            self.load()
+            return True
+        return False
+
+    def predict(self, count: int) -> dict:
+        """运行预测，返回结果与报告文本（与直接运行 elon_predictor_enhanced.py <count> 的输出一致）"""
+        import contextlib
+        import io
+
+        predictor = self.predictor
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            result = predictor.run_with_count(count)
+        return {'result': result, 'output': output.getvalue()}
+
+    def status(self) -> dict:
+        config = self.predictor.config
+        return {
+            'pid': os.getpid(),
+            'uptime_seconds': time.time() - self.started_at,
+            'loaded_at': self.loaded_at,
+            'window': f"{config['window_start_et']} → {config['window_end_et']}",
+            'model_type': config['model_type'],
+            'n_requests': self.n_requests,
+            'mean_ms': self.total_seconds / self.n_requests * 1000 if self.n_requests else None,
+        }
+
+    def handle(self, message: dict) -> dict:
+        start = time.perf_counter()
+        cmd = message.get('cmd')
+        if cmd == 'reload':
+            self.reload_requested = True
+        reloaded = self.refresh()
+
+        if cmd == 'predict':
+            response = self.predict(int(message['count']))
+        elif cmd in ('status', 'reload'):
+            response = self.status()
+        elif cmd == 'stop':
+            self.stopping = True
+            response = {}
+        else:
+            return {'ok': False, 'error': f"未知命令: {cmd}"}
+
+        seconds = time.perf_counter() - start
+        self.n_requests += 1
+        self.total_seconds += seconds
+        return dict(response, ok=True, reloaded=reloaded, seconds=seconds)
+
+
+def serve(socket_path: str = SOCKET_PATH):
+    """在 socket_path 上逐个处理请求（预测器不是线程安全的）"""
+    import signal
+    import socketserver
+
+    service = PredictorService()
+    start = time.perf_counter()
+    service.load()
+    print(f"✅ 预测器已加载 ({(time.perf_counter() - start) * 1000:.0f} ms)，"
+          f"窗口 {service.status()['window']}，模型 {service.predictor.config['model_type']}")
+
+    def request_reload(signum, frame):
+        service.reload_requested = True
+
+    signal.signal(signal.SIGHUP, request_reload)
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            line = self.rfile.readline()
+            if not line:
+                return
+            try:
+                response = service.handle(json.loads(line))
+            except Exception as e:
+                response = {'ok': False, 'error': f"{type(e).__name__}: {e}"}
+            self.wfile.write(json.dumps(response, ensure_ascii=False, default=_to_json).encode() + b'\n')
+
+    # 上次未正常退出时 socket 文件会残留
+    if os.path.exists(socket_path):
+        try:
+            request({'cmd': 'status'}, socket_path, timeout=1)
+            print(f"❌ 服务已在运行: {socket_path}")
+            sys.exit(1)
+        except (DaemonUnavailable, OSError):
+            os.remove(socket_path)
+
+    server = socketserver.UnixStreamServer(socket_path, Handler)
+    os.chmod(socket_path, 0o600)
+    print(f"📡 监听 {socket_path}（Ctrl+C 停止）")
+    try:
+        while not service.stopping:
+            server.handle_request()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        service.predictor.close()
+        print("\n⏹ 服务已停止")
+
+
+def query(count: int, socket_path: str = SOCKET_PATH) -> Optional[dict]:
+    """向服务查询并打印报告；服务未运行时返回 None"""
+    try:
+        response = request({'cmd': 'predict', 'count': count}, socket_path)
+    except DaemonUnavailable:
+        return None
+    if not response['ok']:
+        print(f"❌ 服务端错误: {response['error']}")
+        sys.exit(1)
+    print(response['output'], end='')
+    return response
+
+
+def main():
+    parser = argparse.ArgumentParser(description='常驻预测服务')
+    parser.add_argument('--socket', default=SOCKET_PATH, help=f'socket 路径（默认 {SOCKET_PATH}）')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('serve', help='启动服务')
+    query_parser = subparsers.add_parser('query', help='查询预测')
+    query_parser.add_argument('count', type=int, help='当前推文数')
+    for name, help_text in (('status', '显示服务状态'), ('reload', '重新加载配置'), ('stop', '停止服务')):
+        subparsers.add_parser(name, help=help_text)
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        serve(args.socket)
+        return
+
+    if args.command == 'query':
+        start = time.perf_counter()
+        if query(args.count, args.socket) is None:
+            print(f"❌ 服务未运行，请先启动: python predictor_daemon.py serve", file=sys.stderr)
+            sys.exit(2)
+        print(f"⚡ 常驻服务响应: {(time.perf_counter() - start) * 1000:.1f} ms")
+        return
+
+    try:
+        response = request({'cmd': args.command}, args.socket)
+    except DaemonUnavailable:
+        print("❌ 服务未运行", file=sys.stderr)
+        sys.exit(2)
+    if args.command == 'stop':
+        print("⏹ 已请求停止服务")
+        return
+    for key, value in response.items():
+        print(f"  {key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+区间概率曲面 - 预先计算 (当前推文数 × 剩余小时) 网格上的区间概率
+================================================
+对当前市场窗口，用批量预测一次算出整个网格的区间概率，以 float16 压缩保存为
+data/probability_surface.npz。假设性查询只需查表并在剩余小时方向线性插值，
+不需要导入 scipy 或运行模型，单次查询在 1 毫秒以内。查询前检查曲面与当前配置的
+市场窗口、区间阶梯和模型配置一致（开启沉寂调整时还要求存档未更新），不一致时以非零状态退出（quick_predict.sh 随后改用完整预测）。
+
+当前推文数取到最后一个区间下界为止：达到该值后最终总数必然落在最高区间，
+更大的计数直接按该行查询。
+
+使用方法：
+    python probability_surface.py build             # 为当前市场生成曲面
+    python probability_surface.py query 120         # 当前时刻、120 条推文
+    python probability_surface.py query 120 -r 30   # 剩余 30 小时
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+SURFACE_FILE = 'probability_surface.npz'
+
+
+def _archive_mtime(config: dict) -> Optional[float]:
+    path = os.path.join(config['data_dir'], config['archive_file'])
+    return os.path.getmtime(path) if os.path.exists(path) else None
+
+
+class ProbabilitySurface:
+    """区间概率查表"""
+
+    def __init__(self, probabilities: np.ndarray, hours: np.ndarray, bucket_names: list, meta: dict):
+        self.probabilities = probabilities  # (剩余小时, 当前推文数, 区间) float16
+        self.hours = hours
+        self.bucket_names = bucket_names
+        self.meta = meta
+        self.max_count = probabilities.shape[1] - 1
+
+    # ========================================================
+    # 生成
+    # ========================================================
+
+    @classmethod
+    def build(cls, predictor, step_hours: float = 0.25) -> 'ProbabilitySurface':
+        """用 predictor 的批量预测生成当前窗口的曲面"""
+        from elon_predictor_enhanced import config_fingerprint
+
+        window = predictor.parse_time_window()
+        ladder = predictor.bucket_ladder()
+        total_hours = window['total_hours']
+        hours = np.append(np.arange(0, total_hours, step_hours), total_hours)
+        counts = np.arange(ladder.edges[-1] + 1)
+
+        remaining, current = np.meshgrid(hours, counts, indexing='ij')
+        batch = predictor.predict_batch(
+            current.ravel(), total_hours - remaining.ravel(), remaining.ravel(),
+            ladders=ladder.to_list(), end_ts=window['end_ts'],
+        )
+        probabilities = batch['probabilities'].reshape(len(hours), len(counts), -1).astype(np.float16)
+
+        meta = {
+            'window_start_et': predictor.config['window_start_et'],
+            'window_end_et': predictor.config['window_end_et'],
+            'end_ts': window['end_ts'],
+            'model_type': predictor.config['model_type'],
+            'config_fingerprint': config_fingerprint(predictor.config),
+            'archive_mtime': _archive_mtime(predictor.config),
+            'built_at': time.time(),
+        }
+        return cls(probabilities, hours, ladder.names, meta)
+
+    # ========================================================
+    # 持久化
+    # ========================================================
+
+    def save(self, path: str):
+        # 网格中过半是区间两侧的长串 0，压缩保存（7 天市场约 18 MB → 7 MB）；加载时一次解压
+        np.savez_compressed(
+            path,
+            probabilities=self.probabilities,
+            hours=self.hours,
+            bucket_names=np.array(self.bucket_names),
+            meta=np.array(json.dumps(self.meta)),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> 'ProbabilitySurface':
+        with np.load(path) as data:
+            return cls(
+                data['probabilities'],
+                data['hours'],
+                data['bucket_names'].tolist(),
+                json.loads(str(data['meta'])),
+            )
+
+    def matches(self, config: dict) -> bool:
+        """曲面是否对应 config 的市场窗口、区间阶梯与模型配置"""
+        from bucket_ladder import load_ladder
+        from elon_predictor_enhanced import config_fingerprint
+        from window_calendar import parse_window
+
+        if (self.meta['window_start_et'] != config['window_start_et']
+                or self.meta['window_end_et'] != config['window_end_et']
+                or self.meta['config_fingerprint'] != config_fingerprint(config)):
+            return False
+        # 沉寂调整取决于存档中的最后一条推文，存档更新后需要重新生成
+        if config['sleep_adjust'] and self.meta.get('archive_mtime') != _archive_mtime(config):
+            return False
+        window = parse_window(config['window_start_et'], config['window_end_et'])
+        ladder = load_ladder(
+            os.path.join(config['data_dir'], config['ladder_file']),
+            f"{config['window_start_et']}|{config['window_end_et']}",
+            window['total_hours'] / 24,
+        )
+        return ladder.names == self.bucket_names
+
+    # ========================================================
+    # 查询
+    # ========================================================
+
+    def remaining_hours_now(self) -> float:
+        return max((self.meta['end_ts'] - time.time()) / 3600, 0.0)
+
+    def lookup(self, count: int, remaining_hours: Optional[float] = None) -> Dict[str, float]:
+        """查询区间概率（剩余小时方向线性插值；默认按当前时刻）"""
+        if remaining_hours is None:
+            remaining_hours = self.remaining_hours_now()
+        count = min(max(int(count), 0), self.max_count)
+        remaining_hours = min(max(remaining_hours, 0.0), float(self.hours[-1]))
+
+        i = min(int(np.searchsorted(self.hours, remaining_hours, side='right')) - 1, len(self.hours) - 2)
+        frac = (remaining_hours - self.hours[i]) / (self.hours[i + 1] - self.hours[i])
+        lower = self.probabilities[i, count].astype(np.float32)
+        upper = self.probabilities[i + 1, count].astype(np.float32)
+        probs = lower + frac * (upper - lower)
+        probs /= probs.sum()
+        return dict(zip(self.bucket_names, probs.tolist()))
+
+
+def surface_path(data_dir: str = 'data') -> str:
+    return os.path.join(data_dir, SURFACE_FILE)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='区间概率曲面')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build_parser = subparsers.add_parser('build', help='为当前市场生成曲面')
+    build_parser.add_argument('--step', type=float, default=0.25, help='剩余小时网格步长（默认 0.25）')
+    query_parser = subparsers.add_parser('query', help='查询区间概率')
+    query_parser.add_argument('count', type=int, help='当前推文数')
+    query_parser.add_argument('-r', '--remaining', type=float, default=None, help='剩余小时（默认按当前时刻）')
+    args = parser.parse_args()
+
+    path = surface_path()
+
+    from elon_predictor_enhanced import CONFIG, load_tuned_config
+
+    config = load_tuned_config(CONFIG)
+
+    if args.command == 'build':
+        from batch_predict import BATCH_MODELS
+        from elon_predictor_enhanced import EnhancedTweetPredictor
+
+        if config['model_type'] not in BATCH_MODELS:
+            print(f"❌ 模型 {config['model_type']} 没有闭式预测分布，无法生成曲面"
+                  f"（支持: {', '.join(BATCH_MODELS)}）")
+            sys.exit(1)
+        config = dict(config, verbose=False)
+        start = time.perf_counter()
+        surface = ProbabilitySurface.build(EnhancedTweetPredictor(config), args.step)
+        surface.save(path)
+        elapsed = time.perf_counter() - start
+        shape = surface.probabilities.shape
+        print(f"✅ 曲面已保存: {path}")
+        print(f"   网格: {shape[0]} 个剩余小时 × {shape[1]} 个计数 × {shape[2]} 个区间")
+        print(f"   大小: {os.path.getsize(path) / 1024:.0f} KB  耗时: {elapsed:.2f} 秒")
+        return
+
+    if not os.path.exists(path):
+        print(f"❌ 未找到曲面文件 {path}，请先运行: python probability_surface.py build")
+        sys.exit(1)
+
+    surface = ProbabilitySurface.load(path)
+    if not surface.matches(config):
+        print(f"❌ 曲面 ({surface.meta['window_start_et']} → {surface.meta['window_end_et']}) "
+              f"与当前市场窗口、区间阶梯或模型配置不一致，请重新运行 build")
+        sys.exit(1)
+    if args.remaining is None and surface.remaining_hours_now() <= 0:
+        print(f"❌ 曲面对应的市场已结束 ({surface.meta['window_end_et']})，请重新运行 build")
+        sys.exit(1)
+    remaining = args.remaining if args.remaining is not None else surface.remaining_hours_now()
+    start = time.perf_counter()
+    buckets = surface.lookup(args.count, remaining)
+    elapsed = time.perf_counter() - start
+
+    print(f"\n📊 {surface.meta['window_start_et']} → {surface.meta['window_end_et']} ({surface.meta['model_type']})")
+    print(f"   当前推文数: {args.count}  剩余时间: {remaining:.1f} 小时")
+    print(f"\n   区间概率:")
+    for name, prob in buckets.items():
+        bar = '█' * int(prob * 40)
+        print(f"   {name:>10s}: {prob * 100:5.1f}% {bar}")
+    print(f"\n   查询耗时: {elapsed * 1e6:.0f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,497 @@
+#!/usr/bin/env python3
+"""
+本地查询 API - 推文计数、每日统计、市场、预测与区间概率的 HTTP JSON 接口
+================================================
+推文时间戳索引（本地存档）与各市场的预测器常驻内存，存档更新后自动重新加载。
+只监听 127.0.0.1，供内部工具高频查询，不访问 XTracker 接口。
+
+路由（GET，返回 JSON）：
+    /count?start=...&end=...&tz=...     区间内推文数（start/end 为 ISO 时间或 epoch 秒，
+                                        不带时区的时间按 tz 解释，默认 America/New_York）
+    /daily?tz=...&days=...              按 tz 日期分组的每日推文数（默认最近 30 天）
+    /markets                            追踪的市场及其当前计数
+    /predict?market=...&count=...       市场预测（count 缺省时取存档计数；已结束的市场在存档
+                                        覆盖到结束时间之前 buckets 为 null）
+    /buckets?market=...&count=...       只返回区间概率
+    /stats                              各路由的请求数与延迟直方图
+
+缓存与并发：
+  - 响应按 (路由, 规范化参数, 数据版本) 缓存；预测类结果另按 reuse_minutes 时间段失效
+  - 相同查询并发到达时只计算一次，其余请求等待并共享结果（请求合并）
+  - 响应带 ETag，客户端以 If-None-Match 重复查询时返回 304
+  - 各路由按对数分箱记录延迟，/stats 给出 p50 / p95 / p99
+
+使用方法：
+    python query_api.py                 # 监听 127.0.0.1:8787
+    python query_api.py --port 9000
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pytz
+
+from elon_predictor_enhanced import CONFIG, EnhancedTweetPredictor, load_tuned_config
+from post_archive import load_post_timestamps
+from window_calendar import ET_FORMAT, parse_window
+
+DEFAULT_PORT = 8787
+
+# 存档修改时间的检查间隔（秒）
+RELOAD_CHECK_SECONDS = 1.0
+
+# 每个路由保留的响应缓存条数
+CACHE_SIZE = 256
+
+# 延迟直方图分箱上界（毫秒，对数间隔，最后一箱无上界）
+LATENCY_EDGES_MS = [0.1 * 2 ** i for i in range(18)]
+
+
+class ApiError(Exception):
+    """请求参数错误（返回 400 / 404）"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+# ============================================================
+# 请求合并与延迟统计
+# ============================================================
+
+class SingleFlight:
+    """相同键的并发计算只执行一次，其余调用者等待并共享结果（或异常）"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls: Dict[tuple, dict] = {}
+        self.coalesced = 0
+
+    def do(self, key: tuple, fn: Callable):
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = {'done': threading.Event(), 'result': None, 'error': None}
+            else:
+                self.coalesced += 1
+
+        if leader:
+            try:
+                call['result'] = fn()
+            except Exception as e:
+                call['error'] = e
+            finally:
+                with self.lock:
+                    del self.calls[key]
+                call['done'].set()
+        else:
+            call['done'].wait()
+
+        if call['error'] is not None:
+            raise call['error']
+        return call['result']
+
+
+class LatencyHistogram:
+    """对数分箱的延迟直方图"""
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_EDGES_MS) + 1)
+        self.total_ms = 0.0
+
+    def record(self, ms: float):
+        i = int(np.searchsorted(LATENCY_EDGES_MS, ms))
+        self.counts[i] += 1
+        self.total_ms += ms
+
+    def quantile(self, q: float) -> Optional[float]:
+        """q 分位所在分箱的上界（毫秒）"""
+        n = sum(self.counts)
+        if n == 0:
+            return None
+        rank = math.ceil(q * n)
+        cumulative = 0
+        for i, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return LATENCY_EDGES_MS[i] if i < len(LATENCY_EDGES_MS) else math.inf
+        return math.inf
+
+    def summary(self) -> dict:
+        n = sum(self.counts)
+        return {
+            'requests': n,
+            'mean_ms': self.total_ms / n if n else None,
+            'p50_ms': self.quantile(0.5),
+            'p95_ms': self.quantile(0.95),
+            'p99_ms': self.quantile(0.99),
+            'histogram': {
+                (f'<={LATENCY_EDGES_MS[i]:g}ms' if i < len(LATENCY_EDGES_MS) else f'>{LATENCY_EDGES_MS[-1]:g}ms'): c
+                for i, c in enumerate(self.counts) if c
+            },
+        }
+
+
+# ============================================================
+# 数据与模型
+# ============================================================
+
+def _market_id(start_et: str, end_et: str) -> str:
+    window = parse_window(start_et, end_et)
+    return f"{window['start_et']:%Y-%m-%d}_{window['end_et']:%Y-%m-%d}"
+
+
+def tracked_markets(config: dict) -> Dict[str, dict]:
+    """当前预测窗口与看板追踪的 Polymarket 市场 {市场 id: 窗口}"""
+    from update_dashboard_with_pm import POLYMARKET_MARKETS
+
+    windows = [(config['window_start_et'], config['window_end_et'], 'current')]
+    for market in POLYMARKET_MARKETS:
+        start = datetime.fromisoformat(market['start_et']).strftime(ET_FORMAT)
+        end = datetime.fromisoformat(market['end_et']).strftime(ET_FORMAT)
+        windows.append((start, end, market['title']))
+
+    markets = {}
+    for start, end, title in windows:
+        markets.setdefault(_market_id(start, end), {'window_start_et': start, 'window_end_et': end, 'title': title})
+    return markets
+
+
+class QueryService:
+    """推文时间戳索引、每日统计与各市场预测器（存档更新后重建）"""
+
+    def __init__(self, config: dict):
+        self.config = dict(config, verbose=False, log_to_file=False, persist_posterior=False)
+        self.archive_path = os.path.join(self.config['data_dir'], self.config['archive_file'])
+        self.markets = tracked_markets(self.config)
+        self.flight = SingleFlight()
+        self.model_lock = threading.Lock()
+        self.reload_lock = threading.Lock()
+        self.cache: Dict[str, dict] = {}
+        self.latency: Dict[str, LatencyHistogram] = {}
+        self.checked_at = 0.0
+        self.archive_mtime = None
+        self.version = 0
+        self.timestamps = np.empty(0)
+        self.predictors: Dict[str, EnhancedTweetPredictor] = {}
+        self.maybe_reload(force=True)
+
+    # ========================================================
+    # 索引
+    # ========================================================
+
+    def maybe_reload(self, force: bool = False):
+        """存档修改时间变化时重新加载索引，清空缓存与预测器"""
+        now = time.monotonic()
+        if not force and now - self.checked_at < RELOAD_CHECK_SECONDS:
+            return
+        with self.reload_lock:
+            self.checked_at = now
+            mtime = os.path.getmtime(self.archive_path) if os.path.exists(self.archive_path) else None
+            if not force and mtime == self.archive_mtime:
+                return
+            timestamps = load_post_timestamps(self.archive_path)
+            with self.model_lock:
+                self.timestamps = timestamps
+                self.archive_mtime = mtime
+                self.version += 1
+                self.cache = {}
+                self.predictors = {}
+
+    def count_between(self, start_ts: float, end_ts: float) -> int:
+        return int(np.searchsorted(self.timestamps, end_ts) - np.searchsorted(self.timestamps, start_ts))
+
+    def covered_until(self) -> Optional[float]:
+        return float(self.timestamps[-1]) if self.timestamps.size else None
+
+    def predictor(self, market_id: str) -> EnhancedTweetPredictor:
+        """市场的预测器（画像、离散参数表等与其他市场共享）"""
+        if market_id not in self.predictors:
+            market = self.markets[market_id]
+            predictor = EnhancedTweetPredictor(dict(self.config, **{
+                'window_start_et': market['window_start_et'],
+                'window_end_et': market['window_end_et'],
+            }))
+            shared = next(iter(self.predictors.values()), None)
+            if shared is not None:
+                for attr in ('hour_profile', 'dispersion_table', 'sleep_model', 'regime_detector', 'gap_sketch'):
+                    setattr(predictor, attr, getattr(shared, attr))
+            self.predictors[market_id] = predictor
+        return self.predictors[market_id]
+
+    # ========================================================
+    # 路由
+    # ========================================================
+
+    @staticmethod
+    def _timezone(params: dict):
+        name = params.get('tz', 'America/New_York')
+        try:
+            return pytz.timezone(name)
+        except pytz.UnknownTimeZoneError:
+            raise ApiError(400, f"未知时区: {name}")
+
+    @staticmethod
+    def _parse_time(value: Optional[str], tz, name: str) -> float:
+        if value is None:
+            raise ApiError(400, f"缺少参数 {name}")
+        try:
+            return float(value)
+        except ValueError:
+            pass
+        try:
+            parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            raise ApiError(400, f"无法解析时间 {name}={value}")
+        if parsed.tzinfo is None:
+            parsed = tz.localize(parsed)
+        return parsed.timestamp()
+
+    def route_count(self, params: dict) -> dict:
+        tz = self._timezone(params)
+        start = self._parse_time(params.get('start'), tz, 'start')
+        end = self._parse_time(params.get('end'), tz, 'end') if 'end' in params else time.time()
+        if end < start:
+            raise ApiError(400, "end 早于 start")
+        covered = self.covered_until()
+        return {
+            'start_ts': start,
+            'end_ts': end,
+            'count': self.count_between(start, end),
+            'covered_until': covered,
+            'complete': covered is not None and covered >= end,
+        }
+
+    def route_daily(self, params: dict) -> dict:
+        tz = self._timezone(params)
+        try:
+            days = int(params.get('days', 30))
+        except ValueError:
+            raise ApiError(400, "days 必须为整数")
+        if not self.timestamps.size or days <= 0:
+            return {'tz': tz.zone, 'days': []}
+
+        # 各本地日期 00:00 的 epoch 秒（逐日 localize，正确处理夏令时），一次 searchsorted 得到每日计数
+        last = datetime.fromtimestamp(self.timestamps[-1], tz).date()
+        first = max(datetime.fromtimestamp(self.timestamps[0], tz).date(), last - timedelta(days=days - 1))
+        dates = [first + timedelta(days=i) for i in range((last - first).days + 1)]
+        bounds = [tz.localize(datetime(d.year, d.month, d.day)).timestamp() for d in dates]
+        bounds.append(tz.localize(datetime.combine(last + timedelta(days=1), datetime.min.time())).timestamp())
+        counts = np.diff(np.searchsorted(self.timestamps, bounds))
+        return {
+            'tz': tz.zone,
+            'days': [{'date': d.isoformat(), 'count': int(c)} for d, c in zip(dates, counts)],
+        }
+
+    def route_markets(self, params: dict) -> dict:
+        now = time.time()
+        markets = []
+        for market_id, market in self.markets.items():
+            window = parse_window(market['window_start_et'], market['window_end_et'])
+            markets.append({
+                'id': market_id,
+                'title': market['title'],
+                'window_start_et': market['window_start_et'],
+                'window_end_et': market['window_end_et'],
+                'count': self.count_between(window['start_ts'], min(now, window['end_ts'])),
+                'closed': now >= window['end_ts'],
+                'complete': self.covered_until() is not None and self.covered_until() >= window['end_ts'],
+                'progress_pct': min(max((now - window['start_ts']) / 3600 / window['total_hours'], 0.0), 1.0) * 100,
+            })
+        return {'covered_until': self.covered_until(), 'markets': markets}
+
+    def _market(self, params: dict) -> str:
+        market_id = params.get('market') or _market_id(self.config['window_start_et'], self.config['window_end_et'])
+        if market_id not in self.markets:
+            raise ApiError(404, f"未知市场: {market_id}（可用: {', '.join(self.markets)}）")
+        return market_id
+
+    def _count(self, params: dict, window: dict, now: float) -> tuple:
+        if 'count' in params:
+            try:
+                return int(params['count']), 'request'
+            except ValueError:
+                raise ApiError(400, "count 必须为整数")
+        return self.count_between(window['start_ts'], min(now, window['end_ts'])), 'archive'
+
+    def route_predict(self, params: dict) -> dict:
+        market_id = self._market(params)
+        now = time.time()
+        with self.model_lock:
+            predictor = self.predictor(market_id)
+            window = predictor.parse_time_window()
+            count, source = self._count(params, window, now)
+            ladder = predictor.bucket_ladder()
+            response = {'market': market_id, 'current_count': count, 'count_source': source,
+                        'bucket_edges': ladder.to_list()}
+            remaining = (window['end_ts'] - now) / 3600
+            if remaining <= 0:
+                # 已结束的市场：计数为最终数（请求给出，或存档已覆盖到结束时间）时最终区间确定；
+                # 存档未覆盖到结束时间时计数可能偏低，不给出区间概率
+                covered = self.covered_until()
+                complete = source == 'request' or (covered is not None and covered >= window['end_ts'])
+                buckets = None
+                if complete:
+                    final = ladder.names[int(ladder.index(count))]
+                    buckets = {name: float(name == final) for name in ladder.names}
+                return dict(response, market_closed=True, complete=complete, buckets=buckets)
+
+            elapsed = (now - window['start_ts']) / 3600
+            predictor.muted = True
+            try:
+                prediction = predictor.predict(count, elapsed, remaining)
+                buckets, _ = predictor.map_to_buckets(prediction)
+            finally:
+                predictor.muted = False
+
+        return dict(
+            response,
+            market_closed=False,
+            elapsed_hours=elapsed,
+            remaining_hours=remaining,
+            expected_total=float(prediction['expected_total']),
+            ci80=[float(prediction['ci80_lower']), float(prediction['ci80_upper'])],
+            ci90=[float(prediction['ci90_lower']), float(prediction['ci90_upper'])],
+            buckets=buckets,
+        )
+
+    def route_buckets(self, params: dict) -> dict:
+        # 与 /predict 共用缓存的预测结果
+        prediction = self.query('/predict', params)[0]
+        return {key: prediction[key] for key in ('market', 'current_count', 'count_source', 'buckets', 'bucket_edges')}
+
+    def route_stats(self, params: dict) -> dict:
+        return {
+            'version': self.version,
+            'coalesced': self.flight.coalesced,
+            'cached': {route: len(entries) for route, entries in self.cache.items()},
+            'routes': {route: hist.summary() for route, hist in self.latency.items()},
+        }
+
+    ROUTES = {
+        '/count': route_count,
+        '/daily': route_daily,
+        '/markets': route_markets,
+        '/predict': route_predict,
+        '/buckets': route_buckets,
+        '/stats': route_stats,
+    }
+
+    # 结果随时间变化的路由：缓存键加上时间段（reuse_minutes）
+    TIMED_ROUTES = ('/markets', '/predict', '/buckets')
+
+    # ========================================================
+    # 缓存查询
+    # ========================================================
+
+    def query(self, route: str, params: dict) -> tuple:
+        """返回 (结果, ETag)；相同查询共享缓存与进行中的计算"""
+        handler = self.ROUTES.get(route)
+        if handler is None:
+            raise ApiError(404, f"未知路由: {route}（可用: {', '.join(self.ROUTES)}）")
+        if route == '/stats':
+            return handler(self, params), None
+
+        self.maybe_reload()
+        key = tuple(sorted(params.items()))
+        if route in self.TIMED_ROUTES or (route == '/count' and 'end' not in params):
+            key += (int(time.time() // (60 * self.config['reuse_minutes'])),)
+        version = self.version
+        entries = self.cache.setdefault(route, {})
+        cached = entries.get(key)
+        if cached is not None and cached['version'] == version:
+            return cached['result'], cached['etag']
+
+        def compute():
+            result = handler(self, params)
+            body = json.dumps(result, ensure_ascii=False, sort_keys=True).encode()
+            etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+            if len(entries) >= CACHE_SIZE:
+                entries.pop(next(iter(entries)))
+            entries[key] = {'version': version, 'result': result, 'etag': etag}
+            return result, etag
+
+        return self.flight.do((route, key, version), compute)
+
+    def record_latency(self, route: str, ms: float):
+        self.latency.setdefault(route if route in self.ROUTES else 'other', LatencyHistogram()).record(ms)
+
+
+# ============================================================
+# HTTP 服务
+# ============================================================
+
+def make_handler(service: QueryService):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            start = time.perf_counter()
+            url = urlparse(self.path)
+            params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            try:
+                result, etag = service.query(url.path, params)
+                if etag is not None and self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                else:
+                    self._send_json(200, result, etag)
+            except ApiError as e:
+                self._send_json(e.status, {'error': str(e)})
+            except Exception as e:
+                self._send_json(500, {'error': f"{type(e).__name__}: {e}"})
+            service.record_latency(url.path, (time.perf_counter() - start) * 1000)
+
+        def _send_json(self, status: int, payload: dict, etag: Optional[str] = None):
+            body = json.dumps(payload, ensure_ascii=False).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            if etag is not None:
+                self.send_header('ETag', etag)
+                self.send_header('Cache-Control', 'no-cache')
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # 高频查询不逐条打印访问日志
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='本地查询 API')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'端口（默认 {DEFAULT_PORT}）')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    service = QueryService(load_tuned_config(CONFIG))
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), make_handler(service))
+    print("=" * 70)
+    print(f"  🔌 本地查询 API: http://127.0.0.1:{args.port}")
+    print("=" * 70)
+    print(f"  推文索引: {service.timestamps.size} 条  加载耗时: {(time.perf_counter() - start) * 1000:.0f} ms")
+    print(f"  市场: {', '.join(service.markets)}")
+    print(f"  路由: {', '.join(service.ROUTES)}")
+    print("  按 Ctrl+C 停止")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n⏹ 服务已停止")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,15 @@
 #!/usr/bin/env python3
 """
 快速预测脚本 - 直接使用推文数量进行预测
+常驻预测服务 (predictor_daemon.py serve) 运行时直接向其查询，否则在本进程中预测
 """
 
 import sys
-from elon_predictor_enhanced import EnhancedTweetPredictor, CONFIG
+
+from predictor_daemon import query
 
 def quick_predict(count):
     """快速预测"""
-    predictor = EnhancedTweetPredictor(CONFIG)
-
     # 验证输入
     try:
         current_count = int(count)
@@ -24,7 +24,12 @@ def quick_predict(count):
     print("=" * 60)
 
     # 运行预测
-    result = predictor.run_prediction_with_count(current_count)
+    result = query(current_count)
+    if result is None:
+        from elon_predictor_enhanced import EnhancedTweetPredictor, CONFIG, load_tuned_config
+
+        predictor = EnhancedTweetPredictor(load_tuned_config(CONFIG))
+        result = predictor.run_with_count(current_count)
 
     if result:
         print("\n✅ 预测完成！")
@@ -1,5 +1,7 @@
 #!/bin/bash
 # 快速预测脚本 - 直接输入推文数量进行预测
+# 常驻预测服务 (python3 predictor_daemon.py serve) 运行时直接查询；
+# 否则已生成区间概率曲面 (python3 probability_surface.py build) 时查表，再否则运行完整预测
 
 if [ -z "$1" ]; then
     echo "用法: ./quick_predict.sh <推文数量>"
@@ -9,7 +11,6 @@ if [ -z "$1" ]; then
     exit 1
 fi
 
-echo "$1" | python3 elon_predictor_enhanced.py <<EOF
-2
-1
-EOF
+python3 predictor_daemon.py query "$1" 2>/dev/null \
+    || python3 probability_surface.py query "$1" 2>/dev/null \
+    || python3 elon_predictor_enhanced.py "$1"
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Gamma-Poisson 共轭在线速率估计
+================================================
+发帖速率 θ（每“相对小时”的推文数）服从 Gamma(shape, rate) 后验：
+    观察到 Δn 条推文、Δe 相对小时暴露后: shape += Δn, rate += Δe
+“相对小时”按周内小时画像加权（高峰时段一小时 > 1，深夜 < 1）。
+
+剩余窗口（暴露 E）的预测分布为负二项分布：
+    NegBin(n=shape, p=rate / (rate + E))
+推文本身的爆发性（过程离散 alpha，方差 = μ + alpha·μ²）作为独立的 Gamma 乘子叠加，
+按矩匹配合并为 NB2 离散 (1 + 1/shape)(1 + alpha) - 1，alpha = 0 时退化为上式。
+每次更新 O(1)，状态按市场窗口持久化。
+"""
+
+import json
+import math
+import os
+from typing import Optional
+
+import numpy as np
+
+
+def nbinom_pmf(support: np.ndarray, n: float, p: float) -> np.ndarray:
+    """负二项 PMF（与 scipy.stats.nbinom.pmf 相同），不需要导入 scipy
+
+    由递推 P(k) = P(k-1) · (k-1+n)/k · (1-p) 在对数空间累加，
+    n 很大时 p^n 也不会下溢。
+    """
+    support = np.asarray(support, dtype=np.int64)
+    if support.size == 0:
+        return np.empty(0)
+    if p >= 1.0:
+        # 剩余暴露为 0：全部概率在 0 处
+        return (support == 0).astype(np.float64)
+    k = np.arange(1, max(int(support.max()), 0) + 1)
+    log_pmf = np.concatenate([[0.0], np.cumsum(np.log((k - 1 + n) / k))])
+    log_pmf += n * math.log(p) + np.arange(k.size + 1) * math.log1p(-p)
+    pmf = np.exp(log_pmf)
+    return np.where(support >= 0, pmf[np.maximum(support, 0)], 0.0)
+
+
+class GammaRatePosterior:
+    """发帖速率的 Gamma 后验"""
+
+    def __init__(self, prior_shape: float, prior_rate: float):
+        self.prior_shape = prior_shape
+        self.prior_rate = prior_rate
+        self.shape = prior_shape
+        self.rate = prior_rate
+        self.observed_count = 0
+        self.observed_exposure = 0.0
+
+    @classmethod
+    def from_prior_mean(cls, mean_rate: float, strength_hours: float) -> 'GammaRatePosterior':
+        """由先验均值速率和先验强度（等效观测小时数）构造"""
+        return cls(mean_rate * strength_hours, strength_hours)
+
+    def reset(self):
+        self.shape = self.prior_shape
+        self.rate = self.prior_rate
+        self.observed_count = 0
+        self.observed_exposure = 0.0
+
+    # ========================================================
+    # 在线更新
+    # ========================================================
+
+    def observe_count(self, count: int, exposure: float):
+        """观察到窗口累计推文数 count 与累计暴露 exposure（O(1) 增量）"""
+        delta_count = count - self.observed_count
+        delta_exposure = exposure - self.observed_exposure
+        if delta_count < 0 or delta_exposure < 0:
+            # 计数回退或时间倒退（例如假设性查询），从先验重新累计
+            self.reset()
+            delta_count, delta_exposure = count, exposure
+
+        self.shape += delta_count
+        self.rate += delta_exposure
+        self.observed_count = count
+        self.observed_exposure = exposure
+
+    # ========================================================
+    # 后验与预测
+    # ========================================================
+
+    @property
+    def mean(self) -> float:
+        return self.shape / self.rate
+
+    @property
+    def data_weight(self) -> float:
+        """观测数据在后验均值中的权重"""
+        return self.observed_exposure / self.rate
+
+    def predictive_params(self, exposure: float, dispersion: float = 0.0) -> tuple:
+        """剩余暴露 exposure 的负二项预测参数 (n, p)，dispersion 为过程离散 alpha"""
+        alpha = (1 + 1 / self.shape) * (1 + dispersion) - 1
+        return 1 / alpha, 1 / (1 + alpha * self.mean * exposure)
+
+    def predictive_pmf(self, exposure: float, support: np.ndarray, dispersion: float = 0.0) -> np.ndarray:
+        n, p = self.predictive_params(exposure, dispersion)
+        return nbinom_pmf(support, n, p)
+
+    def predictive_moments(self, exposure: float, dispersion: float = 0.0) -> tuple:
+        mean = self.mean * exposure
+        alpha = (1 + 1 / self.shape) * (1 + dispersion) - 1
+        return mean, mean * (1 + alpha * mean)
+
+    # ========================================================
+    # 持久化
+    # ========================================================
+
+    def to_dict(self) -> dict:
+        return {
+            'prior_shape': self.prior_shape,
+            'prior_rate': self.prior_rate,
+            'shape': self.shape,
+            'rate': self.rate,
+            'observed_count': self.observed_count,
+            'observed_exposure': self.observed_exposure,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'GammaRatePosterior':
+        posterior = cls(data['prior_shape'], data['prior_rate'])
+        posterior.shape = data['shape']
+        posterior.rate = data['rate']
+        posterior.observed_count = data['observed_count']
+        posterior.observed_exposure = data['observed_exposure']
+        return posterior
+
+
+def load_posterior(path: str, window_key: str) -> Optional[GammaRatePosterior]:
+    """读取指定窗口的后验状态"""
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        states = json.load(f)
+    state = states.get(window_key)
+    return GammaRatePosterior.from_dict(state) if state else None
+
+
+def save_posterior(path: str, window_key: str, posterior: GammaRatePosterior):
+    """保存指定窗口的后验状态"""
+    states = {}
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            states = json.load(f)
+    states[window_key] = posterior.to_dict()
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(states, f, indent=2)
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+发帖状态检测 - 推文间隔上的在线 CUSUM 变点检测
+================================================
+在 Poisson 假设下推文间隔服从（非齐次）指数分布。参照强度 λ0(t) 为
+缓慢更新的基准水平乘以周内小时画像的相对强度，间隔内的期望推文数
+Λ0 = ∫λ0 dt 由画像累计和 O(1) 求出。同时运行两个单侧 CUSUM（对数似然比累积和）：
+
+    爆发：强度为 burst_ratio · λ0，   每个间隔累加 log(burst_ratio) - (burst_ratio - 1)·Λ0
+    沉寂：强度为 λ0 / sleep_ratio，   每个间隔累加 -log(sleep_ratio) + (1 - 1/sleep_ratio)·Λ0
+
+因此夜间按画像本应较少的推文不会被误判为沉寂，白天的正常活跃也不会被判为爆发。
+
+统计量截断在 [0, 阈值] 内：达到阈值即进入对应状态，回落到 0 时退出。
+上限截断使退出时间与状态持续了多久无关，长时间沉寂后几条正常推文即可恢复。
+沉寂期间不会有新推文，因此查询时把当前未结束的间隔作为删失观测
+（只累加生存函数比），无需等待下一条推文就能发现沉寂。
+
+每条推文 O(1) 更新，状态保存在 data/regime_state.json，从存档增量更新。
+
+使用方法：
+    python regime_detector.py          # 从存档更新并显示当前状态与最近的状态切换
+"""
+
+import json
+import math
+import os
+import time
+from datetime import datetime
+from typing import List, Optional
+
+import numpy as np
+
+from post_archive import load_post_timestamps
+from window_calendar import EPOCH_HOUR_OFFSET, HOURS_PER_WEEK
+
+REGIME_LABELS = {
+    'burst': '⚡ 爆发',
+    'normal': '➡️ 正常',
+    'sleep': '💤 沉寂',
+}
+
+# 保留的状态切换记录数
+MAX_TRANSITIONS = 50
+
+
+class RegimeDetector:
+    """爆发 / 正常 / 沉寂 状态的在线 CUSUM 检测器（时间单位：小时）"""
+
+    def __init__(self, baseline_hours: float = 72.0, burst_ratio: float = 15.0, sleep_ratio: float = 6.0,
+                 burst_threshold: float = 10.0, sleep_threshold: float = 4.0, prior_rate: float = 3.0):
+        self.baseline_hours = baseline_hours  # 基准水平的指数遗忘时间常数
+        # 推文本身高度聚集（半数间隔不到 3 分钟），爆发需要远高于平均的速率与更高的阈值
+        self.burst_ratio = burst_ratio
+        self.sleep_ratio = sleep_ratio
+        self.burst_threshold = burst_threshold
+        self.sleep_threshold = sleep_threshold
+        self.prior_rate = prior_rate
+
+        self.decayed_posts = 0.0    # 指数衰减的推文计数
+        self.decayed_hours = 0.0    # 指数衰减的相对小时数（按画像强度加权）
+        self.burst_score = 0.0
+        self.sleep_score = 0.0
+        self.regime = 'normal'
+        self.last_ts = None
+        self.n_posts = 0
+        self.transitions: List[dict] = []
+        self.set_profile(np.ones(HOURS_PER_WEEK))
+
+    def set_profile(self, rates: np.ndarray):
+        """设置周内小时相对强度（画像速率 / 平均速率），之后的间隔按新画像计算"""
+        weights = np.asarray(rates, dtype=np.float64)
+        weights = weights / weights.mean() if weights.mean() > 0 else np.ones(HOURS_PER_WEEK)
+        self.weights = weights.tolist()
+        self._cumulative = np.concatenate([[0.0], np.cumsum(weights)]).tolist()
+
+    def _weighted_position(self, ts: float) -> float:
+        # 参考周一起到 ts 的相对小时数（标量版 cumulative_weighted_hours）
+        hours = ts / 3600 + EPOCH_HOUR_OFFSET
+        weeks = math.floor(hours / HOURS_PER_WEEK)
+        position = hours - weeks * HOURS_PER_WEEK
+        slot = min(int(position), HOURS_PER_WEEK - 1)
+        return weeks * self._cumulative[-1] + self._cumulative[slot] + (position - slot) * self.weights[slot]
+
+    def relative_hours(self, start_ts: float, end_ts: float) -> float:
+        """[start, end) 的相对小时数（O(1)）"""
+        return self._weighted_position(end_ts) - self._weighted_position(start_ts)
+
+    # ========================================================
+    # 增量更新
+    # ========================================================
+
+    @property
+    def baseline_rate(self) -> float:
+        """基准水平 λ0（每相对小时的推文数），观测不足一个时间常数时向先验收缩"""
+        prior_hours = max(self.baseline_hours - self.decayed_hours, 0.0)
+        return (self.decayed_posts + self.prior_rate * prior_hours) / (self.decayed_hours + prior_hours)
+
+    def _burst_llr(self, expected: float, event: bool) -> float:
+        return (math.log(self.burst_ratio) if event else 0.0) - (self.burst_ratio - 1) * expected
+
+    def _sleep_llr(self, expected: float, event: bool) -> float:
+        return (-math.log(self.sleep_ratio) if event else 0.0) + (1 - 1 / self.sleep_ratio) * expected
+
+    @staticmethod
+    def _clip(score: float, threshold: float) -> float:
+        return min(max(score, 0.0), threshold)
+
+    def _classify(self, burst_score: float, sleep_score: float, current: str) -> str:
+        if burst_score >= self.burst_threshold:
+            return 'burst'
+        if sleep_score >= self.sleep_threshold:
+            return 'sleep'
+        # 进入某状态后，统计量回落到 0 才退出
+        if current == 'burst' and burst_score > 0:
+            return 'burst'
+        if current == 'sleep' and sleep_score > 0:
+            return 'sleep'
+        return 'normal'
+
+    def add_post(self, ts: float):
+        """加入一条推文（O(1)）；不晚于上一条的推文忽略"""
+        if self.last_ts is not None:
+            if ts <= self.last_ts:
+                return
+            relative = self.relative_hours(self.last_ts, ts)
+            expected = self.baseline_rate * relative
+            self.burst_score = self._clip(self.burst_score + self._burst_llr(expected, True), self.burst_threshold)
+            self.sleep_score = self._clip(self.sleep_score + self._sleep_llr(expected, True), self.sleep_threshold)
+
+            decay = math.exp(-(ts - self.last_ts) / 3600 / self.baseline_hours)
+            self.decayed_posts *= decay
+            self.decayed_hours = self.decayed_hours * decay + relative
+
+            regime = self._classify(self.burst_score, self.sleep_score, self.regime)
+            if regime != self.regime:
+                self.transitions.append({'ts': ts, 'from': self.regime, 'to': regime})
+                del self.transitions[:-MAX_TRANSITIONS]
+                self.regime = regime
+
+        self.decayed_posts += 1
+        self.last_ts = ts
+        self.n_posts += 1
+
+    def add_posts(self, timestamps: np.ndarray):
+        for ts in np.asarray(timestamps, dtype=np.float64).tolist():
+            self.add_post(ts)
+
+    # ========================================================
+    # 查询
+    # ========================================================
+
+    def state(self, now: Optional[float] = None) -> dict:
+        """当前状态；给出 now 时把上一条推文以来的空白作为删失间隔计入（不修改状态）"""
+        burst_score, sleep_score, regime = self.burst_score, self.sleep_score, self.regime
+        rate = self.baseline_rate
+        silent_hours = 0.0
+        if now is not None and self.last_ts is not None and now > self.last_ts:
+            silent_hours = (now - self.last_ts) / 3600
+            expected = rate * self.relative_hours(self.last_ts, now)
+            burst_score = self._clip(burst_score + self._burst_llr(expected, False), self.burst_threshold)
+            sleep_score = self._clip(sleep_score + self._sleep_llr(expected, False), self.sleep_threshold)
+            regime = self._classify(burst_score, sleep_score, regime)
+
+        return {
+            'regime': regime,
+            'label': REGIME_LABELS[regime],
+            'burst_score': burst_score,
+            'sleep_score': sleep_score,
+            'baseline_rate': rate,
+            'silent_hours': silent_hours,
+            'since_ts': self.transitions[-1]['ts'] if self.transitions else None,
+        }
+
+    # ========================================================
+    # 持久化
+    # ========================================================
+
+    def to_dict(self) -> dict:
+        return {
+            'baseline_hours': self.baseline_hours,
+            'burst_ratio': self.burst_ratio,
+            'sleep_ratio': self.sleep_ratio,
+            'burst_threshold': self.burst_threshold,
+            'sleep_threshold': self.sleep_threshold,
+            'prior_rate': self.prior_rate,
+            'weights': self.weights,
+            'decayed_posts': self.decayed_posts,
+            'decayed_hours': self.decayed_hours,
+            'burst_score': self.burst_score,
+            'sleep_score': self.sleep_score,
+            'regime': self.regime,
+            'last_ts': self.last_ts,
+            'n_posts': self.n_posts,
+            'transitions': self.transitions,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'RegimeDetector':
+        detector = cls(data['baseline_hours'], data['burst_ratio'], data['sleep_ratio'],
+                       data['burst_threshold'], data['sleep_threshold'], data['prior_rate'])
+        for key in ('decayed_posts', 'decayed_hours', 'burst_score', 'sleep_score',
+                    'regime', 'last_ts', 'n_posts', 'transitions'):
+            setattr(detector, key, data[key])
+        detector.set_profile(data['weights'])
+        return detector
+
+    def settings(self) -> tuple:
+        return (self.baseline_hours, self.burst_ratio, self.sleep_ratio,
+                self.burst_threshold, self.sleep_threshold, self.prior_rate)
+
+
+def load_regime_detector(archive_path: str, state_path: str, rates: Optional[np.ndarray] = None,
+                         **settings) -> RegimeDetector:
+    """读取保存的检测器状态，并用存档中更新的推文增量更新（参数变化时从头计算）
+
+    rates 为周内小时画像速率，之后的间隔按该画像计算。
+    """
+    detector = RegimeDetector(**settings)
+    if rates is not None:
+        detector.set_profile(rates)
+    archive_mtime = os.path.getmtime(archive_path) if os.path.exists(archive_path) else None
+
+    if os.path.exists(state_path):
+        with open(state_path, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        cached = RegimeDetector.from_dict(saved)
+        if cached.settings() == detector.settings():
+            if rates is not None:
+                cached.set_profile(rates)
+            detector = cached
+            if saved.get('archive_mtime') == archive_mtime:
+                return detector
+
+    timestamps = load_post_timestamps(archive_path)
+    if detector.last_ts is not None:
+        timestamps = timestamps[timestamps > detector.last_ts]
+    detector.add_posts(timestamps)
+    save_regime_detector(state_path, detector, archive_mtime)
+    return detector
+
+
+def save_regime_detector(state_path: str, detector: RegimeDetector, archive_mtime: Optional[float] = None):
+    data = detector.to_dict()
+    data['archive_mtime'] = archive_mtime
+    with open(state_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+
+
+def main():
+    """从存档更新并显示当前状态"""
+    from hour_profile import load_hour_profile
+
+    profile = load_hour_profile('data/raw_historical.json', 'data/hour_profile.json')
+    start = time.perf_counter()
+    detector = load_regime_detector('data/raw_historical.json', 'data/regime_state.json',
+                                    None if profile.is_empty else profile.rates())
+    elapsed = time.perf_counter() - start
+    state = detector.state(time.time())
+
+    print("=" * 70)
+    print(f"  📡 发帖状态检测 ({detector.n_posts} 条推文, 更新耗时 {elapsed * 1000:.1f} ms)")
+    print("=" * 70)
+    print(f"  当前状态: {state['label']}")
+    print(f"  基准水平: {state['baseline_rate']:.2f} 条/相对小时")
+    print(f"  爆发统计量: {state['burst_score']:.2f} / {detector.burst_threshold:g}"
+          f"  沉寂统计量: {state['sleep_score']:.2f} / {detector.sleep_threshold:g}")
+    if state['silent_hours']:
+        print(f"  距上一条推文: {state['silent_hours']:.1f} 小时")
+
+    print(f"\n  最近的状态切换:")
+    for item in detector.transitions[-10:]:
+        when = datetime.fromtimestamp(item['ts']).strftime('%Y-%m-%d %H:%M')
+        print(f"    {when}  {REGIME_LABELS[item['from']]} → {REGIME_LABELS[item['to']]}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
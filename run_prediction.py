@@ -3,7 +3,7 @@
 一键运行版本 - 直接执行预测并显示结果
 """
 
-from elon_predictor_enhanced import EnhancedTweetPredictor, CONFIG
+from elon_predictor_enhanced import EnhancedTweetPredictor, CONFIG, load_tuned_config
 from datetime import datetime
 import pytz
 
@@ -16,7 +16,7 @@ def main():
 ╚══════════════════════════════════════════════════════════════╝
     """)
 
-    predictor = EnhancedTweetPredictor(CONFIG)
+    predictor = EnhancedTweetPredictor(load_tuned_config(CONFIG))
 
     # 解析时间窗口
     window = predictor.parse_time_window()
@@ -78,7 +78,7 @@ def main():
     prediction = predictor.predict(current_count, elapsed_hours, remaining_hours)
 
     # 映射到区间
-    buckets = predictor.map_to_buckets(prediction['expected_total'])
+    buckets, _ = predictor.map_to_buckets(prediction)
 
     # 获取推荐
     history = predictor.load_history()
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+每日沉寂时段模型 - 学习每天最长的不发帖时段并折减剩余强度
+================================================
+以 UTC 15:00 为界把时间切成"日周期"（该时刻几乎从不开始长时间沉寂），
+每个周期内开始的、长度不少于 min_gap_hours 的间隔记为当天的沉寂时段
+（最长的一段通常是睡眠）。按天汇总保存在 data/sleep_summary.json，
+存档有新的完整周期时只处理新增的天。
+
+由最近 history_days 天的汇总预先计算两张表：
+  - 一天中每 15 分钟处于沉寂时段的概率 p(t)
+  - 沉寂时长的生存函数 S(d) = P(时长 > d)
+
+预测时若距上一条推文已超过 min_gap_hours，即正处于沉寂时段：
+剩余时段 t 仍在沉寂的概率 q(t) = S(t - 上一条推文) / S(已沉寂时长)。
+周内小时画像的强度已按 p(t) 平均折减过（画像强度 ≈ (1 - p) × 活跃强度），
+因此 t 时段的强度乘以 (1 - q(t)) / (1 - p(t))：预计仍在沉寂的时段折减，
+预计醒来后的时段恢复为活跃强度。只需查表与一次向量运算。
+
+使用方法：
+    python sleep_model.py          # 从存档更新并显示沉寂时段统计
+"""
+
+import json
+import math
+import os
+import time
+from datetime import datetime, timezone
+from typing import List, Optional
+
+import numpy as np
+
+from post_archive import load_post_timestamps
+from window_calendar import EPOCH_HOUR_OFFSET, HOURS_PER_WEEK
+
+# 日周期起点（UTC 小时）
+CYCLE_START_HOUR = 15
+
+BIN_HOURS = 0.25
+BINS_PER_DAY = int(24 / BIN_HOURS)
+
+# 生存函数覆盖的最长沉寂时长（小时）
+MAX_BLOCK_HOURS = 48
+
+# 活跃概率下限：醒来后的恢复倍数不超过 2（按回测中醒来后 6 小时的实际推文数校准）
+MIN_AWAKE = 0.5
+
+# 少于该天数时不做调整
+MIN_DAYS = 7
+
+
+def _cycle_start(ts: float) -> float:
+    """ts 所在日周期的起点"""
+    offset = CYCLE_START_HOUR * 3600
+    return math.floor((ts - offset) / 86400) * 86400 + offset
+
+
+class InactiveBlockModel:
+    """每日沉寂时段汇总与剩余强度折减"""
+
+    def __init__(self, min_gap_hours: float = 3.0, history_days: int = 60):
+        self.min_gap_hours = min_gap_hours
+        self.history_days = history_days
+        self.days: List[dict] = []       # 每个完整周期 {'cycle': 周期起点, 'blocks': [[沉寂开始, 沉寂结束], ...]}
+        self.first_cycle = None          # 第一个处理的周期起点
+        self.processed_until = None      # 已处理到的周期边界
+        self._tables = None
+
+    # ========================================================
+    # 增量更新
+    # ========================================================
+
+    def update(self, timestamps: np.ndarray) -> bool:
+        """处理存档中新的完整周期，返回是否有变化"""
+        if timestamps.size < 2:
+            return False
+        first = self.processed_until if self.processed_until is not None else _cycle_start(timestamps[0]) + 86400
+        # 周期结束后还有推文，说明该周期内的所有间隔都已完整
+        last = _cycle_start(timestamps[-1])
+        if last <= first:
+            return False
+
+        lo = max(int(np.searchsorted(timestamps, first)) - 1, 0)
+        times = timestamps[lo:int(np.searchsorted(timestamps, last)) + 1]
+        gaps = np.diff(times)
+        starts = times[:-1]
+        in_range = (starts >= first) & (starts < last) & (gaps >= self.min_gap_hours * 3600)
+        starts, gaps = starts[in_range], gaps[in_range]
+
+        cycles = np.floor((starts - first) / 86400).astype(np.int64)
+        for cycle in np.unique(cycles).tolist():
+            members = np.flatnonzero(cycles == cycle)
+            self.days.append({
+                'cycle': first + cycle * 86400,
+                'blocks': [[float(starts[i]), float(starts[i] + gaps[i])] for i in members.tolist()],
+            })
+
+        if self.first_cycle is None:
+            self.first_cycle = first
+        self.processed_until = last
+        cutoff = last - self.history_days * 86400
+        self.days = [day for day in self.days if day['cycle'] >= cutoff]
+        self._tables = None
+        return True
+
+    @classmethod
+    def from_timestamps(cls, timestamps: np.ndarray, **kwargs) -> 'InactiveBlockModel':
+        model = cls(**kwargs)
+        model.update(timestamps)
+        return model
+
+    # ========================================================
+    # 查询
+    # ========================================================
+
+    @property
+    def n_days(self) -> int:
+        """汇总覆盖的天数（包括没有长间隔的天）"""
+        if self.processed_until is None:
+            return 0
+        return int(min(self.history_days, (self.processed_until - self.first_cycle) / 86400))
+
+    def tables(self) -> tuple:
+        """(各 15 分钟时段的沉寂概率 p, 沉寂时长生存函数 S)，汇总变化后重新计算"""
+        if self._tables is None:
+            n_days = max(self.n_days, 1)
+            covered = np.zeros(BINS_PER_DAY)
+            blocks = [block for day in self.days for block in day['blocks']]
+            durations = np.array([(end - start) / 3600 for start, end in blocks])
+            for start, end in blocks:
+                first_bin = math.floor(start / 3600 / BIN_HOURS)
+                last_bin = math.ceil(end / 3600 / BIN_HOURS)
+                np.add.at(covered, np.arange(first_bin, last_bin) % BINS_PER_DAY, 1.0)
+            grid = np.arange(int(MAX_BLOCK_HOURS / BIN_HOURS) + 1) * BIN_HOURS
+            survival = (durations[:, None] > grid).mean(axis=0) if durations.size else np.zeros(grid.size)
+            self._tables = (np.minimum(covered / n_days, 1.0), survival)
+        return self._tables
+
+    def exposure_adjustment(self, now_ts: float, last_post_ts: Optional[float], end_ts: float,
+                            weights: np.ndarray) -> float:
+        """剩余 [now, end) 的相对暴露修正量（相对小时；醒来前折减，醒来后恢复）
+
+        weights 为周内小时相对强度（画像速率 / 平均速率）。未处于沉寂时段时返回 0。
+        """
+        if last_post_ts is None or self.n_days < MIN_DAYS:
+            return 0.0
+        silent_hours = (now_ts - last_post_ts) / 3600
+        if silent_hours < self.min_gap_hours:
+            return 0.0
+
+        p_sleep, survival = self.tables()
+        silent_bin = int(silent_hours / BIN_HOURS)
+        if silent_bin >= survival.size or survival[silent_bin] <= 0:
+            return 0.0
+
+        # 只计算到历史最长沉寂结束为止：之后的时段不再受当前沉寂影响，乘数为 1
+        longest_bin = int(np.flatnonzero(survival)[-1])
+        n_bins = min(int((end_ts - now_ts) / 3600 / BIN_HOURS), longest_bin - silent_bin)
+        if n_bins <= 0:
+            return 0.0
+        mid = now_ts + (np.arange(n_bins) + 0.5) * BIN_HOURS * 3600
+        q = survival[silent_bin + 1:silent_bin + 1 + n_bins] / survival[silent_bin]
+        p = p_sleep[(np.floor(mid / 3600 / BIN_HOURS).astype(np.int64)) % BINS_PER_DAY]
+        multiplier = (1 - q) / np.maximum(1 - p, MIN_AWAKE)
+        slots = (np.floor(mid / 3600).astype(np.int64) + EPOCH_HOUR_OFFSET) % HOURS_PER_WEEK
+        return float((weights[slots] * (multiplier - 1)).sum() * BIN_HOURS)
+
+    # ========================================================
+    # 持久化
+    # ========================================================
+
+    def to_dict(self) -> dict:
+        return {
+            'min_gap_hours': self.min_gap_hours,
+            'history_days': self.history_days,
+            'first_cycle': self.first_cycle,
+            'processed_until': self.processed_until,
+            'days': self.days,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'InactiveBlockModel':
+        model = cls(data['min_gap_hours'], data['history_days'])
+        model.first_cycle = data['first_cycle']
+        model.processed_until = data['processed_until']
+        model.days = data['days']
+        return model
+
+
+def load_sleep_model(archive_path: str, cache_path: str, min_gap_hours: float = 3.0,
+                     history_days: int = 60) -> InactiveBlockModel:
+    """读取缓存的每日汇总，存档有新的完整周期时增量更新"""
+    model = None
+    archive_mtime = os.path.getmtime(archive_path) if os.path.exists(archive_path) else None
+    if os.path.exists(cache_path):
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        if (cached['min_gap_hours'], cached['history_days']) == (min_gap_hours, history_days):
+            model = InactiveBlockModel.from_dict(cached)
+            # 存档未变化时无需重新解析
+            if cached.get('archive_mtime') == archive_mtime:
+                return model
+    if model is None:
+        model = InactiveBlockModel(min_gap_hours, history_days)
+
+    model.update(load_post_timestamps(archive_path))
+    data = model.to_dict()
+    data['archive_mtime'] = archive_mtime
+    with open(cache_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    return model
+
+
+def main():
+    """从存档更新并显示沉寂时段统计"""
+    model = load_sleep_model('data/raw_historical.json', 'data/sleep_summary.json')
+    if model.n_days == 0:
+        print("❌ 存档中没有足够的数据")
+        return
+
+    p_sleep, survival = model.tables()
+    durations = np.array([(end - start) / 3600 for day in model.days for start, end in day['blocks']])
+    longest = np.array([max(end - start for start, end in day['blocks']) / 3600 for day in model.days])
+
+    print("=" * 70)
+    print(f"  💤 每日沉寂时段 (最近 {model.n_days} 天, 最短 {model.min_gap_hours:g} 小时)")
+    print("=" * 70)
+    print(f"  有沉寂时段的天数: {len(model.days)}  沉寂时段: {len(durations)} 段")
+    print(f"  沉寂时长: 中位 {np.median(durations):.1f} 小时, 90% 分位 {np.percentile(durations, 90):.1f} 小时")
+    print(f"  每天最长一段: 中位 {np.median(longest):.1f} 小时")
+    print(f"\n  各 UTC 小时处于沉寂的概率:")
+    hourly = p_sleep.reshape(24, -1).mean(axis=1)
+    for hour in range(24):
+        print(f"    {hour:02d}:00  {hourly[hour] * 100:5.1f}% {'█' * int(hourly[hour] * 40)}")
+
+    print(f"\n  最近的沉寂时段:")
+    for start, end in [block for day in model.days[-3:] for block in day['blocks']]:
+        shown = [datetime.fromtimestamp(ts, timezone.utc).strftime('%m-%d %H:%M') for ts in (start, end)]
+        print(f"    {shown[0]} → {shown[1]} UTC ({(end - start) / 3600:.1f} 小时)")
+
+    now = time.perf_counter()
+    weights = np.ones(HOURS_PER_WEEK)
+    start = model.days[-1]['blocks'][0][0]
+    for _ in range(1000):
+        model.exposure_adjustment(start + 4 * 3600, start, start + 48 * 3600, weights)
+    print(f"\n  单次折减计算: {(time.perf_counter() - now) * 1000:.1f} µs")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
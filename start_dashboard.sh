@@ -1,5 +1,5 @@
 #!/bin/bash
-# 启动Web看板服务器
+# 启动Web看板服务器（数据发布后通过 SSE 推送到已打开的看板）
 
 PORT=8888
 
@@ -8,15 +8,15 @@ echo "  🌐 启动Web看板"
 echo "============================================================"
 echo ""
 echo "看板地址: http://localhost:$PORT"
+echo "连接状态: http://localhost:$PORT/status"
 echo "按 Ctrl+C 停止服务器"
 echo ""
 echo "============================================================"
 
-# 尝试使用Python 3启动HTTP服务器
-cd /Users/tony777/polymarket-predictor
+cd "$(dirname "$0")"
 
 if command -v python3 &> /dev/null; then
-    python3 -m http.server $PORT
+    python3 dashboard_server.py --port $PORT
 else
     echo "❌ 未找到 Python3"
     exit 1
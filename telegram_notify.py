@@ -4,9 +4,13 @@ Telegram推送 - Elon Musk推文数据更新
 """
 
 import json
+import os
+import time
 import requests
 from datetime import datetime
 
+from regime_detector import REGIME_LABELS, RegimeDetector
+
 def load_config():
     """加载Telegram配置"""
     try:
@@ -54,7 +58,32 @@ def send_telegram_message(message):
         return False
 
 
-def send_update_notification(today_count, recent_data, stats):
+def load_regime_state(path='data/regime_state.json'):
+    """读取发帖状态检测器保存的状态（按当前时刻计入空白时长）"""
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return RegimeDetector.from_dict(json.load(f)).state(time.time())
+
+
+def format_regime_alert(previous, state, current_count=None):
+    """发帖状态切换通知"""
+    time_str = datetime.now().strftime("%Y-%m-%d %H:%M")
+    message = f"""📡 *Elon Musk 发帖状态切换*
+
+🕐 *{time_str}*
+
+   {REGIME_LABELS[previous]} → *{state['label']}*
+   基准水平: {state['baseline_rate']:.2f} 条/小时
+"""
+    if state['silent_hours'] >= 0.5:
+        message += f"   距上一条推文: {state['silent_hours']:.1f} 小时\n"
+    if current_count is not None:
+        message += f"   当前市场计数: {current_count} 条\n"
+    return message
+
+
+def send_update_notification(today_count, recent_data, stats, regime=None):
     """发送更新通知"""
 
     now = datetime.now()
@@ -92,6 +121,7 @@ def send_update_notification(today_count, recent_data, stats):
     message += f"""
 ━━━━━━━━━━━━━━━━━━━━━
 📉 *趋势*: {trend}
+📡 *发帖状态*: {regime['label'] if regime else '未知'}
 
 📊 *历史统计*
    总天数: {stats['total_days']} 天
@@ -134,7 +164,7 @@ def main():
     }
 
     # 发送消息
-    message = send_update_notification(today_count, recent_data, stats)
+    message = send_update_notification(today_count, recent_data, stats, load_regime_state())
     send_telegram_message(message)
 
 
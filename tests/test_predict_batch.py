@@ -0,0 +1,34 @@
+"""批量预测与逐个 predict() + map_to_buckets() 的一致性（含沉寂调整）"""
+
+import os
+
+import numpy as np
+import pytest
+
+from elon_predictor_enhanced import CONFIG, EnhancedTweetPredictor, load_tuned_config
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def config(monkeypatch):
+    monkeypatch.chdir(ROOT)
+    return dict(load_tuned_config(CONFIG), verbose=False, log_to_file=False, persist_posterior=False)
+
+
+@pytest.mark.parametrize('model_type', ['gamma_poisson', 'poisson', 'neg_binom'])
+@pytest.mark.parametrize('sleep_adjust', [True, False])
+def test_predict_batch_matches_predict(config, model_type, sleep_adjust):
+    config = dict(config, model_type=model_type, sleep_adjust=sleep_adjust)
+    total = EnhancedTweetPredictor(config).parse_time_window()['total_hours']
+    cases = [(0, 3), (5, 3), (9, 13), (9, 20), (30, 10), (60, 30), (100, 45)]
+    counts, elapsed = (np.array(v, dtype=np.float64) for v in zip(*cases))
+    batch = EnhancedTweetPredictor(config).predict_batch(counts, elapsed, total - elapsed)
+
+    for i, (count, hours) in enumerate(cases):
+        predictor = EnhancedTweetPredictor(config)
+        predictor.muted = True
+        prediction = predictor.predict(count, hours, total - hours)
+        buckets, _ = predictor.map_to_buckets(prediction)
+        assert batch['expected_total'][i] == pytest.approx(prediction['expected_total'], rel=1e-9)
+        np.testing.assert_allclose(batch['probabilities'][i], list(buckets.values()), atol=1e-9)
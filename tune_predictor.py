@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+预测器超参数搜索 - 基于历史窗口重放
+================================================
+在回测窗口上对预测器参数做网格搜索或随机搜索：
+  - 分布参数（model_type, fit_dispersion, nb_alpha, prior_strength_hours, profile_half_life_days）
+    按区间对数损失选优
+  - 点预测系数（conservative_factor）按对应预测的 MAE 选优
+    （点预测与分布参数无关，两组在同一批候选上分别选取）
+weekend_boost 只在小时分布为空时生效，由存档回测时小时分布总是存在，因此不参与搜索。
+
+候选参数分发到工作进程并行评估；时间戳数组放在共享内存中，
+各进程只读映射，不重复加载存档。最优参数写入带版本号的参数档案，
+elon_predictor_enhanced.load_tuned_config() 会自动读取最新档案。
+
+使用方法：
+    python tune_predictor.py --random 500          # 随机搜索 500 组
+    python tune_predictor.py --grid 4 --workers 8  # 每个连续参数取 4 个网格点
+"""
+
+import argparse
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import shared_memory
+from typing import Dict, List
+
+import numpy as np
+
+import backtest
+from elon_predictor_enhanced import CONFIG
+from post_archive import load_post_timestamps
+
+# 参数空间：列表为离散取值，元组为 (下界, 上界, 'log' 或 'linear')
+# profile_half_life_days 只取固定几个值：回测按 (窗口起点, 半衰期) 缓存小时分布，
+# 连续抽样会让缓存永不命中且无限增长
+SEARCH_SPACE = {
+    'model_type': ['gamma_poisson', 'neg_binom'],
+    'fit_dispersion': [True, False],
+    'nb_alpha': (0.02, 0.5, 'log'),
+    'prior_strength_hours': (4, 168, 'log'),
+    'profile_half_life_days': [3, 5, 7, 10, 14, 21, 30, 45, 60],
+    'conservative_factor': (0.6, 1.2, 'linear'),
+}
+
+DISTRIBUTION_PARAMS = ['model_type', 'fit_dispersion', 'nb_alpha', 'prior_strength_hours', 'profile_half_life_days']
+POINT_PARAMS = {'conservative_factor': 'mae_conservative'}
+
+PROFILE_DIR = 'predictor_profiles'
+
+
+# ============================================================
+# 候选生成
+# ============================================================
+
+def grid_candidates(points: int) -> List[dict]:
+    """网格搜索：每个连续参数取 points 个点"""
+    axes = {}
+    for name, spec in SEARCH_SPACE.items():
+        if isinstance(spec, list):
+            axes[name] = spec
+        else:
+            low, high, scale = spec
+            values = np.geomspace(low, high, points) if scale == 'log' else np.linspace(low, high, points)
+            axes[name] = [round(float(v), 4) for v in values]
+    return [dict(zip(axes, combo)) for combo in itertools.product(*axes.values())]
+
+
+def random_candidates(n: int, seed: int = 0) -> List[dict]:
+    """随机搜索：连续参数按对数/线性均匀抽样"""
+    rng = np.random.default_rng(seed)
+    candidates = []
+    for _ in range(n):
+        candidate = {}
+        for name, spec in SEARCH_SPACE.items():
+            if isinstance(spec, list):
+                candidate[name] = spec[rng.integers(len(spec))]
+            else:
+                low, high, scale = spec
+                if scale == 'log':
+                    value = np.exp(rng.uniform(np.log(low), np.log(high)))
+                else:
+                    value = rng.uniform(low, high)
+                candidate[name] = round(float(value), 4)
+        candidates.append(candidate)
+    return candidates
+
+
+# ============================================================
+# 工作进程
+# ============================================================
+
+_SHARED = {}
+
+
+def _init_worker(shm_name: str, size: int, config: dict, windows: List[dict]):
+    """映射共享内存中的时间戳（只读），初始化回测环境"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    timestamps = np.ndarray((size,), dtype=np.float64, buffer=shm.buf)
+    timestamps.setflags(write=False)
+    _SHARED['shm'] = shm  # 保持引用，防止映射被回收
+    _SHARED['config'] = config
+    _SHARED['windows'] = windows
+    backtest._init_worker(config, timestamps)
+
+
+def evaluate_candidate(params: dict) -> dict:
+    """在所有窗口上评估一组参数"""
+    backtest._WORKER['config'] = dict(_SHARED['config'], **params)
+    results = [backtest.run_window(window) for window in _SHARED['windows']]
+    summary = backtest.summarize(results)
+    summary.pop('per_bucket', None)
+    return {'params': params, 'scores': summary}
+
+
+# ============================================================
+# 搜索与参数档案
+# ============================================================
+
+def run_search(candidates: List[dict], config: dict, workers: int) -> List[dict]:
+    """并行评估所有候选"""
+    config = dict(config, verbose=False, log_to_file=False, persist_posterior=False)
+    timestamps = load_post_timestamps(os.path.join(config['data_dir'], config['archive_file']))
+    windows = backtest.archive_windows(timestamps) + backtest.tracking_windows(
+        os.path.join(config['data_dir'], 'tracking_periods.json')
+    )
+    if not windows:
+        return []
+
+    if workers <= 1:
+        _SHARED.update(config=config, windows=windows)
+        backtest._init_worker(config, timestamps)
+        return [evaluate_candidate(c) for c in candidates]
+
+    shm = shared_memory.SharedMemory(create=True, size=max(timestamps.nbytes, 1))
+    try:
+        np.ndarray(timestamps.shape, dtype=np.float64, buffer=shm.buf)[:] = timestamps
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(shm.name, timestamps.size, config, windows)) as pool:
+            return list(pool.map(evaluate_candidate, candidates,
+                                 chunksize=max(1, len(candidates) // (workers * 8))))
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def select_best(evaluations: List[dict]) -> Dict[str, dict]:
+    """分布参数按对数损失选优，点预测系数按各自 MAE 选优"""
+    best_dist = min(evaluations, key=lambda e: e['scores']['log_loss'])
+    params = {name: best_dist['params'][name] for name in DISTRIBUTION_PARAMS}
+    scores = {k: best_dist['scores'][k] for k in ('log_loss', 'brier', 'coverage80', 'coverage90')}
+
+    for name, metric in POINT_PARAMS.items():
+        best_point = min(evaluations, key=lambda e: e['scores'][metric])
+        params[name] = best_point['params'][name]
+        scores[metric] = best_point['scores'][metric]
+
+    return {'params': params, 'scores': scores}
+
+
+def write_profile(config: dict, best: dict, search: str, n_candidates: int) -> str:
+    """写入带版本号的参数档案，并更新 latest"""
+    profile_dir = os.path.join(config['data_dir'], PROFILE_DIR)
+    os.makedirs(profile_dir, exist_ok=True)
+
+    versions = [
+        int(name[len('profile_v'):-len('.json')])
+        for name in os.listdir(profile_dir)
+        if name.startswith('profile_v') and name.endswith('.json')
+    ]
+    version = max(versions, default=0) + 1
+
+    profile = {
+        'version': version,
+        'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'search': search,
+        'n_candidates': n_candidates,
+        'params': best['params'],
+        'scores': best['scores'],
+    }
+
+    path = os.path.join(profile_dir, f'profile_v{version}.json')
+    for target in (path, os.path.join(config['data_dir'], config['tuned_profile'])):
+        with open(target, 'w', encoding='utf-8') as f:
+            json.dump(profile, f, indent=2, ensure_ascii=False)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='预测器超参数搜索')
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--random', type=int, default=200, help='随机搜索候选数（默认 200）')
+    group.add_argument('--grid', type=int, help='网格搜索：每个连续参数的网格点数')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='进程数')
+    parser.add_argument('--seed', type=int, default=0, help='随机搜索种子')
+    parser.add_argument('--dry-run', action='store_true', help='只显示结果，不写参数档案')
+    args = parser.parse_args()
+
+    if args.grid:
+        candidates, search = grid_candidates(args.grid), f'grid({args.grid})'
+    else:
+        candidates, search = random_candidates(args.random, args.seed), f'random({args.random})'
+
+    print("=" * 70)
+    print(f"  🎛  参数搜索: {search}，{len(candidates)} 组候选，{args.workers} 个进程")
+    print("=" * 70)
+
+    start = time.perf_counter()
+    evaluations = run_search(candidates, CONFIG, args.workers)
+    elapsed = time.perf_counter() - start
+
+    if not evaluations:
+        print("❌ 没有可用于搜索的历史窗口")
+        return
+
+    best = select_best(evaluations)
+    print(f"\n  耗时: {elapsed:.1f} 秒 ({elapsed / len(candidates) * 1000:.0f} ms/组)")
+    print("\n  最优参数:")
+    for name, value in best['params'].items():
+        print(f"    {name:24s} {value}")
+    print("\n  评分:")
+    for name, value in best['scores'].items():
+        print(f"    {name:24s} {value:.4f}")
+
+    if not args.dry_run:
+        path = write_profile(CONFIG, best, search, len(candidates))
+        print(f"\n  ✅ 参数档案已保存: {path}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
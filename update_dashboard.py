@@ -5,9 +5,17 @@
 """
 
 import json
+import os
+import time
 import requests
 from datetime import datetime, timedelta
 
+import numpy as np
+
+from dashboard_shards import publish_dashboard
+from gap_sketch import load_gap_sketch, save_gap_sketch
+from post_archive import parse_timestamps
+
 # 当前追踪期间配置
 CURRENT_PERIOD = {
     'name': 'Feb 1 - Feb 28, 2026',
@@ -16,7 +24,7 @@ CURRENT_PERIOD = {
 }
 
 def fetch_tracking_period_data():
-    """从追踪期间获取数据并按EST日期分组"""
+    """从追踪期间获取数据并按EST日期分组，同时返回各推文的 createdAt"""
     url = 'https://xtracker.polymarket.com/api/users/elonmusk/posts'
 
     try:
@@ -37,27 +45,43 @@ def fetch_tracking_period_data():
 
                 # 按EST时区分组统计
                 daily_counts = {}
+                created = []
                 for post in posts:
                     created_at = post.get('createdAt', '')
                     if created_at:
+                        created.append(created_at)
                         dt = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
                         est_dt = dt - timedelta(hours=5)
                         date = est_dt.strftime("%Y-%m-%d")
                         daily_counts[date] = daily_counts.get(date, 0) + 1
 
-                return daily_counts
+                return daily_counts, created
 
     except Exception as e:
         print(f"❌ 获取数据失败: {e}")
 
-    return None
+    return None, []
+
+
+def update_gap_outlook(created_at):
+    """把追踪期间的推文加入间隔草图，返回当前的间隔分位数与无推文概率"""
+    archive = 'data/raw_historical.json'
+    sketch = load_gap_sketch(archive, 'data/gap_sketch.json')
+    timestamps = np.sort(parse_timestamps(created_at))
+    # 存档与追踪期间的推文之间可能有缺口，不计入跨越缺口的间隔
+    if sketch.last_ts is not None and timestamps.size and timestamps[0] > sketch.last_ts:
+        sketch.last_ts = None
+    sketch.add_posts(timestamps)
+    save_gap_sketch('data/gap_sketch.json', sketch,
+                    os.path.getmtime(archive) if os.path.exists(archive) else None)
+    return sketch.outlook(time.time(), sketch.last_ts)
 
 
 def update_dashboard_data():
     """更新看板数据"""
 
     # 获取追踪期间数据
-    period_data = fetch_tracking_period_data()
+    period_data, created_at = fetch_tracking_period_data()
 
     if not period_data:
         print("⚠️  无法获取追踪期间数据")
@@ -136,12 +160,12 @@ def update_dashboard_data():
                 'count': r['count']
             }
             for r in recent_7
-        ]
+        ],
+        'gap_outlook': update_gap_outlook(created_at)
     }
 
     # 保存看板数据
-    with open('data/dashboard_data.json', 'w') as f:
-        json.dump(dashboard_data, f, ensure_ascii=False, indent=2)
+    publish_dashboard(dashboard_data)
 
     print(f"✅ 看板数据已更新")
 
@@ -7,6 +7,8 @@ import json
 import requests
 from datetime import datetime, timedelta
 
+from dashboard_shards import publish_dashboard
+
 # Polymarket 市场定义
 POLYMARKET_MARKETS = [
     {
@@ -173,8 +175,7 @@ def update_dashboard_data():
     }
 
     # 保存看板数据
-    with open('data/dashboard_data.json', 'w') as f:
-        json.dump(dashboard_data, f, ensure_ascii=False, indent=2)
+    publish_dashboard(dashboard_data)
 
     print(f"\n✅ 看板数据已更新")
     print(f"   Polymarket 最近7天: {len(polymarket_recent_days)} 天")
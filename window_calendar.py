@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+时间窗口日历计算 - 闭式计算周末/工作日/周内时段重叠小时数
+================================================
+所有计算基于 UTC epoch 秒，不需要逐小时遍历窗口；
+窗口字符串解析结果按 (开始, 结束) 缓存。
+"""
+
+import math
+from datetime import datetime
+from functools import lru_cache
+
+import numpy as np
+import pytz
+
+HOURS_PER_WEEK = 168
+
+# epoch (1970-01-01) 是周四，周一 00:00 为 0 时偏移 3 天
+EPOCH_HOUR_OFFSET = 72
+
+# 周六 00:00 在周内的小时位置
+WEEKEND_START_HOUR = 120
+
+ET_FORMAT = '%Y-%m-%d %I:%M %p'
+
+_SLOTS = np.arange(HOURS_PER_WEEK)
+
+
+# ============================================================
+# 窗口解析
+# ============================================================
+
+@lru_cache(maxsize=4096)
+def _parse_window_cached(start_et: str, end_et: str) -> tuple:
+    et = pytz.timezone('America/New_York')
+    start = et.localize(datetime.strptime(start_et, ET_FORMAT))
+    end = et.localize(datetime.strptime(end_et, ET_FORMAT))
+    start_utc = start.astimezone(pytz.UTC)
+    end_utc = end.astimezone(pytz.UTC)
+    return start, end, start_utc, end_utc
+
+
+def parse_window(start_et: str, end_et: str) -> dict:
+    """解析 ET 时间窗口（格式 '2026-02-05 12:00 PM'），结果缓存"""
+    start, end, start_utc, end_utc = _parse_window_cached(start_et, end_et)
+    return {
+        'start_et': start,
+        'end_et': end,
+        'start_utc': start_utc,
+        'end_utc': end_utc,
+        'start_ts': start_utc.timestamp(),
+        'end_ts': end_utc.timestamp(),
+        'total_hours': (end_utc - start_utc).total_seconds() / 3600,
+    }
+
+
+# ============================================================
+# 闭式重叠计算
+# ============================================================
+
+def _week_position(ts: float) -> tuple:
+    """epoch 秒 -> (自参考周一起的完整周数, 周内小时位置)"""
+    hours = ts / 3600 + EPOCH_HOUR_OFFSET
+    weeks = math.floor(hours / HOURS_PER_WEEK)
+    return weeks, hours - weeks * HOURS_PER_WEEK
+
+
+def _cumulative_weekend_hours(ts: float) -> float:
+    weeks, position = _week_position(ts)
+    return weeks * 48 + min(max(position - WEEKEND_START_HOUR, 0.0), 48.0)
+
+
+def hour_of_week(ts: float) -> int:
+    """epoch 秒对应的 UTC 周内小时（周一 00:00 = 0）"""
+    return (int(ts // 3600) + EPOCH_HOUR_OFFSET) % HOURS_PER_WEEK
+
+
+def hour_of_week_overlap(start_ts: float, end_ts: float) -> np.ndarray:
+    """[start_ts, end_ts) 在每个周内时段上覆盖的小时数"""
+    if end_ts <= start_ts:
+        return np.zeros(HOURS_PER_WEEK)
+    start_weeks, start_pos = _week_position(start_ts)
+    end_weeks, end_pos = _week_position(end_ts)
+    return (
+        (end_weeks - start_weeks)
+        + np.clip(end_pos - _SLOTS, 0.0, 1.0)
+        - np.clip(start_pos - _SLOTS, 0.0, 1.0)
+    )
+
+
+def weekend_hours(start_ts: float, end_ts: float) -> float:
+    """[start_ts, end_ts) 中落在周末 (UTC 周六、周日) 的小时数"""
+    if end_ts <= start_ts:
+        return 0.0
+    return _cumulative_weekend_hours(end_ts) - _cumulative_weekend_hours(start_ts)
+
+
+def weekday_hours(start_ts: float, end_ts: float) -> float:
+    """[start_ts, end_ts) 中落在工作日的小时数"""
+    if end_ts <= start_ts:
+        return 0.0
+    return (end_ts - start_ts) / 3600 - weekend_hours(start_ts, end_ts)
+
+
+def cumulative_weighted_hours(ts: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """参考周一起到 ts 的按周内时段加权的累计小时数（向量化）
+
+    [a, b) 的加权小时数 = F(b) - F(a)，等价于 weights @ hour_of_week_overlap(a, b)。
+    """
+    hours = np.asarray(ts, dtype=np.float64) / 3600 + EPOCH_HOUR_OFFSET
+    weeks = np.floor(hours / HOURS_PER_WEEK)
+    position = hours - weeks * HOURS_PER_WEEK
+    slot = np.minimum(position.astype(np.int64), HOURS_PER_WEEK - 1)
+    cumulative = np.concatenate([[0.0], np.cumsum(weights)])
+    return weeks * cumulative[-1] + cumulative[slot] + (position - slot) * weights[slot]